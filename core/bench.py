@@ -0,0 +1,375 @@
+"""
+Benchmarks reproducibles de los caminos reales de encode (TrimService / Discord ladder).
+
+- Inputs sintéticos generados con lavfi (testsrc2 / mandelbrot / ruido) y cacheados en
+  cache/bench/ (mismos parámetros -> mismo archivo).
+- Cada caso corre en su propio proceso worker (python -m core.bench), así el pico de RSS
+  (worker + ffmpeg hijos, via getrusage) es de ese caso y no se mezcla con los demás.
+  Sin getrusage (Windows) o congelado (sin python aparte, corre en el mismo proceso) el
+  pico sale de muestrear el RSS del proceso y sus hijos con psutil (opcional; sin
+  psutil la columna queda vacía).
+- Resultados a JSON o CSV (según extensión): wall time, realtime factor, tamaño de salida,
+  intentos del ladder y pico de RSS, más la versión (git) y el ffmpeg usados.
+
+Uso:
+    python cli.py bench --quick -o bench.json
+    python cli.py bench --ops slice-reencode --preset veryfast,medium --bitrate 2500k,5000k -o presets.csv
+"""
+import csv
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Windows: sin getrusage
+    resource = None
+
+# (nombre, filtro lavfi de video); {w},{h},{r},{d} se completan por caso
+SOURCES = {
+    # patrón con movimiento y texto: contenido "fácil" tipo screen recording
+    "testsrc2": "testsrc2=size={w}x{h}:rate={r}:duration={d}",
+    # zoom continuo con mucho detalle: contenido "difícil" tipo gameplay
+    "mandelbrot": "mandelbrot=size={w}x{h}:rate={r},trim=duration={d}",
+    # ruido temporal: peor caso para el encoder
+    "noise": "color=c=gray:size={w}x{h}:rate={r}:duration={d},noise=alls=60:allf=t+u",
+}
+
+# (source, width, height, fps, duration)
+FULL_INPUTS = [
+    (src, w, h, 30, d)
+    for src in SOURCES
+    for (w, h) in ((1280, 720), (1920, 1080))
+    for d in (20, 90)
+]
+QUICK_INPUTS = [
+    ("testsrc2", 1280, 720, 30, 20),
+    ("mandelbrot", 1280, 720, 30, 20),
+    ("noise", 1280, 720, 30, 20),
+]
+
+OPS = ("slice-reencode", "slice-copy", "slice-smart", "slice-discord", "compress")
+
+CSV_FIELDS = [
+    "case", "op", "source", "width", "height", "fps", "duration",
+    "preset", "bitrate", "resolution",
+    "ok", "error", "wall", "realtime", "encode_fps", "output_bytes",
+    "start_attempt", "full_encodes", "early_aborts", "complexity", "plan_height", "plan_fps",
+    "chunks", "peak_rss_mb",
+]
+
+
+# -------------------- inputs --------------------
+
+def input_path(cache_dir, source, w, h, fps, duration):
+    return os.path.join(cache_dir, f"{source}_{w}x{h}_{fps}fps_{duration}s.mp4")
+
+
+def generate_input(ffmpeg, cache_dir, source, w, h, fps, duration):
+    """Genera (una vez) el input sintético: fuentes deterministas + GOP fijo (keyframe cada 2s)."""
+    path = input_path(cache_dir, source, w, h, fps, duration)
+    if os.path.exists(path):
+        return path
+
+    os.makedirs(cache_dir, exist_ok=True)
+    vf = SOURCES[source].format(w=w, h=h, r=fps, d=duration)
+    tmp = path + ".tmp.mp4"
+    cmd = [
+        ffmpeg, "-y", "-loglevel", "error",
+        "-f", "lavfi", "-i", vf,
+        "-f", "lavfi", "-i", f"sine=frequency=440:sample_rate=48000:duration={duration}",
+        "-shortest",
+        "-c:v", "libx264", "-preset", "veryfast", "-crf", "20",
+        "-g", str(fps * 2), "-pix_fmt", "yuv420p",
+        "-c:a", "aac", "-b:a", "128k",
+        "-movflags", "+faststart",
+        tmp,
+    ]
+    subprocess.run(cmd, check=True, capture_output=True, timeout=1800)
+    os.replace(tmp, path)
+    return path
+
+
+# -------------------- casos --------------------
+
+def build_cases(inputs, ops, presets, bitrates, resolutions):
+    cases = []
+    for (source, w, h, fps, duration) in inputs:
+        for op in ops:
+            # preset/bitrate/resolution sólo afectan al re-encode del slicer
+            matrix = [(p, b, r) for p in presets for b in bitrates for r in resolutions] \
+                if op == "slice-reencode" else [(None, None, None)]
+            for preset, bitrate, resolution in matrix:
+                name = f"{op}:{source}_{w}x{h}_{duration}s"
+                if preset:
+                    name += f":{preset}/{bitrate}/{resolution}"
+                cases.append({
+                    "case": name, "op": op, "source": source,
+                    "width": w, "height": h, "fps": fps, "duration": duration,
+                    "preset": preset, "bitrate": bitrate, "resolution": resolution,
+                })
+    return cases
+
+
+class _RssSampler:
+    """Pico de RSS (proceso + hijos, p.ej. ffmpeg) muestreado con psutil mientras corre un caso."""
+
+    INTERVAL = 0.1
+
+    def __init__(self):
+        self.peak = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        try:
+            import psutil
+        except ImportError:
+            return self
+        self._thread = threading.Thread(target=self._run, args=(psutil,), daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self, psutil):
+        proc = psutil.Process()
+        while True:
+            total = 0
+            try:
+                total = proc.memory_info().rss
+                for child in proc.children(recursive=True):
+                    try:
+                        total += child.memory_info().rss
+                    except psutil.Error:
+                        pass
+            except psutil.Error:
+                pass
+            self.peak = max(self.peak or 0, total)
+            if self._stop.wait(self.INTERVAL):
+                return
+
+    def stop(self):
+        """Devuelve el pico en MB (None sin psutil)."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return round(self.peak / (1024 * 1024), 1) if self.peak else None
+
+
+def _peak_rss_mb():
+    """Pico de RSS del proceso actual y de sus hijos ya esperados (ffmpeg)."""
+    if resource is None:
+        return None
+    self_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    child_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    peak = max(self_rss, child_rss)
+    # Linux: KB; macOS: bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_case(case, src_path, work_dir, isolated=False):
+    """
+    Corre UN caso con los services reales y devuelve la fila de resultados.
+    isolated: es el único caso de este proceso (worker), getrusage sirve como pico.
+    """
+    from .cli import get_path
+    from .services.ffmpeg_service import FFmpegService
+    from .services.trim_service import TrimService
+
+    ff = FFmpegService(get_path)
+    row = dict(case)
+    row.update({"ok": False, "error": None})
+
+    os.makedirs(work_dir, exist_ok=True)
+    out_path = os.path.join(work_dir, "out.mp4")
+    duration = case["duration"]
+
+    sampler = _RssSampler().start()
+    t0 = time.monotonic()
+    try:
+        if case["op"] == "compress":
+            stats = {}
+            ok, output_path, _ = ff.compress_to_discord_10mb(
+                src_path, work_dir, on_stats=stats.update
+            )
+            row.update({
+                "ok": ok,
+                "output_bytes": os.path.getsize(output_path) if ok else None,
+                "start_attempt": stats.get("start_attempt"),
+                "full_encodes": stats.get("full_encodes"),
+                "early_aborts": stats.get("early_aborts"),
+                "complexity": stats.get("complexity"),
+                "plan_height": stats.get("plan_height"),
+                "plan_fps": stats.get("plan_fps"),
+                "chunks": stats.get("chunks"),
+                "encode_fps": stats.get("encode_fps"),
+            })
+        else:
+            mode = case["op"].split("-", 1)[1]
+            trim = TrimService(ff)
+            # rango centrado (no arranca en keyframe: ejercita el snap / smart-cut)
+            start = round(duration * 0.25 + 0.37, 3)
+            end = round(duration * 0.75 + 0.21, 3)
+            start, end, keyframes = trim.resolve_range(
+                src_path, start, end,
+                mode="reencode" if mode == "discord" else mode,
+                discord=(mode == "discord"), duration=duration
+            )
+            spec = trim.make_spec(
+                src_path, start, end, out_path,
+                mode="reencode" if mode == "discord" else mode,
+                discord=(mode == "discord"),
+                keyframes=keyframes,
+                fps=case["fps"],
+                preset=case["preset"] or "medium",
+                bitrate=case["bitrate"] or "2500k",
+                resolution=case["resolution"] or "720p",
+            )
+            stats = trim.run(spec)
+            duration = end - start
+            row.update({
+                "ok": True,
+                "output_bytes": os.path.getsize(out_path),
+                "encode_fps": stats["encode_fps"],
+            })
+    except Exception as e:
+        row["error"] = str(e).splitlines()[0] if str(e) else type(e).__name__
+
+    wall = time.monotonic() - t0
+    sampled_mb = sampler.stop()
+    row["wall"] = round(wall, 3)
+    row["realtime"] = round(duration / wall, 3) if row["ok"] and wall > 0 else None
+    if row.get("encode_fps") is not None:
+        row["encode_fps"] = round(row["encode_fps"], 1)
+    row["peak_rss_mb"] = (_peak_rss_mb() if isolated else None) or sampled_mb
+    return row
+
+
+# -------------------- runner --------------------
+
+def _git_version(root):
+    try:
+        p = subprocess.run(["git", "describe", "--always", "--dirty"], cwd=root,
+                           capture_output=True, text=True, timeout=10)
+        return p.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def _ffmpeg_version(ffmpeg):
+    try:
+        p = subprocess.run([ffmpeg, "-version"], capture_output=True, text=True, timeout=10)
+        return p.stdout.splitlines()[0] if p.stdout else None
+    except Exception:
+        return None
+
+
+def write_results(path, meta, rows):
+    if path.lower().endswith(".csv"):
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction="ignore")
+            writer.writeheader()
+            for row in rows:
+                writer.writerow(row)
+        # la metadata va aparte para no romper el CSV
+        with open(path + ".meta.json", "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"meta": meta, "results": rows}, f, indent=2)
+
+
+def run_suite(args, reporter):
+    from .cli import app_dir, get_path
+    from .services.ffmpeg_service import FFmpegService
+
+    ff = FFmpegService(get_path)
+    ffmpeg = ff._get_ffmpeg_path()
+    cache_dir = args.cache_dir or get_path(os.path.join("cache", "bench"))
+    work_root = os.path.join(cache_dir, "work")
+
+    inputs = QUICK_INPUTS if args.quick else FULL_INPUTS
+    if args.sources:
+        inputs = [i for i in inputs if i[0] in args.sources]
+    cases = build_cases(
+        inputs, args.ops or OPS,
+        args.preset or ["medium"], args.bitrate or ["2500k"], args.resolution or ["720p"]
+    )
+
+    meta = {
+        "version": _git_version(app_dir()),
+        "ffmpeg": _ffmpeg_version(ffmpeg),
+        "cpu_count": os.cpu_count(),
+        "platform": sys.platform,
+        "started": time.time(),
+        "repeat": args.repeat,
+    }
+
+    rows = []
+    input_errors = {}
+    for (source, w, h, fps, duration) in inputs:
+        reporter.emit("bench", kind="input", source=source, width=w, height=h, duration=duration)
+        try:
+            generate_input(ffmpeg, cache_dir, source, w, h, fps, duration)
+        except Exception as e:
+            stderr = getattr(e, "stderr", None)
+            detail = stderr.strip().splitlines()[-1] if stderr and stderr.strip() else str(e)
+            input_errors[input_path(cache_dir, source, w, h, fps, duration)] = detail
+
+    for i, case in enumerate(cases, 1):
+        src_path = input_path(cache_dir, case["source"], case["width"], case["height"],
+                              case["fps"], case["duration"])
+        if src_path in input_errors:
+            row = dict(case, ok=False, error=f"input generation failed: {input_errors[src_path]}")
+            rows.append(row)
+            reporter.emit("result", kind="bench", **row)
+            continue
+
+        for rep in range(args.repeat):
+            work_dir = os.path.join(work_root, f"case{i}_{rep}")
+            row = _run_case_isolated(case, src_path, work_dir)
+            row["repeat"] = rep
+            rows.append(row)
+            reporter.emit("result", kind="bench", **row)
+            _rmtree_quiet(work_dir)
+
+    if args.output:
+        write_results(args.output, meta, rows)
+
+    return rows
+
+
+def _run_case_isolated(case, src_path, work_dir):
+    """
+    Corre el caso en un proceso aparte (python -m core.bench) para medir su propio pico de RSS.
+    Congelado (PyInstaller) no hay python para lanzar: corre acá (pico muestreado, ver _RssSampler).
+    """
+    if getattr(sys, "frozen", False):
+        return run_case(case, src_path, work_dir)
+
+    cmd = [sys.executable, "-m", "core.bench", json.dumps({"case": case, "src": src_path, "work": work_dir})]
+    from .cli import app_dir
+    p = subprocess.run(cmd, cwd=app_dir(), capture_output=True, text=True)
+    lines = [ln for ln in p.stdout.splitlines() if ln.strip()]
+    if p.returncode == 0 and lines:
+        try:
+            return json.loads(lines[-1])
+        except ValueError:
+            pass
+    row = dict(case)
+    row.update({"ok": False, "error": (p.stderr.strip().splitlines() or ["worker failed"])[-1]})
+    return row
+
+
+def _rmtree_quiet(path):
+    import shutil
+    shutil.rmtree(path, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    # worker de un caso: recibe {"case", "src", "work"} y escribe la fila como JSON
+    payload = json.loads(sys.argv[1])
+    print(json.dumps(run_case(payload["case"], payload["src"], payload["work"], isolated=True)))
+
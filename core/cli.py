@@ -0,0 +1,543 @@
+"""
+CLI headless de Half-Slice: slice / compress / download en lote sin GUI.
+
+Usa los mismos services que el GUI (FFmpegService, TrimService, YouTubeService y el
+JobScheduler) y NO importa tkinter / pygame / cv2, así corre en una máquina sin display.
+
+Salida: una línea JSON por evento en stdout (progress / result / summary), pensada
+para que la consuma otra herramienta. Los errores de uso van a stderr.
+
+Ejemplos:
+    python cli.py slice clip.mp4 other.mp4 --start 10 --end 25 --mode smart -o out/
+    python cli.py compress recordings/*.mp4 --jobs 2 --parallel-attempts 2
+    python cli.py download URL1 URL2 --format mp3 -o music/
+    python cli.py compress --input-list files.txt
+    python cli.py slice clip.mp4 --start 10 --end 40 --rendition discord:::8 --rendition small:480p:800k
+    python cli.py slice stream.mp4 --ranges highlights.csv -o clips/
+    python cli.py watch recordings/ -o compressed/ --jobs 2
+    python cli.py bench --quick -o bench.json
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import threading
+import time
+
+from .services.config_service import ConfigService
+from .services.ffmpeg_service import FFmpegService
+from .services.job_service import JobScheduler
+from .services.trim_service import TrimService
+from .services.watch_service import WatchFolderService
+from .services.youtube_service import YouTubeService
+
+
+def app_dir():
+    # igual que el GUI: al lado del exe si está compilado, si no la raíz del proyecto
+    if getattr(sys, 'frozen', False):
+        return os.path.dirname(sys.executable)
+    return os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def get_path(relative_path):
+    return os.path.join(app_dir(), relative_path)
+
+
+class JsonReporter:
+    """Escribe eventos JSON (uno por línea) de forma thread-safe, con throttle de progreso por job."""
+
+    def __init__(self, stream=None, progress_interval=1.0, quiet=False):
+        self.stream = stream or sys.stdout
+        self.progress_interval = progress_interval
+        self.quiet = quiet
+        self._lock = threading.Lock()
+        self._last_progress = {}
+
+    def emit(self, event, **fields):
+        fields = {"event": event, "time": round(time.time(), 3), **fields}
+        line = json.dumps(fields, ensure_ascii=False, default=str)
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+    def on_change(self, job):
+        if job is None or self.quiet or job.state != "running":
+            return
+        now = time.monotonic()
+        with self._lock:
+            last = self._last_progress.get(job.id, 0.0)
+            if now - last < self.progress_interval:
+                return
+            self._last_progress[job.id] = now
+        self.emit(
+            "progress",
+            job=job.id,
+            kind=job.kind,
+            input=job.title,
+            percent=round(job.progress, 1),
+            fps=round(job.fps, 1) if job.fps else None,
+            speed=round(job.speed, 3) if job.speed else None,
+            eta=round(job.eta, 1) if job.eta is not None else None,
+            status=job.status or None,
+        )
+
+
+def expand_inputs(items, input_list=None, urls=False):
+    """Inputs posicionales (con globs) + los de --input-list (uno por línea, '-' = stdin)."""
+    result = []
+    for item in items:
+        matches = [] if urls else sorted(glob.glob(item))
+        result.extend(matches or [item])
+
+    if input_list:
+        f = sys.stdin if input_list == "-" else open(input_list, "r", encoding="utf-8")
+        try:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    result.append(line)
+        finally:
+            if f is not sys.stdin:
+                f.close()
+
+    # sin duplicados, respetando el orden
+    seen = set()
+    return [x for x in result if not (x in seen or seen.add(x))]
+
+
+# -------------------- comandos --------------------
+
+def submit_slices(args, ctx):
+    trim = TrimService(ctx.ff)
+    mode = args.mode or ctx.config.get("slice_mode", "reencode")
+    submitted = 0
+
+    inputs = expand_inputs(args.inputs, args.input_list)
+
+    ranges = list(args.range)
+    if args.ranges:
+        try:
+            ranges += trim.load_ranges(args.ranges)
+        except (OSError, ValueError) as e:
+            raise SystemExit(f"--ranges: {e}")
+    if ranges:
+        return submit_range_batches(args, ctx, trim, mode, inputs, ranges)
+
+    single_file = len(inputs) == 1 and (args.output or "").lower().endswith(".mp4")
+
+    for input_path in inputs:
+        try:
+            info = ctx.ff.probe(input_path)
+            duration = info["duration"]
+            if duration is None:
+                raise RuntimeError("ffprobe failed: unknown duration")
+            end = duration if args.end is None else args.end
+            start, end, keyframes = trim.resolve_range(
+                input_path, args.start, end, mode=mode, discord=args.discord,
+                duration=duration
+            )
+            if single_file:
+                output_path = args.output
+            else:
+                output_path = trim.range_output_path(input_path, start, end, args.output)
+            spec = trim.make_spec(
+                input_path, start, end, output_path,
+                mode=mode,
+                discord=args.discord,
+                keyframes=keyframes,
+                fps=(info["video"] or {}).get("fps"),
+                preset=args.preset or ctx.config.get("preset", "medium"),
+                bitrate=args.bitrate or ctx.config.get("bitrate", "2500k"),
+                resolution=args.resolution or ctx.config.get("resolution", "720p"),
+                renditions=args.rendition,
+            )
+        except Exception as e:
+            ctx.reporter.emit("result", kind="slice", input=input_path, ok=False, error=str(e))
+            ctx.failed += 1
+            continue
+
+        def work(job, spec=spec):
+            stats = trim.run(
+                spec, on_progress=job.set_progress, threads=args.threads or job.threads,
+                cancel_event=job.cancel_event, on_event=job.on_event
+            )
+            job.set_stats(stats)
+            return stats
+
+        ctx.submit("slice", input_path, work, lambda job, spec=spec: {
+            "output": spec["output"],
+            "start": spec["start"],
+            "end": spec["end"],
+            "mode": spec["mode"],
+            "renditions": job.result.get("renditions"),
+        })
+        submitted += 1
+
+    return submitted
+
+
+def submit_range_batches(args, ctx, trim, mode, inputs, ranges):
+    """Varios rangos por input: un job por archivo que los exporta todos (TrimService.run_batch)."""
+    submitted = 0
+    for input_path in inputs:
+        try:
+            info = ctx.ff.probe(input_path)
+            if info["duration"] is None:
+                raise RuntimeError("ffprobe failed: unknown duration")
+            specs = trim.make_batch(
+                input_path, ranges, out_dir=args.output,
+                mode=mode,
+                discord=args.discord,
+                duration=info["duration"],
+                fps=(info["video"] or {}).get("fps"),
+                preset=args.preset or ctx.config.get("preset", "medium"),
+                bitrate=args.bitrate or ctx.config.get("bitrate", "2500k"),
+                resolution=args.resolution or ctx.config.get("resolution", "720p"),
+                renditions=args.rendition,
+            )
+        except Exception as e:
+            ctx.reporter.emit("result", kind="slice", input=input_path, ok=False, error=str(e))
+            ctx.failed += 1
+            continue
+
+        def work(job, specs=specs):
+            stats = trim.run_batch(
+                specs, on_progress=job.set_progress, threads=args.threads or job.threads,
+                cancel_event=job.cancel_event, on_event=job.on_event
+            )
+            job.set_stats(stats)
+            return stats
+
+        ctx.submit("slice", input_path, work, lambda job: {
+            "fits": job.result["failed"] == 0,
+            "outputs": job.result["outputs"],
+            "groups": job.result["groups"],
+            "mode": mode,
+        })
+        submitted += 1
+
+    return submitted
+
+
+def range_arg(value):
+    """'START,END' / 'START-END' (segundos o [hh:]mm:ss) -> (start, end)."""
+    try:
+        ranges = TrimService.parse_ranges(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    if len(ranges) != 1:
+        raise argparse.ArgumentTypeError("expected START,END")
+    return ranges[0]
+
+
+def submit_compressions(args, ctx):
+    max_bytes = int(args.max_mb * 1024 * 1024)
+    parallel_attempts = args.parallel_attempts or ctx.config.get("discord_parallel_attempts", 1)
+    submitted = 0
+
+    for input_path in expand_inputs(args.inputs, args.input_list):
+        def work(job, input_path=input_path):
+            return ctx.ff.compress_to_discord_10mb(
+                input_path,
+                args.output,
+                max_bytes=max_bytes,
+                on_progress=job.set_progress,
+                on_status=job.set_status,
+                predict=not args.no_predict,
+                parallel_attempts=parallel_attempts,
+                cancel_event=job.cancel_event,
+                on_event=job.on_event,
+                on_stats=job.set_stats,
+                threads=job.threads,
+                renditions=args.rendition,
+            )
+
+        def describe(job):
+            ok, output_path, size_mb = job.result
+            return {
+                "fits": ok,
+                "output": output_path if ok else None,
+                "size_bytes": os.path.getsize(output_path) if ok else None,
+                "size_mb": round(size_mb, 3),
+                "attempts": dict(job.stats or {}),
+            }
+
+        ctx.submit("compress", input_path, work, describe)
+        submitted += 1
+
+    return submitted
+
+
+def submit_downloads(args, ctx):
+    yt = YouTubeService()
+    out_dir = args.output or ctx.config.get("youtube_download_dir") or os.getcwd()
+    submitted = 0
+
+    for url in expand_inputs(args.inputs, args.input_list, urls=True):
+        def work(job, url=url):
+            def hook(line):
+                pct = yt.parse_progress_percent(line)
+                if pct is not None:
+                    job.set_progress(pct)
+
+            return yt.download(
+                url=url,
+                out_dir=out_dir,
+                quality=args.quality,
+                output_type=args.format,
+                progress_hook=hook,
+                cancel_event=job.cancel_event,
+            )
+
+        ctx.submit("download", url, work, lambda job: {"output": job.result})
+        submitted += 1
+
+    return submitted
+
+
+def run_watch(args, ctx):
+    """
+    Watch mode headless: corre hasta Ctrl+C (o, con --once, una pasada y espera sus jobs).
+    Usa el mismo ledger que el GUI (en la carpeta), así no se repite trabajo entre ambos.
+    """
+    def on_event(kind, path, info):
+        if kind in ("done", "failed", "cancelled"):
+            with ctx._lock:
+                if kind == "done" and info.get("fits"):
+                    ctx.done += 1
+                elif kind == "cancelled":
+                    ctx.cancelled += 1
+                else:
+                    ctx.failed += 1
+        ctx.reporter.emit("watch", kind=kind, input=path, **info)
+
+    watch = WatchFolderService(
+        ctx.ff, ctx.jobs, args.folder,
+        out_dir=args.output,
+        ledger_path=args.ledger,
+        interval=args.interval,
+        stable_polls=args.stable_polls,
+        max_bytes=int(args.max_mb * 1024 * 1024),
+        parallel_attempts=args.parallel_attempts or ctx.config.get("discord_parallel_attempts", 1),
+        on_event=on_event,
+    )
+
+    if args.once:
+        # sin historia previa: hacen falta stable_polls + 1 pasadas para confirmar estabilidad
+        for i in range(watch.stable_polls + 1):
+            if i:
+                time.sleep(args.interval)
+            watch.scan()
+        return
+
+    watch.start()
+    try:
+        while True:
+            time.sleep(0.5)
+    finally:
+        watch.stop()
+
+
+class Context:
+    def __init__(self, args):
+        self.config = ConfigService(get_path("config.json")).load()
+        self.reporter = JsonReporter(progress_interval=args.progress_interval, quiet=args.quiet)
+        self.ff = FFmpegService(
+            get_path,
+            probe_cache_path=get_path(os.path.join("cache", "probe_cache.json")),
+            size_history_path=get_path(os.path.join("cache", "size_history.jsonl")),
+        )
+        self.jobs = JobScheduler(
+            max_encodes=args.jobs or self.config.get("max_concurrent_jobs"),
+            max_downloads=args.downloads,
+            on_change=self.reporter.on_change,
+        )
+        self.failed = 0
+        self.cancelled = 0
+        self.done = 0
+        self._lock = threading.Lock()
+
+    def submit(self, kind, title, fn, describe):
+        def on_done(job):
+            fields = {
+                "job": job.id,
+                "kind": kind,
+                "input": title,
+                "state": job.state,
+                "ok": job.state == "done",
+                "elapsed": round(job.finished_at - job.started_at, 3) if job.started_at else None,
+            }
+            if job.state == "done":
+                try:
+                    fields.update(describe(job))
+                except Exception as e:
+                    fields["describe_error"] = str(e)
+                # compress: el job terminó bien pero puede no haber entrado en el límite
+                fields["ok"] = fields.get("fits", True)
+                if job.stats:
+                    fields["realtime"] = round(job.stats.get("realtime") or 0, 3)
+                    fields["encode_fps"] = round(job.stats.get("encode_fps") or 0, 1)
+            elif job.error is not None:
+                fields["error"] = str(job.error)
+
+            with self._lock:
+                if fields["ok"]:
+                    self.done += 1
+                elif job.state == "cancelled":
+                    self.cancelled += 1
+                else:
+                    self.failed += 1
+            self.reporter.emit("result", **fields)
+
+        return self.jobs.submit(kind, title, fn, on_done=on_done)
+
+
+def comma_list(value):
+    return [x.strip() for x in value.split(",") if x.strip()]
+
+
+def rendition_arg(value):
+    """'name[:resolution[:bitrate[:max_mb]]]' -> rendition (ver FFmpegService.rendition_target)."""
+    parts = value.split(":")
+    if len(parts) > 4 or not parts[0].strip():
+        raise argparse.ArgumentTypeError("expected name[:resolution[:bitrate[:max_mb]]]")
+    parts += [""] * (4 - len(parts))
+    name, resolution, bitrate, max_mb = (x.strip() for x in parts)
+
+    if resolution and resolution not in FFmpegService.RENDITION_HEIGHTS:
+        raise argparse.ArgumentTypeError(
+            f"unknown resolution {resolution!r} (use {', '.join(FFmpegService.RENDITION_HEIGHTS)})"
+        )
+    if bitrate and (FFmpegService.parse_bitrate(bitrate) or 0) < 10_000:
+        raise argparse.ArgumentTypeError(f"invalid bitrate {bitrate!r}")
+    try:
+        max_mb = float(max_mb) if max_mb else None
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid max_mb {max_mb!r}")
+
+    return {"name": name, "resolution": resolution or None, "bitrate": bitrate or None, "max_mb": max_mb}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="half-slice", description="Half-Slice headless CLI")
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("inputs", nargs="*", help="archivos (acepta globs) o URLs")
+    common.add_argument("--input-list", help="archivo con un input por línea ('-' = stdin)")
+    common.add_argument("-o", "--output", help="carpeta de salida (slice: también un .mp4 si hay un solo input)")
+    common.add_argument("-j", "--jobs", type=int, help="encodes en paralelo (default: cores/4 o config)")
+    common.add_argument("--downloads", type=int, default=2, help="descargas en paralelo")
+    common.add_argument("--progress-interval", type=float, default=1.0, help="segundos entre eventos de progreso por job")
+    common.add_argument("-q", "--quiet", action="store_true", help="sólo eventos result/summary")
+
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("slice", parents=[common], help="cortar un rango de cada input")
+    p.add_argument("--start", type=float, default=0.0)
+    p.add_argument("--end", type=float, help="default: final del video")
+    p.add_argument("--mode", choices=TrimService.MODES, help="default: slice_mode del config")
+    p.add_argument("--discord", action="store_true", help="encode chico (<8MB) como el modo Discord del slicer")
+    p.add_argument("--preset")
+    p.add_argument("--bitrate")
+    p.add_argument("--resolution", choices=sorted(TrimService.RESOLUTION_MAP))
+    p.add_argument("--threads", type=int, help="-threads por ffmpeg (default: reparto del scheduler)")
+    p.add_argument("--rendition", action="append", type=rendition_arg, default=[],
+                   help="salida extra del mismo decode: name[:resolution[:bitrate[:max_mb]]] -> <output>_<name>.mp4")
+    p.add_argument("--range", action="append", type=range_arg, default=[],
+                   help="rango START,END (repetible); varios rangos se exportan juntos como <base>_<start>-<end>.mp4")
+    p.add_argument("--ranges", help="archivo .txt / .csv con un rango (inicio, fin) por línea")
+    p.set_defaults(submit=submit_slices)
+
+    p = sub.add_parser("compress", parents=[common], help="comprimir para Discord")
+    p.add_argument("--max-mb", type=float, default=10.0)
+    p.add_argument("--parallel-attempts", type=int, help="escalones del ladder en paralelo")
+    p.add_argument("--no-predict", action="store_true", help="sin sizing por muestras")
+    p.add_argument("--rendition", action="append", type=rendition_arg, default=[],
+                   help="salida extra del mismo decode: name[:resolution[:bitrate[:max_mb]]] -> <base>_<name>.mp4")
+    p.set_defaults(submit=submit_compressions)
+
+    p = sub.add_parser("download", parents=[common], help="descargar con yt-dlp")
+    p.add_argument("--quality", choices=["1080p", "720p", "480p", "360p"], default="720p")
+    p.add_argument("--format", choices=["mp4", "mp3"], default="mp4")
+    p.set_defaults(submit=submit_downloads)
+
+    p = sub.add_parser("watch", help="comprimir para Discord cada MP4 nuevo de una carpeta")
+    p.add_argument("folder")
+    p.add_argument("-o", "--output", help="carpeta de salida (default: la misma)")
+    p.add_argument("-j", "--jobs", type=int, help="encodes en paralelo (default: cores/4 o config)")
+    p.add_argument("--interval", type=float, default=2.0, help="segundos entre pasadas")
+    p.add_argument("--stable-polls", type=int, default=2, help="pasadas sin cambios para considerar un archivo completo")
+    p.add_argument("--ledger", help="archivo del ledger (default: <folder>/.halfslice_watch.json)")
+    p.add_argument("--max-mb", type=float, default=10.0)
+    p.add_argument("--parallel-attempts", type=int, help="escalones del ladder en paralelo")
+    p.add_argument("--once", action="store_true", help="una pasada, esperar los encodes y salir")
+    p.add_argument("--progress-interval", type=float, default=1.0, help="segundos entre eventos de progreso por job")
+    p.add_argument("-q", "--quiet", action="store_true", help="sólo eventos watch/summary")
+    p.set_defaults(submit=None, downloads=2)
+
+    from . import bench
+    p = sub.add_parser("bench", help="benchmarks con inputs sintéticos (lavfi)")
+    p.add_argument("-o", "--output", help="resultados .json o .csv")
+    p.add_argument("--quick", action="store_true", help="sólo inputs chicos (720p, 20s)")
+    p.add_argument("--sources", type=comma_list, help=f"subset de {','.join(bench.SOURCES)}")
+    p.add_argument("--ops", type=comma_list, help=f"subset de {','.join(bench.OPS)}")
+    p.add_argument("--preset", type=comma_list, help="presets a comparar en slice-reencode (coma)")
+    p.add_argument("--bitrate", type=comma_list, help="bitrates a comparar en slice-reencode (coma)")
+    p.add_argument("--resolution", type=comma_list, help="resoluciones a comparar en slice-reencode (coma)")
+    p.add_argument("--repeat", type=int, default=1)
+    p.add_argument("--cache-dir", help="dónde guardar los inputs generados (default: cache/bench)")
+    p.set_defaults(submit=None, jobs=None, downloads=2, progress_interval=1.0, quiet=False)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command not in ("watch", "bench") and not args.inputs and not args.input_list:
+        print("error: no inputs", file=sys.stderr)
+        return 2
+
+    ctx = Context(args)
+    t0 = time.monotonic()
+
+    try:
+        if args.command == "watch":
+            submitted = None
+            run_watch(args, ctx)
+        elif args.command == "bench":
+            from .bench import run_suite
+            rows = run_suite(args, ctx.reporter)
+            submitted = len(rows)
+            ctx.done = sum(1 for r in rows if r.get("ok"))
+            ctx.failed = len(rows) - ctx.done
+        else:
+            submitted = args.submit(args, ctx)
+
+        # wait con timeout corto para que Ctrl+C se atienda enseguida
+        while not ctx.jobs.wait(timeout=0.5):
+            pass
+    except KeyboardInterrupt:
+        ctx.jobs.shutdown(timeout=10.0)
+
+    extra = {}
+    if args.command in ("compress", "watch"):
+        # qué tan seguido el primer intento del ladder ya entra (historial de tamaños)
+        hit_rate = ctx.ff.size_history.first_attempt_hit_rate()
+        if hit_rate is not None:
+            extra["first_attempt_hit_rate"] = round(hit_rate, 3)
+
+    ctx.reporter.emit(
+        "summary",
+        command=args.command,
+        submitted=submitted,
+        done=ctx.done,
+        failed=ctx.failed,
+        cancelled=ctx.cancelled,
+        elapsed=round(time.monotonic() - t0, 3),
+        **extra,
+    )
+
+    if ctx.cancelled:
+        return 130
+    return 1 if ctx.failed else 0
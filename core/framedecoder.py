@@ -0,0 +1,117 @@
+import threading
+from contextlib import contextmanager
+
+import cv2
+
+
+class FrameDecoder:
+    """
+    Thread dedicado que es dueño de UNA sesión de cv2.VideoCapture por archivo.
+    - Los seeks (scrubbing) entran por un buzón de un solo lugar: el último pedido
+      pisa al anterior, así un drag rápido no encola decenas de seeks.
+    - session() es el acceso interno (con lock) del worker a la captura; el preview
+      no la usa (tiene su propio ffmpeg, ver PreviewEngine).
+    - close() libera la captura y termina el worker; open() arranca uno nuevo si hace falta.
+    El UI thread nunca decodifica: sólo deja pedidos.
+    """
+
+    def __init__(self, on_frame):
+        self.on_frame = on_frame   # on_frame(frame_bgr) desde el thread del decoder
+        self.fps = 30.0
+
+        self._cap = None
+        self._cap_lock = threading.RLock()
+
+        self._cond = threading.Condition()
+        self._request = None       # time_pos pendiente (single slot)
+        self._stop = None          # Event del worker actual (cada worker tiene el suyo)
+        self._thread = None
+
+    # -------------------- sesión --------------------
+
+    def open(self, path):
+        """Abre (o reemplaza) la captura. Devuelve el fps del archivo."""
+        with self._cap_lock:
+            self._release()
+            self._cap = cv2.VideoCapture(path)
+            try:
+                self._cap.set(cv2.CAP_PROP_BUFFERSIZE, 10)
+            except Exception:
+                pass
+            self.fps = self._cap.get(cv2.CAP_PROP_FPS) or 30.0
+
+        # un seek pendiente del archivo anterior ya no sirve
+        with self._cond:
+            self._request = None
+            if self._thread is None:
+                self._stop = threading.Event()
+                self._thread = threading.Thread(target=self._run, args=(self._stop,), daemon=True)
+                self._thread.start()
+
+        return self.fps
+
+    def _release(self):
+        try:
+            if self._cap is not None:
+                self._cap.release()
+        except Exception:
+            pass
+        self._cap = None
+
+    def close(self):
+        """Libera la captura y frena el worker (sin join: puede llamarse desde el hilo de UI)."""
+        with self._cond:
+            if self._stop is not None:
+                self._stop.set()
+            self._stop = None
+            self._thread = None
+            self._request = None
+            self._cond.notify_all()
+        with self._cap_lock:
+            self._release()
+
+    @contextmanager
+    def session(self):
+        """Acceso exclusivo a la captura compartida (None si no hay archivo abierto)."""
+        with self._cap_lock:
+            cap = self._cap
+            if cap is not None and not cap.isOpened():
+                cap = None
+            yield cap
+
+    # -------------------- seeks --------------------
+
+    def request_frame(self, time_pos):
+        """Pide el frame en time_pos (seg). Latest wins: pisa cualquier pedido pendiente."""
+        with self._cond:
+            self._request = float(time_pos)
+            self._cond.notify()
+
+    def _has_newer_request(self):
+        with self._cond:
+            return self._request is not None
+
+    def _run(self, stop):
+        while True:
+            with self._cond:
+                while self._request is None and not stop.is_set():
+                    self._cond.wait()
+                if stop.is_set():
+                    return
+                time_pos = self._request
+                self._request = None
+
+            with self.session() as cap:
+                if cap is None:
+                    continue
+                cap.set(cv2.CAP_PROP_POS_MSEC, time_pos * 1000)
+                ret, frame = cap.read()
+
+            # si mientras decodificábamos llegó otro pedido (o se cerró), este frame ya está viejo
+            if not ret or stop.is_set() or self._has_newer_request():
+                continue
+
+            try:
+                self.on_frame(frame)
+            except Exception:
+                pass
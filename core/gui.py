@@ -8,12 +8,15 @@ from .videoplayer import VideoPlayer
 from .soundmanager import SoundManager
 
 from .services.config_service import ConfigService
+from .services.ffmpeg_service import FFmpegService
+from .services.job_service import JobScheduler
 from .services.ui_service import UIService
 from .services.youtube_service import YouTubeService
 
 from .tabs.slicer_tab import SlicerTab
 from .tabs.discord_tab import DiscordTab
 from .tabs.youtube_tab import YouTubeTab
+from .tabs.jobs_window import JobsWindow
 
 
 class GUI:
@@ -30,8 +33,17 @@ class GUI:
 
         self.root.iconbitmap(self.get_path("assets\\icon.ico"))
 
+        # UI service (loading modal + thread-safe updates + pump de UI)
+        self.ui = UIService(self.root, self.get_path)
+
         # Services / managers
         self.soundmanager = SoundManager()
+        # una sola instancia: comparte el cache de probe() entre slicer, Discord y downloader
+        self.ffmpeg_service = FFmpegService(
+            self.get_path,
+            probe_cache_path=self.get_path("cache\\probe_cache.json"),
+            size_history_path=self.get_path("cache\\size_history.jsonl")
+        )
         self.video_player = VideoPlayer(self)  # mantiene compat con tu VideoPlayer actual
 
         self.config_service = ConfigService(self.get_path("config.json"))
@@ -47,10 +59,16 @@ class GUI:
         self.mute = bool(self.configuration.get("mute", False))
         self.soundmanager.toggle_mute(self.mute)
 
-        self.icons = self.load_icons()
+        # scheduler compartido para slice / compress / download (cola + límite por cores)
+        self.jobs = JobScheduler(
+            max_encodes=self.configuration.get("max_concurrent_jobs"),
+            on_change=lambda job: self.ui.bus.post("jobs.changed", True),
+        )
+        self.jobs_window = None
+        self._jobs_sound_on = False
+        self.ui.bus.register("jobs.changed", self._on_jobs_changed)
 
-        # UI service (loading modal + thread-safe updates)
-        self.ui = UIService(self.root, self.get_path)
+        self.icons = self.load_icons()
 
         # Build app UI
         self.create_widgets()
@@ -89,10 +107,41 @@ class GUI:
     def save_configuration(self):
         self.config_service.save(self.configuration)
 
+    # -------------------------
+    # JOBS
+    # -------------------------
+    def show_jobs(self):
+        if self.jobs_window is not None and self.jobs_window.is_open:
+            self.jobs_window.lift()
+            return
+        self.jobs_window = JobsWindow(self)
+
+    def _on_jobs_changed(self, _value=None):
+        """UI thread (pump del bus): refresca la cola y el loop de sonido mientras haya encodes."""
+        if self.jobs_window is not None:
+            self.jobs_window.refresh()
+
+        encoding = any(
+            j.state == "running" and j.kind in ("slice", "compress")
+            for j in self.jobs.jobs()
+        )
+        if encoding and not self._jobs_sound_on:
+            self.soundmanager.play_loop("slice")
+            self._jobs_sound_on = True
+        elif not encoding and self._jobs_sound_on:
+            self.soundmanager.stop_sound()
+            self._jobs_sound_on = False
+
     # -------------------------
     # WINDOW HELPERS
     # -------------------------
     def on_closing(self):
+        # que no queden ffmpeg / yt-dlp huérfanos corriendo
+        for tab in self._tabs:
+            if getattr(tab, "watch_service", None) is not None:
+                tab.watch_service.stop()
+        self.jobs.shutdown()
+        self.video_player.close()
         self.root.destroy()
 
     def center_window(self, window, width, height):
@@ -180,13 +229,15 @@ class GUI:
         root.iconbitmap(self.get_path("assets\\icon.ico"))
         self.soundmanager.play_sound("button")
 
-        width, height = 280, 210
+        width, height = 280, 275
         self.center_window(root, width, height)
 
         bitrate = self.configuration.get("bitrate", "2500k")
         resolution = self.configuration.get("resolution", "720p")
         preset = self.configuration.get("preset", "medium")
         discord_8mb = bool(self.configuration.get("discord_8mb", False))
+        slice_mode = self.configuration.get("slice_mode", "reencode")
+        discord_copy = bool(self.configuration.get("discord_copy", False))
 
         tk.Label(root, text="Bitrate:").grid(row=0, column=0, padx=10, pady=5, sticky="w")
         bitrate_combo = ttk.Combobox(root, values=["5000k", "2500k", "1000k", "500k"], state="readonly", width=12)
@@ -208,23 +259,63 @@ class GUI:
         preset_combo.set(preset)
         preset_combo.grid(row=2, column=1, padx=10, pady=5)
 
+        slice_modes = {
+            "reencode": "Re-encode",
+            "copy": "Lossless fast cut",
+            "smart": "Smart cut (exact)",
+        }
+        tk.Label(root, text="Slice mode:").grid(row=3, column=0, padx=10, pady=5, sticky="w")
+        slice_mode_combo = ttk.Combobox(root, values=list(slice_modes.values()), state="readonly", width=16)
+        slice_mode_combo.set(slice_modes.get(slice_mode, slice_modes["reencode"]))
+        slice_mode_combo.grid(row=3, column=1, padx=10, pady=5)
+
+        def on_slice_mode(_event=None):
+            apply_discord_ui()
+
+        slice_mode_combo.bind("<<ComboboxSelected>>", on_slice_mode)
+
         discord_var = tk.BooleanVar(value=discord_8mb)
+        discord_copy_var = tk.BooleanVar(value=discord_copy)
 
         hint_lbl = tk.Label(root, text="", fg="gray")
-        hint_lbl.grid(row=4, column=0, columnspan=2, pady=(2, 0))
+        hint_lbl.grid(row=5, column=0, columnspan=2, pady=(2, 0))
+
+        def selected_slice_mode():
+            label = slice_mode_combo.get()
+            for key, value in slice_modes.items():
+                if value == label:
+                    return key
+            return "reencode"
 
         def apply_discord_ui():
             on = bool(discord_var.get())
             # cuando discord ON, deshabilitamos combos (visualmente) porque se ignoran
             new_state = "disabled" if on else "readonly"
-            bitrate_combo.config(state=new_state)
-            resolution_combo.config(state=new_state)
-            preset_combo.config(state=new_state)
-            hint_lbl.config(text="Discord ON: ignora bitrate/resolution/preset" if on else "")
+            slice_mode_combo.config(state=new_state)
+
+            # copy / smart cut mantienen el source: bitrate/resolution/preset no aplican
+            copy_mode = not on and selected_slice_mode() != "reencode"
+            encode_state = "disabled" if (on or copy_mode) else "readonly"
+            bitrate_combo.config(state=encode_state)
+            resolution_combo.config(state=encode_state)
+            preset_combo.config(state=encode_state)
+            # la copia para Discord sale del mismo decode que el corte normal
+            discord_copy_chk.config(state="disabled" if on else "normal")
+
+            if on:
+                hint_lbl.config(text="Discord ON: ignora bitrate/resolution/preset")
+            elif copy_mode and selected_slice_mode() == "smart":
+                hint_lbl.config(text="Smart cut: re-encode sólo en los bordes")
+            elif copy_mode:
+                hint_lbl.config(text="Fast cut: ajusta a keyframes, calidad original")
+            else:
+                hint_lbl.config(text="")
 
         tk.Checkbutton(root, text="Compress for Discord (8MB)", variable=discord_var, command=apply_discord_ui).grid(
-            row=3, column=0, columnspan=2, pady=(6, 0)
+            row=4, column=0, columnspan=2, pady=(6, 0)
         )
+        discord_copy_chk = tk.Checkbutton(root, text="Also save a Discord copy (8MB)", variable=discord_copy_var)
+        discord_copy_chk.grid(row=6, column=0, columnspan=2)
 
         apply_discord_ui()
 
@@ -235,6 +326,8 @@ class GUI:
             self.configuration["resolution"] = resolution_combo.get() or resolution
             self.configuration["preset"] = preset_combo.get() or preset
             self.configuration["discord_8mb"] = bool(discord_var.get())
+            self.configuration["slice_mode"] = selected_slice_mode()
+            self.configuration["discord_copy"] = bool(discord_copy_var.get())
             self.save_configuration()
             self.soundmanager.play_sound("success")
 
@@ -249,12 +342,14 @@ class GUI:
                     f"Bitrate: {self.configuration['bitrate']}\n"
                     f"Resolution: {self.configuration['resolution']}\n"
                     f"Preset: {self.configuration['preset']}\n"
-                    f"Discord 8MB: OFF",
+                    f"Slice mode: {slice_modes[self.configuration['slice_mode']]}\n"
+                    f"Discord 8MB: OFF\n"
+                    f"Discord copy: {'ON' if self.configuration['discord_copy'] else 'OFF'}",
                 )
 
             root.destroy()
 
-        tk.Button(root, text="OK", command=on_ok).grid(row=5, column=0, columnspan=2, pady=10)
+        tk.Button(root, text="OK", command=on_ok).grid(row=7, column=0, columnspan=2, pady=10)
 
     # -------------------------
     # MAIN UI
@@ -0,0 +1,222 @@
+import subprocess
+import threading
+import time
+
+import numpy as np
+
+
+class PreviewEngine:
+    """
+    Preview a resolución reducida: ffmpeg decodifica y escala directo al tamaño
+    del panel (rawvideo RGB por pipe), acá sólo leemos bytes a buffers
+    preasignados y hacemos pacing por reloj de pared (si vamos atrasados,
+    se descartan frames en vez de acumular lag).
+
+    Sincronización sin polling:
+    - pause/resume con una Condition (pausado = el worker duerme en wait(), 0% CPU;
+      ffmpeg se bloquea solo cuando se llena el pipe).
+    - stop con un Event + kill del proceso (desbloquea la lectura), sin join: se llama
+      desde el hilo de Tk y el worker termina solo; su stop_event es propio, así que
+      un worker viejo nunca pisa al nuevo.
+    - cada start/stop incrementa `generation`; los frames llegan con su generation
+      para que el consumidor descarte los de un preview viejo.
+    """
+
+    RING_SIZE = 4
+
+    def __init__(self, ffmpeg_path, width=320, height=180, cwd=None, popen_kwargs=None):
+        self.ffmpeg_path = ffmpeg_path
+        self.width = width
+        self.height = height
+        self.cwd = cwd
+        self.popen_kwargs = popen_kwargs or {}
+
+        self.frames_shown = 0
+        self.frames_dropped = 0
+        self.generation = 0
+
+        self._cond = threading.Condition()
+        self._stop_event = threading.Event()
+        self._paused = False
+        self._process = None
+        self._thread = None
+
+    # -------------------- estado --------------------
+
+    @property
+    def running(self):
+        t = self._thread
+        return t is not None and t.is_alive() and not self._stop_event.is_set()
+
+    @property
+    def paused(self):
+        return self._paused
+
+    def pause(self):
+        with self._cond:
+            self._paused = True
+
+    def resume(self):
+        with self._cond:
+            self._paused = False
+            self._cond.notify_all()
+
+    def toggle_pause(self):
+        with self._cond:
+            self._paused = not self._paused
+            self._cond.notify_all()
+            return self._paused
+
+    # -------------------- start / stop --------------------
+
+    def start(self, path, start, end, fps, on_frame, on_finished=None):
+        """
+        Frena cualquier preview anterior y arranca uno nuevo.
+        on_frame(rgb_array, generation) y on_finished(generation, error) se llaman
+        desde el worker (no tocar Tk ahí). Devuelve la generation de este preview.
+        """
+        self.stop()
+
+        with self._cond:
+            self.generation += 1
+            generation = self.generation
+            self._paused = False
+            self._stop_event = threading.Event()
+            stop_event = self._stop_event
+
+        self.frames_shown = 0
+        self.frames_dropped = 0
+
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(generation, stop_event, path, start, end, fps, on_frame, on_finished),
+            daemon=True
+        )
+        self._thread.start()
+        return generation
+
+    def stop(self):
+        """
+        Frena el preview actual sin esperar al worker: no bloquea el hilo de UI.
+        Desde acá ningún frame del worker viejo pasa el chequeo de generation.
+        """
+        with self._cond:
+            self.generation += 1
+            self._stop_event.set()
+            self._paused = False
+            process = self._process
+            self._cond.notify_all()
+
+        if process is not None:
+            try:
+                process.kill()
+            except Exception:
+                pass
+
+        self._thread = None
+
+    # -------------------- worker --------------------
+
+    def _build_cmd(self, path, start, end, fps):
+        return [
+            self.ffmpeg_path, "-v", "error",
+            "-ss", f"{start:.3f}",
+            "-i", path,
+            "-t", f"{max(0.0, end - start):.3f}",
+            "-an", "-sn",
+            # escalado barato (el panel es chico) + fps constante para pacing simple
+            "-vf", f"scale={self.width}:{self.height}:flags=fast_bilinear,fps={fps:.6f}",
+            "-f", "rawvideo",
+            "-pix_fmt", "rgb24",
+            "pipe:1",
+        ]
+
+    def _run(self, generation, stop_event, path, start, end, fps, on_frame, on_finished):
+        fps = max(1.0, float(fps or 30.0))
+        frame_interval = 1.0 / fps
+        frame_bytes = self.width * self.height * 3
+
+        # ring de buffers preasignados: no alocamos por frame
+        ring = [np.empty((self.height, self.width, 3), dtype=np.uint8) for _ in range(self.RING_SIZE)]
+        views = [memoryview(buf).cast("B") for buf in ring]
+
+        error = None
+        p = None
+        try:
+            p = subprocess.Popen(
+                self._build_cmd(path, start, end, fps),
+                cwd=self.cwd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                bufsize=frame_bytes * 2,
+                **self.popen_kwargs
+            )
+            with self._cond:
+                if stop_event.is_set():
+                    p.kill()
+                else:
+                    self._process = p
+
+            t0 = time.monotonic()
+            i = 0
+            while not stop_event.is_set():
+                with self._cond:
+                    if self._paused:
+                        paused_at = time.monotonic()
+                        while self._paused and not stop_event.is_set():
+                            self._cond.wait()
+                        # lo pausado no cuenta como atraso
+                        t0 += time.monotonic() - paused_at
+                        continue
+
+                slot = i % self.RING_SIZE
+                view = views[slot]
+                got = 0
+                while got < frame_bytes:
+                    n = p.stdout.readinto(view[got:])
+                    if not n:
+                        break
+                    got += n
+                if got < frame_bytes:
+                    break  # fin del rango (o kill desde stop)
+
+                due = t0 + i * frame_interval
+                i += 1
+
+                now = time.monotonic()
+                if now > due + frame_interval:
+                    # atrasados más de un frame: lo salteamos
+                    if generation == self.generation:
+                        self.frames_dropped += 1
+                    continue
+
+                if due > now and stop_event.wait(due - now):
+                    break
+
+                on_frame(ring[slot], generation)
+                if generation == self.generation:
+                    self.frames_shown += 1
+
+        except Exception as e:
+            error = e
+
+        finally:
+            with self._cond:
+                if self._process is p:
+                    self._process = None
+            if p is not None:
+                try:
+                    p.kill()
+                except Exception:
+                    pass
+                try:
+                    p.stdout.close()
+                except Exception:
+                    pass
+                p.wait()
+
+        if on_finished:
+            try:
+                on_finished(generation, error)
+            except Exception:
+                pass
@@ -0,0 +1,185 @@
+import os
+import subprocess
+
+
+class ComplexityService:
+    """
+    Análisis rápido de qué tan difícil de comprimir es un video, para elegir
+    resolución / fps ANTES de encodear (en vez de bajar recién después de intentos fallidos).
+
+    - Decode diezmado: unas pocas ventanas cortas repartidas por el rango, a ANALYSIS_FPS,
+      en gris y a ANALYSIS_W x ANALYSIS_H (un ffmpeg por ventana, seek rápido por input).
+    - Métricas vectorizadas con NumPy:
+        motion:     energía de la diferencia entre frames consecutivos (RMS, 0..1)
+        scene_rate: cortes de escena por segundo (diferencia media > SCENE_THRESHOLD)
+        detail:     detalle espacial (gradiente medio |dx| + |dy|, 0..1)
+      y un score complexity (0..1) dominado por el movimiento: el contenido estático
+      se comprime muy bien aunque tenga mucho detalle (texto, UI).
+    - plan(): elige (alto, fps) con un presupuesto de bits por pixel que crece con
+      complexity; con mucho movimiento se mantiene el fps y se baja resolución.
+
+    NumPy se importa recién al analizar: si no está (o ffmpeg falla) analyze() devuelve None
+    y los callers siguen con su comportamiento fijo.
+    """
+
+    ANALYSIS_W, ANALYSIS_H = 128, 72
+    ANALYSIS_FPS = 5
+    WINDOWS = 5
+    WINDOW_SEC = 2.0
+    SCENE_THRESHOLD = 0.18
+
+    # normalización de las métricas (valores "altos" típicos a esta resolución)
+    MOTION_HIGH = 0.08
+    DETAIL_HIGH = 0.12
+    SCENE_RATE_HIGH = 0.5
+
+    # bits por pixel necesarios (x264) para contenido estático / de mucho movimiento
+    BPP_STATIC = 0.012
+    BPP_MOTION = 0.10
+
+    HEIGHTS = (1080, 720, 480, 360, 240)
+    FPS_OPTIONS = (30, 24, 15)
+    # a partir de acá no se baja fps (se nota más que perder resolución)
+    KEEP_FPS_MOTION = 0.5
+
+    def __init__(self, ff):
+        self.ff = ff
+
+    # -------------------- análisis --------------------
+
+    def _windows(self, start, end):
+        """(seek, length) de cada ventana de análisis dentro de [start, end]."""
+        length = end - start
+        if length <= self.WINDOWS * self.WINDOW_SEC:
+            return [(start, length)]
+        step = length / self.WINDOWS
+        return [
+            (start + (i + 0.5) * step - self.WINDOW_SEC / 2, self.WINDOW_SEC)
+            for i in range(self.WINDOWS)
+        ]
+
+    def _decode_window(self, input_path, seek, length):
+        """Frames en gris (n, h, w) uint8 de una ventana, o None."""
+        import numpy as np
+
+        ffmpeg = self.ff._get_ffmpeg_path()
+        cwd = os.path.dirname(ffmpeg) if os.path.isabs(ffmpeg) else None
+        w, h = self.ANALYSIS_W, self.ANALYSIS_H
+        cmd = [
+            ffmpeg, "-v", "error",
+            "-ss", f"{max(0.0, seek):.3f}",
+            "-t", f"{length:.3f}",
+            "-i", input_path,
+            "-an", "-sn",
+            "-vf", f"fps={self.ANALYSIS_FPS},scale={w}:{h}",
+            "-f", "rawvideo",
+            "-pix_fmt", "gray",
+            "pipe:1",
+        ]
+        p = subprocess.run(
+            cmd,
+            cwd=cwd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            timeout=60,
+            **self.ff._no_window_kwargs()
+        )
+        n = len(p.stdout) // (w * h)
+        if n == 0:
+            return None
+        return np.frombuffer(p.stdout, dtype=np.uint8, count=n * w * h).reshape(n, h, w)
+
+    def analyze(self, input_path, start=0.0, end=None, cancel_event=None):
+        """
+        Métricas de complejidad del rango [start, end] (end=None: hasta el final).
+        Devuelve dict (motion, scene_rate, detail, complexity, frames) o None si no se
+        pudo analizar (sin NumPy, ffmpeg falló, cancelado).
+        """
+        try:
+            import numpy as np
+        except ImportError:
+            return None
+
+        try:
+            if end is None:
+                end = self.ff.probe_duration_seconds(input_path)
+            if end - start <= 0:
+                return None
+
+            diffs = []
+            details = []
+            frames_total = 0
+            for seek, length in self._windows(start, end):
+                if cancel_event is not None and cancel_event.is_set():
+                    return None
+                frames = self._decode_window(input_path, seek, length)
+                if frames is None:
+                    continue
+                f = frames.astype(np.float32) / 255.0
+                frames_total += len(f)
+
+                details.append(
+                    np.abs(np.diff(f, axis=2)).mean(axis=(1, 2))
+                    + np.abs(np.diff(f, axis=1)).mean(axis=(1, 2))
+                )
+                # diferencias sólo dentro de la ventana (entre ventanas hay un salto)
+                if len(f) > 1:
+                    diffs.append(np.diff(f, axis=0))
+        except Exception:
+            return None
+
+        if not details:
+            return None
+
+        detail = float(np.concatenate(details).mean())
+        if diffs:
+            d = np.concatenate(diffs)
+            motion = float(np.sqrt((d * d).mean(axis=(1, 2))).mean())
+            mean_abs = np.abs(d).mean(axis=(1, 2))
+            scene_rate = float((mean_abs > self.SCENE_THRESHOLD).sum()) / (len(mean_abs) / self.ANALYSIS_FPS)
+        else:
+            motion, scene_rate = 0.0, 0.0
+
+        motion_n = min(1.0, motion / self.MOTION_HIGH)
+        detail_n = min(1.0, detail / self.DETAIL_HIGH)
+        scene_n = min(1.0, scene_rate / self.SCENE_RATE_HIGH)
+        complexity = min(1.0, motion_n * (0.6 + 0.4 * detail_n) + 0.15 * scene_n)
+
+        return {
+            "motion": round(motion, 5),
+            "scene_rate": round(scene_rate, 4),
+            "detail": round(detail, 5),
+            "complexity": round(complexity, 4),
+            "motion_norm": round(motion_n, 4),
+            "frames": frames_total,
+        }
+
+    # -------------------- plan --------------------
+
+    def required_bpp(self, analysis):
+        return self.BPP_STATIC + (self.BPP_MOTION - self.BPP_STATIC) * analysis["complexity"]
+
+    def plan(self, analysis, v_bps, in_w, in_h, in_fps):
+        """
+        (alto, fps) de mejor calidad que cumple el presupuesto de bits por pixel para v_bps.
+        Nunca sube de resolución ni de fps respecto del input.
+        """
+        in_h = in_h or self.HEIGHTS[0]
+        in_w = in_w or in_h * 16 / 9
+        in_fps = in_fps or 30.0
+        need = self.required_bpp(analysis)
+
+        heights = [h for h in self.HEIGHTS if h < in_h] or [in_h]
+        if in_h <= self.HEIGHTS[0] and in_h not in heights:
+            heights.insert(0, in_h)
+
+        fps_options = [f for f in self.FPS_OPTIONS if f <= in_fps + 0.5] or [in_fps]
+        if analysis["motion_norm"] >= self.KEEP_FPS_MOTION:
+            fps_options = fps_options[:1]
+
+        for h in heights:
+            w = in_w * h / in_h
+            for fps in fps_options:
+                if v_bps / (w * h * fps) >= need:
+                    return h, fps
+        return heights[-1], fps_options[-1]
@@ -1,10 +1,97 @@
 import os
 import subprocess
 import json
+import threading
+from collections import OrderedDict
+
+from .complexity_service import ComplexityService
+from .media_cache import cache_key
+from .process_utils import AnyEvent, remove_quiet, stop_process
+from .size_history import SizeHistoryStore, SizePredictor
+
+
+class SizeLimitExceeded(RuntimeError):
+    """
+    El intento se cortó antes de terminar porque la proyección del tamaño final
+    ya superaba el límite (ver run_ffmpeg(max_bytes=...)).
+    """
+    def __init__(self, projected_bytes, max_bytes):
+        super().__init__(f"Projected size {projected_bytes} exceeds {max_bytes} bytes")
+        self.projected_bytes = projected_bytes
+        self.max_bytes = max_bytes
+
+
+class EncodeCancelled(RuntimeError):
+    """El encode se canceló desde afuera (cancel_event)."""
+
+
+class EncodeTimeout(RuntimeError):
+    """ffmpeg superó el timeout total o dejó de reportar progreso (stall)."""
+
+
+class ChunkJoinError(RuntimeError):
+    """El encode por chunks quedó con huecos / frames repetidos en alguna unión (ver encode_chunked)."""
+    def __init__(self, problems):
+        super().__init__("Discontinuity at chunk joins: " + "; ".join(problems))
+        self.problems = problems
+
+
+class ChunkBudget:
+    """
+    Presupuesto de bits de video compartido entre los chunks de un encode.
+    Cada chunk pide su bitrate al arrancar (lo que queda / los segundos que quedan)
+    y al terminar devuelve lo que no gastó (o descuenta lo que se pasó), así los
+    chunks que arrancan después compensan a los anteriores. Thread-safe.
+    threads: cores del encode entero (el presupuesto del job en el scheduler);
+    thread_share() los reparte entre los procesos que corren a la vez.
+    """
+
+    # cuánto se puede apartar un chunk del bitrate promedio
+    MIN_FACTOR = 0.5
+    MAX_FACTOR = 1.5
+
+    def __init__(self, v_bps, duration, threads=None):
+        self.v_bps = v_bps
+        self.bits_left = float(v_bps) * duration
+        self.seconds_left = float(duration)
+        self.threads = max(1, int(threads or os.cpu_count() or 2))
+        self._lock = threading.Lock()
+
+    def thread_share(self, workers):
+        """Threads de cada proceso si corren `workers` a la vez (mínimo 1)."""
+        return max(1, self.threads // max(1, workers))
+
+    def take(self, duration):
+        """Bitrate (bps) para un chunk de esa duración; reserva sus bits."""
+        with self._lock:
+            bps = self.bits_left / self.seconds_left if self.seconds_left > 0 else self.v_bps
+            bps = min(self.v_bps * self.MAX_FACTOR, max(self.v_bps * self.MIN_FACTOR, bps))
+            self.bits_left -= bps * duration
+            self.seconds_left -= duration
+            return int(bps)
+
+    def settle(self, reserved_bits, used_bits):
+        with self._lock:
+            self.bits_left += reserved_bits - used_bits
+
 
 class FFmpegService:
-    def __init__(self, get_path_fn):
+    def __init__(self, get_path_fn, probe_cache_path=None, size_history_path=None):
         self.get_path = get_path_fn
+        self.last_stats = {}
+
+        # historial de intentos del ladder (aprende el escalón inicial y la corrección de bitrate)
+        self.size_history = SizeHistoryStore(size_history_path) if size_history_path else None
+        self.size_predictor = SizePredictor(self.size_history) if self.size_history else None
+
+        # análisis de movimiento/detalle para elegir resolución y fps de entrada
+        self.complexity = ComplexityService(self)
+
+        # LRU de probe() (+ persistencia opcional en disco)
+        self.probe_cache_path = probe_cache_path
+        self._probe_cache = OrderedDict()
+        self._probe_cache_loaded = False
+        self._probe_lock = threading.Lock()
 
     def _get_ffmpeg_path(self):
         local = self.get_path("ffmpeg\\bin\\ffmpeg.exe")
@@ -31,43 +118,289 @@ class FFmpegService:
             "startupinfo": startupinfo,
         }
 
-    def probe_duration_seconds(self, input_path):
+    # -------------------- probe unificado (memoizado) --------------------
+
+    PROBE_CACHE_SIZE = 64
+
+    def probe(self, input_path):
+        """
+        Todos los datos de formato/streams de un archivo con UN solo ffprobe (JSON).
+        Memoizado en un LRU por (path, size, mtime); si se configuró probe_cache_path,
+        también persiste en disco entre ejecuciones.
+
+        Devuelve un dict:
+          path, size, duration, bit_rate, format_name,
+          video: {codec, profile, level, pix_fmt, width, height, fps, r_fps, rotation, bit_rate} | None,
+          audio: {codec, channels, sample_rate, bit_rate} | None
+        """
+        try:
+            key = cache_key(input_path)
+        except OSError as e:
+            raise RuntimeError(f"ffprobe failed: {e}")
+
+        with self._probe_lock:
+            self._load_probe_cache()
+            info = self._probe_cache.get(key)
+            if info is not None:
+                self._probe_cache.move_to_end(key)
+                return info
+
+        info = self._run_probe(input_path)
+
+        with self._probe_lock:
+            self._probe_cache[key] = info
+            self._probe_cache.move_to_end(key)
+            while len(self._probe_cache) > self.PROBE_CACHE_SIZE:
+                self._probe_cache.popitem(last=False)
+            self._save_probe_cache()
+
+        return info
+
+    def _load_probe_cache(self):
+        if self._probe_cache_loaded:
+            return
+        self._probe_cache_loaded = True
+
+        if not self.probe_cache_path or not os.path.exists(self.probe_cache_path):
+            return
+        try:
+            with open(self.probe_cache_path, "r", encoding="utf-8") as f:
+                for key, info in json.load(f).items():
+                    self._probe_cache[key] = info
+        except:
+            pass
+
+    def _save_probe_cache(self):
+        if not self.probe_cache_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.probe_cache_path) or ".", exist_ok=True)
+            tmp = self.probe_cache_path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._probe_cache, f)
+            os.replace(tmp, self.probe_cache_path)
+        except:
+            pass
+
+    def _run_probe(self, input_path):
         ffprobe = self._get_ffprobe_path()
 
         # cwd estable (si ffprobe es local, usamos su carpeta)
         cwd = os.path.dirname(ffprobe) if os.path.isabs(ffprobe) else None
 
+        cmd = [
+            ffprobe, "-v", "error",
+            "-show_format", "-show_streams",
+            "-of", "json",
+            input_path
+        ]
+        p = subprocess.run(cmd, capture_output=True, text=True, cwd=cwd, **self._no_window_kwargs())
+        if p.returncode != 0:
+            raise RuntimeError(f"ffprobe failed: {p.stderr.strip()[-500:]}")
+
         try:
-            out = subprocess.check_output(
-                [
-                    ffprobe, "-v", "error",
-                    "-show_entries", "format=duration",
-                    "-of", "default=noprint_wrappers=1:nokey=1",
-                    input_path
-                ],
-                stderr=subprocess.STDOUT,
-                text=True,
-                cwd=cwd,
-                **self._no_window_kwargs()
-            ).strip()
-            return float(out)
+            data = json.loads(p.stdout or "{}")
         except Exception as e:
             raise RuntimeError(f"ffprobe failed: {e}")
 
-    def _run_ffmpeg_with_progress(self, cmd, duration_sec, on_progress=None):
+        fmt = data.get("format") or {}
+        streams = data.get("streams") or []
+        v = next((st for st in streams if st.get("codec_type") == "video"), None)
+        a = next((st for st in streams if st.get("codec_type") == "audio"), None)
+
+        def to_float(x):
+            try:
+                return float(x)
+            except:
+                return None
+
+        def to_int(x):
+            try:
+                return int(x)
+            except:
+                return None
+
+        video = None
+        if v is not None:
+            rotation = 0
+            try:
+                for side in v.get("side_data_list") or []:
+                    if "rotation" in side:
+                        rotation = int(float(side["rotation"]))
+                if not rotation:
+                    rotation = int((v.get("tags") or {}).get("rotate") or 0)
+            except:
+                rotation = 0
+
+            video = {
+                "codec": v.get("codec_name"),
+                "profile": v.get("profile"),
+                "level": v.get("level"),
+                "pix_fmt": v.get("pix_fmt"),
+                "width": int(v.get("width") or 0),
+                "height": int(v.get("height") or 0),
+                "fps": self._parse_rate(v.get("avg_frame_rate")) or self._parse_rate(v.get("r_frame_rate")),
+                "r_fps": self._parse_rate(v.get("r_frame_rate")),
+                "rotation": rotation % 360,
+                "bit_rate": to_int(v.get("bit_rate")),
+            }
+
+        audio = None
+        if a is not None:
+            audio = {
+                "codec": a.get("codec_name"),
+                "channels": to_int(a.get("channels")),
+                "sample_rate": to_int(a.get("sample_rate")),
+                "bit_rate": to_int(a.get("bit_rate")),
+            }
+
+        return {
+            "path": os.path.abspath(input_path),
+            "size": to_int(fmt.get("size")) or os.path.getsize(input_path),
+            "duration": to_float(fmt.get("duration")),
+            "bit_rate": to_int(fmt.get("bit_rate")),
+            "format_name": fmt.get("format_name"),
+            "video": video,
+            "audio": audio,
+        }
+
+    def probe_duration_seconds(self, input_path):
+        duration = self.probe(input_path)["duration"]
+        if duration is None:
+            raise RuntimeError("ffprobe failed: unknown duration")
+        return duration
+
+    @staticmethod
+    def _projection_exceeds(total_size, out_time, duration_sec, max_bytes):
         """
-        Usa -progress pipe:1 (stdout) y drena stderr en paralelo para evitar deadlocks.
-        Corta al ver progress=end.
+        Decide si un encode en curso ya no va a entrar en max_bytes.
+        Devuelve (exceeds, projected_bytes).
+
+        - Si lo escrito ya pasó el límite, es seguro.
+        - Si no, proyecta bytes/out_time * duración, pero sólo con suficiente
+          muestra (>=5s y >=15% del total) y con un margen que se achica a medida
+          que avanza el encode (el rate control al principio es ruidoso).
+        """
+        if total_size is None or total_size <= 0:
+            return False, None
+
+        if total_size > max_bytes:
+            return True, total_size
+
+        if out_time is None or out_time <= 0 or duration_sec <= 0:
+            return False, None
+
+        frac = min(1.0, out_time / duration_sec)
+        if out_time < 5.0 or frac < 0.15:
+            return False, None
+
+        projected = int(total_size / out_time * duration_sec)
+        margin = 1.05 + 0.25 * (1.0 - frac)
+
+        return projected > max_bytes * margin, projected
+
+    # -------------------- runner único de ffmpeg --------------------
+
+    STDERR_TAIL_LINES = 80
+    STDERR_LINE_MAX = 500
+
+    @staticmethod
+    def _parse_out_time(block):
+        """out_time en segundos desde un bloque de -progress (us / ms / hh:mm:ss)."""
+        for key in ("out_time_us", "out_time_ms"):
+            value = block.get(key)
+            if value and value != "N/A":
+                try:
+                    # out_time_ms también viene en microsegundos (bug histórico de ffmpeg)
+                    return int(value) / 1_000_000
+                except:
+                    pass
+        value = block.get("out_time")
+        if value and value != "N/A":
+            try:
+                hh, mm, ss = value.split(":")
+                return (int(hh) * 3600) + (int(mm) * 60) + float(ss)
+            except:
+                pass
+        return None
+
+    @classmethod
+    def _progress_event(cls, block, duration_sec, elapsed):
+        """
+        Arma el evento estructurado de un bloque de -progress:
+        out_time, percent, frame, fps, speed, bitrate_kbps, total_size, eta, elapsed, done.
+        """
+        def num(key, strip=""):
+            value = block.get(key)
+            if not value or value == "N/A":
+                return None
+            try:
+                return float(value.strip().rstrip(strip))
+            except:
+                return None
+
+        out_time = cls._parse_out_time(block)
+        total_size = num("total_size")
+        done = block.get("progress") == "end"
+
+        percent = 0.0
+        if out_time is not None and duration_sec and duration_sec > 0:
+            percent = min(100.0, max(0.0, out_time / duration_sec * 100))
+        if done:
+            percent = 100.0
+
+        # speed: el de ffmpeg si lo da; si no, media desde el arranque
+        speed = num("speed", "x")
+        if not speed and out_time and elapsed > 0:
+            speed = out_time / elapsed
+
+        eta = None
+        if speed and out_time is not None and duration_sec:
+            eta = max(0.0, (duration_sec - out_time) / speed)
+
+        return {
+            "out_time": out_time,
+            "percent": percent,
+            "frame": int(num("frame") or 0),
+            "fps": num("fps"),
+            "speed": speed,
+            "bitrate_kbps": num("bitrate", "kbits/s"),
+            "total_size": int(total_size) if total_size is not None else None,
+            "eta": 0.0 if done else eta,
+            "elapsed": elapsed,
+            "done": done,
+        }
+
+    def run_ffmpeg(self, cmd, duration_sec, on_progress=None, on_event=None, max_bytes=None,
+                   cancel_event=None, timeout=None, stall_timeout=120.0):
+        """
+        Runner único para todos los encodes (slicer, smart-cut, Discord, muestras).
+
+        - Lee -progress pipe:1 (stdout) y drena stderr en paralelo (tail acotado en
+          líneas y largo) para evitar deadlocks.
+        - on_progress(pct int) y/o on_event(evento) con cada bloque de progreso
+          (ver _progress_event).
+        - max_bytes: proyecta el tamaño final con total_size/out_time y frena el
+          proceso apenas supera el límite (lanza SizeLimitExceeded).
+        - cancel_event: frena ffmpeg ('q' -> terminate -> kill) y lanza EncodeCancelled.
+        - timeout (total) / stall_timeout (sin salida de progreso): lanza EncodeTimeout.
+          Los comandos sin -progress sólo usan timeout.
+
+        Devuelve las stats del encode: elapsed, out_time, frames, encode_fps,
+        realtime (seg de media por seg de reloj) y total_size.
         """
         import threading, collections, time
 
         # cwd estable: si cmd[0] es ruta absoluta a ffmpeg.exe, usamos su carpeta
         ffmpeg_exe = cmd[0]
         cwd = os.path.dirname(ffmpeg_exe) if os.path.isabs(ffmpeg_exe) else None
+        has_progress = "-progress" in cmd
 
+        t0 = time.monotonic()
         p = subprocess.Popen(
             cmd,
             cwd=cwd,
+            stdin=subprocess.PIPE,    # para mandarle 'q' al cancelar
             stdout=subprocess.PIPE,   # progress
             stderr=subprocess.PIPE,   # logs
             text=True,
@@ -83,66 +416,107 @@ class FFmpegService:
                 except:
                     pass
 
+        def emit(event):
+            if on_event:
+                try:
+                    on_event(event)
+                except:
+                    pass
+
         report(0)
 
-        err_tail = collections.deque(maxlen=80)
+        err_tail = collections.deque(maxlen=self.STDERR_TAIL_LINES)
 
         def drain_stderr():
             try:
                 for line in p.stderr:
                     if not line:
                         break
-                    err_tail.append(line.rstrip("\n"))
+                    err_tail.append(line.rstrip("\n")[:self.STDERR_LINE_MAX])
             except:
                 pass
 
-        t = threading.Thread(target=drain_stderr, daemon=True)
-        t.start()
+        threading.Thread(target=drain_stderr, daemon=True).start()
+
+        # watchdog: cancelación, timeout total y progreso trabado
+        stop_reason = []
+        last_output = [time.monotonic()]
+
+        def watchdog():
+            while p.poll() is None:
+                now = time.monotonic()
+                reason = None
+                if cancel_event is not None and cancel_event.is_set():
+                    reason = "cancelled"
+                elif timeout and now - t0 > timeout:
+                    reason = "timeout"
+                elif has_progress and stall_timeout and now - last_output[0] > stall_timeout:
+                    reason = "stalled"
+                if reason:
+                    stop_reason.append(reason)
+                    stop_process(p)
+                    return
+                try:
+                    p.wait(timeout=0.1)
+                except subprocess.TimeoutExpired:
+                    pass
+
+        threading.Thread(target=watchdog, daemon=True).start()
 
-        ended = False
+        block = {}
+        last = None
         last_emit = -1
         last_time = 0.0
+        aborted_projection = None
 
         try:
             for line in p.stdout:
                 if not line:
                     break
-                line = line.strip()
-
-                if line.startswith("out_time_ms="):
-                    try:
-                        out_time = int(line.split("=", 1)[1]) / 1_000_000
-                    except:
-                        continue
-                elif line.startswith("out_time_us="):
-                    try:
-                        out_time = int(line.split("=", 1)[1]) / 1_000_000
-                    except:
-                        continue
-                elif line.startswith("out_time="):
-                    try:
-                        hh, mm, ss = line.split("=", 1)[1].split(":")
-                        out_time = (int(hh) * 3600) + (int(mm) * 60) + float(ss)
-                    except:
-                        continue
-                elif line == "progress=end":
-                    report(100)
-                    ended = True
+                if stop_reason:
                     break
-                else:
+
+                last_output[0] = time.monotonic()
+                key, sep, value = line.strip().partition("=")
+                if not sep:
                     continue
+                block[key] = value
+                if key != "progress":
+                    continue
+
+                # fin de un bloque: out_time + total_size coherentes
+                last = self._progress_event(block, duration_sec, time.monotonic() - t0)
+                block = {}
 
-                pct = int(min(100, max(0, (out_time / max(duration_sec, 0.001)) * 100)))
+                if max_bytes and not last["done"]:
+                    exceeds, projected = self._projection_exceeds(
+                        last["total_size"], last["out_time"], duration_sec, max_bytes
+                    )
+                    if exceeds:
+                        aborted_projection = projected
+                        try:
+                            p.kill()
+                        except:
+                            pass
+                        break
+
+                emit(last)
 
+                if last["done"]:
+                    report(100)
+                    break
+
+                pct = int(last["percent"])
                 now = time.time()
                 if pct != last_emit and (now - last_time) > 0.05:
                     report(pct)
                     last_emit = pct
                     last_time = now
 
-            # Esperar fin (si se cuelga, kill)
+            # Esperar fin; si no hay watchdog activo que lo frene, kill
             try:
-                p.wait(timeout=10 if ended else 600)
+                p.wait(timeout=10 if (last and last["done"]) or stop_reason or aborted_projection is not None
+                       else (timeout or 600))
             except subprocess.TimeoutExpired:
                 try:
                     p.kill()
@@ -151,52 +525,983 @@ class FFmpegService:
                 p.wait(timeout=5)
 
         finally:
-            try:
-                if p.stdout:
-                    p.stdout.close()
-            except:
-                pass
-            try:
-                if p.stderr:
-                    p.stderr.close()
-            except:
-                pass
+            for stream in (p.stdin, p.stdout, p.stderr):
+                try:
+                    if stream:
+                        stream.close()
+                except:
+                    pass
+
+        if "cancelled" in stop_reason:
+            raise EncodeCancelled("Encode cancelled")
+
+        if stop_reason:
+            tail = "\n".join(err_tail)[-2000:]
+            raise EncodeTimeout(f"FFmpeg {stop_reason[0]} (timeout).\n\nFFmpeg stderr (tail):\n{tail}")
+
+        if aborted_projection is not None:
+            raise SizeLimitExceeded(aborted_projection, max_bytes)
 
         rc = p.returncode
         if rc != 0:
             tail = "\n".join(err_tail)[-2000:]
             raise RuntimeError(f"FFmpeg failed (code {rc}).\n\nFFmpeg stderr (tail):\n{tail}")
 
+        elapsed = max(time.monotonic() - t0, 1e-6)
+        out_time = (last or {}).get("out_time") or 0.0
+        frames = (last or {}).get("frame") or 0
+        return {
+            "elapsed": elapsed,
+            "out_time": out_time,
+            "frames": frames,
+            "encode_fps": frames / elapsed,
+            "realtime": out_time / elapsed,
+            "total_size": (last or {}).get("total_size"),
+        }
+
     def probe_resolution(self, input_path):
-        ffprobe = self._get_ffprobe_path()
+        try:
+            video = self.probe(input_path)["video"]
+        except RuntimeError:
+            return None, None
+        if not video:
+            return None, None
+        return video["width"], video["height"]
 
+    @staticmethod
+    def _parse_rate(rate):
+        """'30000/1001' -> 29.97 (0.0 si no se puede)."""
+        try:
+            num, den = (rate or "0/1").split("/")
+            return float(num) / float(den) if float(den) else 0.0
+        except:
+            return 0.0
+
+    def probe_media_info(self, input_path):
+        """
+        Metadata para abrir un archivo en el slicer:
+        duración, fps, resolución, codecs y rotación.
+        """
+        info = self.probe(input_path)
+        video = info["video"]
+        if video is None:
+            raise RuntimeError("No video stream found")
+
+        return {
+            "path": input_path,
+            "duration": info["duration"] or 0.0,
+            "fps": video["fps"] or 30.0,
+            "width": video["width"],
+            "height": video["height"],
+            "vcodec": video["codec"],
+            "acodec": info["audio"]["codec"] if info["audio"] else None,
+            "rotation": video["rotation"],
+        }
+
+    def probe_keyframes(self, input_path, intervals=None):
+        """
+        Lista ordenada de timestamps (seg) de keyframes del primer stream de video.
+        intervals: lista opcional de (desde, hasta) para escanear sólo alrededor de
+        esos puntos (-read_intervals) en vez de todo el archivo.
+        """
+        ffprobe = self._get_ffprobe_path()
         cwd = os.path.dirname(ffprobe) if os.path.isabs(ffprobe) else None
 
         cmd = [
             ffprobe, "-v", "error",
             "-select_streams", "v:0",
-            "-show_entries", "stream=width,height",
-            "-of", "json",
-            input_path
+            "-show_entries", "packet=pts_time,flags",
+            "-of", "csv=p=0",
         ]
+        if intervals:
+            cmd += ["-read_intervals", ",".join(f"{max(0.0, a):.3f}%{b:.3f}" for a, b in intervals)]
+        cmd.append(input_path)
+
         p = subprocess.run(cmd, capture_output=True, text=True, cwd=cwd, **self._no_window_kwargs())
         if p.returncode != 0:
-            return None, None
+            raise RuntimeError(f"ffprobe failed: {p.stderr.strip()[-500:]}")
+
+        keyframes = set()
+        for line in p.stdout.splitlines():
+            parts = line.strip().split(",")
+            if len(parts) < 2 or "K" not in parts[1]:
+                continue
+            try:
+                keyframes.add(round(float(parts[0]), 6))
+            except:
+                continue
+
+        return sorted(keyframes)
+
+    @staticmethod
+    def snap_to_keyframes(keyframes, start, end, duration=None):
+        """
+        Ajusta (start, end) a los keyframes más cercanos para cortar con stream copy.
+        El final del archivo cuenta como punto válido para end.
+        """
+        if not keyframes:
+            return start, end
+
+        snapped_start = min(keyframes, key=lambda k: abs(k - start))
+
+        end_points = [k for k in keyframes if k > snapped_start]
+        if duration:
+            end_points.append(float(duration))
+        if not end_points:
+            return snapped_start, end
+
+        snapped_end = min(end_points, key=lambda k: abs(k - end))
+        return snapped_start, snapped_end
+
+    def probe_keyframes_near(self, input_path, points, window=20.0):
+        """
+        Keyframes alrededor de unos puntos (ventana de ±window seg).
+        Si en la ventana no aparece ninguno (GOPs muy largos), escanea todo.
+        """
+        keyframes = self.probe_keyframes(
+            input_path, intervals=[(t - window, t + window) for t in points]
+        )
+        if not keyframes:
+            keyframes = self.probe_keyframes(input_path)
+        return keyframes
+
+    def probe_stream_params(self, input_path):
+        """
+        Parámetros del primer stream de video (codec/profile/pix_fmt/tamaño/fps)
+        y si hay audio. Lo usa el smart-cut para re-encodear con los mismos parámetros.
+        """
         try:
-            data = json.loads(p.stdout)
-            s = (data.get("streams") or [{}])[0]
-            return int(s.get("width") or 0), int(s.get("height") or 0)
-        except:
-            return None, None
+            info = self.probe(input_path)
+        except RuntimeError:
+            return None
+
+        video = info["video"]
+        if not video:
+            return None
+
+        return {
+            "codec": video["codec"],
+            "profile": video["profile"],
+            "level": video["level"],
+            "pix_fmt": video["pix_fmt"],
+            "width": video["width"],
+            "height": video["height"],
+            "fps": video["r_fps"],
+            "has_audio": info["audio"] is not None,
+        }
+
+    @staticmethod
+    def _x264_profile(profile):
+        """Mapea el profile que reporta ffprobe al nombre que acepta libx264."""
+        p = (profile or "").lower()
+        if "high 4:4:4" in p:
+            return "high444"
+        if "high 4:2:2" in p:
+            return "high422"
+        if "high 10" in p:
+            return "high10"
+        if "high" in p:
+            return "high"
+        if "main" in p:
+            return "main"
+        if "baseline" in p:
+            return "baseline"
+        return None
+
+    def smart_cut(self, input_path, start, end, output_path, on_progress=None, keyframes=None,
+                  cancel_event=None, on_event=None):
+        """
+        Corte frame-exacto re-encodeando sólo los bordes:
+        - [start, primer keyframe)  -> libx264 con los parámetros del source
+        - [primer kf, último kf)    -> stream copy
+        - [último kf, end)          -> libx264
+        Los tramos de video se concatenan (mpegts, SPS/PPS in-band) y el audio se
+        encodea una sola vez para todo el rango, así no hay cortes en las uniones.
+
+        keyframes: lista ya conocida (p.ej. del índice persistente); si no, se probea.
+        cancel_event: corta el tramo en curso (EncodeCancelled); los temporales se borran igual.
+        on_event: eventos de progreso del tramo en curso (ver run_ffmpeg).
+
+        Devuelve False si no aplica (source no H.264 o el rango no contiene un GOP
+        completo); en ese caso conviene el re-encode completo.
+        """
+        import tempfile, shutil
+
+        params = self.probe_stream_params(input_path)
+        if not params or params["codec"] != "h264":
+            return False
+
+        if not keyframes:
+            keyframes = self.probe_keyframes_near(input_path, [start, end])
+        eps = 0.001
+        k1 = next((k for k in keyframes if k >= start - eps), None)
+        k2 = next((k for k in reversed(keyframes) if k <= end + eps), None)
+        if k1 is None or k2 is None or k2 - k1 <= eps:
+            return False
+
+        ffmpeg = self._get_ffmpeg_path()
+        half_frame = 0.5 / params["fps"] if params["fps"] > 0 else 0.0
+
+        encode_args = ["-c:v", "libx264", "-preset", "veryfast", "-crf", "18"]
+        profile = self._x264_profile(params["profile"])
+        if profile:
+            encode_args += ["-profile:v", profile]
+        if params["level"] and int(params["level"]) > 0:
+            encode_args += ["-level:v", f"{int(params['level']) / 10:.1f}"]
+        if params["pix_fmt"]:
+            encode_args += ["-pix_fmt", params["pix_fmt"]]
+
+        tmp_dir = tempfile.mkdtemp(prefix="halfslice_smartcut_")
+
+        # (nombre, seek, duración, re-encode?)
+        segments = []
+        if k1 - start > half_frame:
+            # cortamos medio frame antes del keyframe para no duplicarlo
+            segments.append(("head.ts", start, k1 - start - half_frame, True))
+        segments.append(("middle.ts", k1, k2 - k1, False))
+        if end - k2 > half_frame:
+            segments.append(("tail.ts", k2, end - k2, True))
+
+        # peso de progreso: el copy es casi gratis comparado con el encode
+        weights = [dur * (1.0 if enc else 0.05) for _, _, dur, enc in segments]
+        weights.append((end - start) * 0.1)  # mux + audio
+        total_weight = max(sum(weights), 0.001)
+
+        def scaled(offset, weight):
+            def cb(pct):
+                if on_progress:
+                    on_progress(int(((offset + weight * pct / 100.0) / total_weight) * 100))
+            return cb
+
+        try:
+            done = 0.0
+            for (name, seek, dur, reencode), weight in zip(segments, weights):
+                cmd = [
+                    ffmpeg, "-y", "-loglevel", "error",
+                    "-ss", f"{seek:.6f}",
+                    "-i", input_path,
+                    "-t", f"{dur:.6f}",
+                    "-map", "0:v:0",
+                    "-an", "-sn",
+                ]
+                cmd += encode_args if reencode else ["-c:v", "copy"]
+                cmd += [
+                    "-bsf:v", "h264_mp4toannexb",
+                    "-f", "mpegts",
+                    "-progress", "pipe:1", "-nostats",
+                    os.path.join(tmp_dir, name),
+                ]
+                self.run_ffmpeg(cmd, dur, on_progress=scaled(done, weight),
+                                on_event=on_event, cancel_event=cancel_event)
+                done += weight
+
+            list_path = os.path.join(tmp_dir, "list.txt")
+            with open(list_path, "w", encoding="utf-8") as f:
+                for name, _, _, _ in segments:
+                    f.write(f"file '{name}'\n")
+
+            cmd = [
+                ffmpeg, "-y", "-loglevel", "error",
+                "-f", "concat", "-safe", "0",
+                "-i", list_path,
+                "-ss", f"{start:.6f}",
+                "-i", input_path,
+                "-t", f"{end - start:.6f}",
+                "-map", "0:v:0",
+            ]
+            if params["has_audio"]:
+                cmd += ["-map", "1:a:0?", "-c:a", "aac", "-b:a", "192k"]
+            cmd += [
+                "-c:v", "copy",
+                "-movflags", "+faststart",
+                "-progress", "pipe:1", "-nostats",
+                output_path,
+            ]
+            self.run_ffmpeg(cmd, end - start, on_progress=scaled(done, weights[-1]),
+                            on_event=on_event, cancel_event=cancel_event)
+
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        return True
+
+    # -------------------- encode por chunks --------------------
+
+    # desde esta duración conviene partir (con menos, el costo fijo de cada proceso no compensa)
+    CHUNKED_MIN_DURATION = 90.0
+    CHUNK_MIN_SEC = 20.0
+    MAX_CHUNKS = 8
+
+    def should_chunk(self, duration, threads=None):
+        """Si un encode de esa duración se beneficia de partirse en chunks paralelos."""
+        cores = threads or os.cpu_count() or 1
+        return cores >= 4 and duration >= self.CHUNKED_MIN_DURATION
+
+    def chunk_bounds(self, input_path, start, end, chunks):
+        """
+        Bordes de los chunks: keyframes del source cerca de los puntos ideales
+        (así cada chunk arranca sin decodificar GOP de más). Devuelve [start, ..., end].
+        """
+        duration = end - start
+        chunks = max(1, min(chunks, int(duration // self.CHUNK_MIN_SEC)))
+        ideal = [start + duration * i / chunks for i in range(1, chunks)]
+        if not ideal:
+            return [start, end]
+
+        try:
+            keyframes = self.probe_keyframes_near(input_path, ideal, window=self.CHUNK_MIN_SEC / 2)
+        except RuntimeError:
+            keyframes = []
+
+        bounds = [start]
+        for t in ideal:
+            near = [k for k in keyframes if abs(k - t) <= self.CHUNK_MIN_SEC / 2]
+            cut = min(near, key=lambda k: abs(k - t)) if near else t
+            # chunks demasiado cortos no aportan: se unen al anterior
+            if cut - bounds[-1] >= self.CHUNK_MIN_SEC / 2 and end - cut >= self.CHUNK_MIN_SEC / 2:
+                bounds.append(cut)
+        bounds.append(end)
+        return bounds
+
+    def encode_chunked(self, input_path, output_path, start, end, vf, v_bps, audio_args=None,
+                       preset="veryfast", constrained=True, chunks=None, threads=None,
+                       on_progress=None, on_event=None, cancel_event=None, max_bytes=None):
+        """
+        Encode libx264 del rango [start, end] partido en chunks que corren en paralelo
+        (un ffmpeg por chunk) para aprovechar todos los cores en presets rápidos / baja
+        resolución, donde un solo libx264 no escala.
+
+        - Cortes en keyframes (chunk_bounds); cada chunk va a un .ts (video solo).
+        - v_bps es el promedio: los chunks comparten el presupuesto (ChunkBudget).
+          constrained=True agrega maxrate/bufsize por chunk (como el ladder de Discord).
+        - El audio se encodea UNA vez para todo el rango (en paralelo con los chunks),
+          así no hay priming de AAC ni huecos en las uniones; después se concatena el
+          video sin re-encodear y se muxea con el audio.
+        - Al final se verifica que audio y video sigan continuos en cada unión
+          (check_join_continuity); si no, borra la salida y lanza ChunkJoinError
+          (el caller puede volver al encode de un solo proceso).
+        - max_bytes: proyecta con lo que llevan todos los chunks y lanza SizeLimitExceeded.
+        - cancel_event: frena todos los chunks y lanza EncodeCancelled.
+
+        Devuelve las mismas stats que run_ffmpeg, más "chunks".
+        """
+        import tempfile, shutil, time
+        from concurrent.futures import ThreadPoolExecutor
+
+        t0 = time.monotonic()
+        duration = end - start
+        budget = ChunkBudget(v_bps, duration, threads)
+        cores = budget.threads
+        bounds = self.chunk_bounds(input_path, start, end, chunks or min(self.MAX_CHUNKS, max(2, cores // 2)))
+        segments = list(zip(bounds[:-1], bounds[1:]))
+
+        try:
+            info = self.probe(input_path)
+        except RuntimeError:
+            info = {"video": None, "audio": None}
+        src_fps = (info.get("video") or {}).get("fps") or 30.0
+        half_frame = 0.5 / src_fps
+        has_audio = bool(audio_args) and info.get("audio") is not None
+
+        # procesos a la vez (el audio es uno más, liviano) y threads de cada uno
+        workers = min(len(segments), max(1, cores // 2)) + (1 if has_audio else 0)
+        chunk_threads = budget.thread_share(workers)
+
+        ffmpeg = self._get_ffmpeg_path()
+        abort = threading.Event()
+        run_cancel = AnyEvent(cancel_event, abort)
+        projection = []
+
+        events = {}
+        events_lock = threading.Lock()
+        last_pct = [-1]
+
+        def chunk_event(i):
+            def cb(event):
+                with events_lock:
+                    events[i] = event
+                    snapshot = list(events.values())
+
+                out_time = sum(e["out_time"] or 0.0 for e in snapshot)
+                size = sum(e["total_size"] or 0 for e in snapshot)
+                frames = sum(e["frame"] or 0 for e in snapshot)
+                elapsed = time.monotonic() - t0
+
+                if max_bytes and not abort.is_set():
+                    exceeds, projected = self._projection_exceeds(size, out_time, duration, max_bytes)
+                    if exceeds:
+                        projection.append(projected)
+                        abort.set()
+                        return
+
+                speed = out_time / elapsed if elapsed > 0 else None
+                # 95%: queda el mux final
+                percent = min(95.0, out_time / duration * 95.0) if duration > 0 else 0.0
+                if on_event:
+                    try:
+                        on_event({
+                            "out_time": out_time,
+                            "percent": percent,
+                            "frame": frames,
+                            "fps": frames / elapsed if elapsed > 0 else None,
+                            "speed": speed,
+                            "bitrate_kbps": size * 8 / out_time / 1000 if out_time > 0 else None,
+                            "total_size": size,
+                            "eta": (duration - out_time) / speed if speed else None,
+                            "elapsed": elapsed,
+                            "done": False,
+                        })
+                    except:
+                        pass
+                if on_progress and int(percent) != last_pct[0]:
+                    last_pct[0] = int(percent)
+                    try:
+                        on_progress(int(percent))
+                    except:
+                        pass
+            return cb
+
+        tmp_dir = tempfile.mkdtemp(prefix="halfslice_chunks_")
+
+        def encode_chunk(i, seek, stop):
+            last = i == len(segments) - 1
+            # medio frame antes del borde para no repetir el primer frame del chunk siguiente
+            length = (stop - seek) if last else (stop - seek - half_frame)
+            bps = budget.take(stop - seek)
+            reserved = bps * (stop - seek)
+
+            cmd = [
+                ffmpeg, "-y", "-loglevel", "error",
+                "-ss", f"{seek:.6f}",
+                "-i", input_path,
+                "-t", f"{length:.6f}",
+                "-map", "0:v:0",
+                "-an", "-sn",
+            ]
+            if vf:
+                cmd += ["-vf", vf]
+            cmd += [
+                "-c:v", "libx264",
+                "-preset", preset,
+                "-pix_fmt", "yuv420p",
+                "-b:v", str(bps),
+            ]
+            if constrained:
+                cmd += ["-maxrate", str(bps), "-bufsize", str(bps * 2)]
+            cmd += [
+                "-threads", str(chunk_threads),
+                "-f", "mpegts",
+                "-progress", "pipe:1", "-nostats",
+                os.path.join(tmp_dir, f"chunk{i:03d}.ts"),
+            ]
+            try:
+                stats = self.run_ffmpeg(cmd, length, on_event=chunk_event(i), cancel_event=run_cancel)
+            except Exception:
+                budget.settle(reserved, reserved)
+                abort.set()
+                raise
+            used = os.path.getsize(os.path.join(tmp_dir, f"chunk{i:03d}.ts")) * 8
+            budget.settle(reserved, used)
+            return stats
+
+        def encode_audio():
+            cmd = [
+                ffmpeg, "-y", "-loglevel", "error",
+                "-ss", f"{start:.6f}",
+                "-i", input_path,
+                "-t", f"{duration:.6f}",
+                "-map", "0:a:0",
+                "-vn", "-sn",
+            ] + list(audio_args) + [
+                "-progress", "pipe:1", "-nostats",
+                os.path.join(tmp_dir, "audio.m4a"),
+            ]
+            try:
+                return self.run_ffmpeg(cmd, duration, cancel_event=run_cancel)
+            except Exception:
+                abort.set()
+                raise
+
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as ex:
+                audio_future = ex.submit(encode_audio) if has_audio else None
+                futures = [ex.submit(encode_chunk, i, a, b) for i, (a, b) in enumerate(segments)]
+
+                results, errors = [], []
+                for fut in futures + ([audio_future] if audio_future else []):
+                    try:
+                        results.append(fut.result())
+                    except Exception as e:
+                        errors.append(e)
+
+            if cancel_event is not None and cancel_event.is_set():
+                raise EncodeCancelled("Encode cancelled")
+            if projection:
+                raise SizeLimitExceeded(projection[0], max_bytes)
+            if errors:
+                # el primero que no sea la cancelación interna (abort) es la causa
+                raise next((e for e in errors if not isinstance(e, EncodeCancelled)), errors[0])
+
+            list_path = os.path.join(tmp_dir, "list.txt")
+            with open(list_path, "w", encoding="utf-8") as f:
+                for i in range(len(segments)):
+                    f.write(f"file 'chunk{i:03d}.ts'\n")
+
+            cmd = [
+                ffmpeg, "-y", "-loglevel", "error",
+                "-f", "concat", "-safe", "0",
+                "-i", list_path,
+            ]
+            if has_audio:
+                cmd += ["-i", os.path.join(tmp_dir, "audio.m4a"), "-map", "0:v:0", "-map", "1:a:0"]
+            else:
+                cmd += ["-map", "0:v:0"]
+            cmd += [
+                "-c", "copy",
+                "-movflags", "+faststart",
+                "-progress", "pipe:1", "-nostats",
+                output_path,
+            ]
+            self.run_ffmpeg(cmd, duration, cancel_event=cancel_event)
+
+            problems = self.check_join_continuity(output_path, [b - start for b in bounds[1:-1]],
+                                                  has_audio=has_audio)
+            if problems:
+                remove_quiet(output_path)
+                raise ChunkJoinError(problems)
 
-    def compress_to_discord_10mb(self, input_path, out_dir=None, max_bytes=10 * 1024 * 1024, on_progress=None, on_status=None):
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        if on_progress:
+            try:
+                on_progress(100)
+            except:
+                pass
+
+        elapsed = max(time.monotonic() - t0, 1e-6)
+        frames = sum(r["frames"] or 0 for r in results[:len(segments)])
+        return {
+            "elapsed": elapsed,
+            "out_time": duration,
+            "frames": frames,
+            "encode_fps": frames / elapsed,
+            "realtime": duration / elapsed,
+            "total_size": os.path.getsize(output_path),
+            "chunks": len(segments),
+        }
+
+    def _probe_packet_times(self, path, stream, intervals):
+        """pts (seg) de los paquetes de un stream dentro de unos intervalos, en orden de lectura."""
+        ffprobe = self._get_ffprobe_path()
+        cwd = os.path.dirname(ffprobe) if os.path.isabs(ffprobe) else None
+        cmd = [
+            ffprobe, "-v", "error",
+            "-select_streams", stream,
+            "-show_entries", "packet=pts_time",
+            "-of", "csv=p=0",
+            "-read_intervals", ",".join(f"{max(0.0, a):.3f}%{b:.3f}" for a, b in intervals),
+            path,
+        ]
+        p = subprocess.run(cmd, capture_output=True, text=True, cwd=cwd, **self._no_window_kwargs())
+        if p.returncode != 0:
+            raise RuntimeError(f"ffprobe failed: {p.stderr.strip()[-500:]}")
+
+        times = []
+        for line in p.stdout.splitlines():
+            try:
+                times.append(float(line.strip().split(",")[0]))
+            except ValueError:
+                continue
+        return times
+
+    def check_join_continuity(self, path, joins, has_audio=True, window=1.0):
         """
-        Compresión rápida y efectiva para Discord (<10MB).
-        - Calcula bitrate por duración.
-        - 1-pass (ultrafast) con fallbacks (res/audio/fps).
-        Devuelve: (ok, output_path, size_mb)
+        Revisa los paquetes de audio y video alrededor de cada unión (±window seg):
+        un salto mayor a 1.6 veces el paso típico es un hueco (frame / audio perdido)
+        y un pts repetido es un frame duplicado. Devuelve la lista de problemas (vacía = OK).
         """
-        import os
+        if not joins:
+            return []
+
+        problems = []
+        streams = [("v:0", "video")] + ([("a:0", "audio")] if has_audio else [])
+        for stream, label in streams:
+            try:
+                times = self._probe_packet_times(path, stream, [(j - window, j + window) for j in joins])
+            except RuntimeError as e:
+                return [f"{label}: {e}"]
+
+            for j in joins:
+                near = sorted(t for t in times if j - window <= t <= j + window)
+                if len(near) < 3:
+                    problems.append(f"{label} missing around {j:.3f}s")
+                    continue
+                if len(set(near)) != len(near):
+                    problems.append(f"{label} duplicated packets around {j:.3f}s")
+                    continue
+                steps = [b - a for a, b in zip(near, near[1:])]
+                typical = sorted(steps)[len(steps) // 2]
+                worst = max(steps)
+                if typical > 0 and worst > typical * 1.6:
+                    problems.append(f"{label} gap of {worst * 1000:.0f}ms around {j:.3f}s")
+
+        return problems
+
+    # -------------------- renditions (un decode, varias salidas) --------------------
+
+    RENDITION_HEIGHTS = {"1080p": 1080, "720p": 720, "480p": 480, "360p": 360, "240p": 240}
+
+    @staticmethod
+    def parse_bitrate(bitrate):
+        """'2500k' / '2.5M' / '2500000' -> bps (None si no se entiende)."""
+        text = str(bitrate or "").strip().lower()
+        factor = 1
+        if text.endswith("k"):
+            factor, text = 1000, text[:-1]
+        elif text.endswith("m"):
+            factor, text = 1_000_000, text[:-1]
+        try:
+            return int(float(text) * factor)
+        except ValueError:
+            return None
+
+    @staticmethod
+    def rendition_output(path, name):
+        """Salida de una rendition: <base>_<name>.mp4 al lado de path (nombre determinístico)."""
+        base, _ = os.path.splitext(path)
+        return f"{base}_{name}.mp4"
+
+    @classmethod
+    def rendition_outputs(cls, path, renditions, reserved=()):
+        """
+        Salidas (rendition_output) de cada rendition para path, en orden.
+        Lanza ValueError si alguna cae en un path de reserved (la salida principal,
+        el input, temporales) o en el de otra rendition: se pisarían sin aviso.
+        """
+        def key(p):
+            return os.path.normcase(os.path.abspath(p))
+
+        taken = {key(p) for p in reserved}
+        outputs = []
+        for r in renditions:
+            output = cls.rendition_output(path, r["name"])
+            if key(output) in taken:
+                raise ValueError(
+                    f"Rendition name {r['name']!r} collides with {os.path.basename(output)}; pick another name"
+                )
+            taken.add(key(output))
+            outputs.append(output)
+        return outputs
+
+    def rendition_target(self, rendition, output_path, duration, preset="veryfast"):
+        """
+        Rendition pedida por el usuario -> target de encode_renditions.
+        rendition: {"name", "resolution" ("720p" o None = la del source; con tope, 720p),
+                    "bitrate" ("2500k" o None), "max_mb" (tope de tamaño o None)}.
+        Con max_mb y sin bitrate, el bitrate sale del tope (mismo margen que el ladder).
+        """
+        max_mb = rendition.get("max_mb")
+        max_bytes = int(max_mb * 1024 * 1024) if max_mb else None
+        a_bps = 128_000
+        v_bps = self.parse_bitrate(rendition.get("bitrate"))
+        if v_bps is None and max_bytes:
+            total_bps = int(max_bytes * 0.94 * 8 / max(duration, 0.25))
+            a_bps = 64_000 if total_bps > 400_000 else 32_000
+            v_bps = max(total_bps - a_bps, 100_000)
+        if v_bps is None:
+            v_bps = 2_500_000
+
+        height = self.RENDITION_HEIGHTS.get(rendition.get("resolution"))
+        if height is None and max_bytes:
+            # con tope y sin resolución: como el primer escalón del ladder
+            height = self.DISCORD_LADDER[0][0]
+        return {
+            "name": rendition.get("name"),
+            "output": output_path,
+            # sin upscaling: min(alto pedido, alto del source)
+            "vf": f"scale=-2:min({height}\\,ih)" if height else None,
+            "v_bps": v_bps,
+            "a_bps": a_bps,
+            "channels": 2,
+            "preset": preset,
+            "constrained": max_bytes is not None,
+            "max_bytes": max_bytes,
+        }
+
+    def _build_renditions_cmd(self, input_path, start, end, targets, threads=None):
+        ffmpeg = self._get_ffmpeg_path()
+        n = len(targets)
+        cmd = [
+            ffmpeg, "-y", "-loglevel", "error",
+            "-ss", f"{start:.6f}", "-to", f"{end:.6f}",
+            "-i", input_path,
+        ]
+
+        # un solo decode: split del video a una rama de filtros por salida
+        graph = [f"[0:v:0]split={n}" + "".join(f"[s{i}]" for i in range(n))] if n > 1 else []
+        for i, t in enumerate(targets):
+            src = f"[s{i}]" if n > 1 else "[0:v:0]"
+            graph.append(f"{src}{t.get('vf') or 'null'}[v{i}]")
+        cmd += ["-filter_complex", ";".join(graph), "-progress", "pipe:1", "-nostats"]
+
+        per_output_threads = max(1, (threads or os.cpu_count() or 2) // n)
+        for i, t in enumerate(targets):
+            cmd += ["-map", f"[v{i}]"]
+            if t.get("a_bps"):
+                cmd += ["-map", "0:a:0?"]
+            cmd += self.target_encode_args(t, per_output_threads)
+        return cmd
+
+    @staticmethod
+    def target_encode_args(target, threads=None, audio=True):
+        """Opciones de salida (codecs + archivo) de un target de encode_renditions, sin los -map."""
+        args = []
+        if audio and target.get("a_bps"):
+            args += ["-c:a", "aac", "-b:a", str(target["a_bps"])]
+            if target.get("channels"):
+                args += ["-ac", str(target["channels"])]
+        else:
+            args += ["-an"]
+        args += [
+            "-c:v", "libx264",
+            "-preset", target.get("preset") or "veryfast",
+            "-pix_fmt", "yuv420p",
+            "-b:v", str(int(target["v_bps"])),
+        ]
+        if target.get("constrained"):
+            args += ["-maxrate", str(int(target["v_bps"])), "-bufsize", str(int(target["v_bps"] * 2))]
+        if threads:
+            args += ["-threads", str(threads)]
+        args += ["-movflags", "+faststart", target["output"]]
+        return args
+
+    def encode_renditions(self, input_path, start, end, targets, threads=None,
+                          on_progress=None, on_event=None, cancel_event=None):
+        """
+        Varias salidas del rango [start, end] con UN solo ffmpeg: se decodifica (y se
+        busca el inicio) una vez y un split del filter graph alimenta un encoder por salida.
+
+        targets: dicts con output, vf (escala/fps o None), v_bps, a_bps (0 = sin audio),
+        channels, preset, constrained (maxrate/bufsize), max_bytes (tope o None) y
+        retry (default True).
+        Los targets con tope que se pasan se repiten UNA vez, todos juntos en otro ffmpeg,
+        con el bitrate de video corregido por cuánto se pasaron (retry=False: se deja
+        como está, p.ej. el ladder de Discord tiene sus propios fallbacks).
+
+        Devuelve una lista (mismo orden que targets) de {name, output, bytes, fits}.
+        cancel_event: borra todas las salidas y lanza EncodeCancelled.
+        """
+        duration = end - start
+        for t in targets:
+            if os.path.abspath(t["output"]) == os.path.abspath(input_path):
+                raise RuntimeError("Output path matches input path (would overwrite input).")
+
+        results = [None] * len(targets)
+        pending = list(range(len(targets)))
+        v_bps = {i: targets[i]["v_bps"] for i in pending}
+
+        try:
+            for attempt in range(2):
+                batch = [dict(targets[i], v_bps=v_bps[i]) for i in pending]
+                cmd = self._build_renditions_cmd(input_path, start, end, batch, threads=threads)
+                self.run_ffmpeg(cmd, duration, on_progress=on_progress, on_event=on_event,
+                                cancel_event=cancel_event)
+
+                retry = []
+                for i in pending:
+                    t = targets[i]
+                    size = os.path.getsize(t["output"]) if os.path.exists(t["output"]) else 0
+                    fits = size > 0 and (not t.get("max_bytes") or size <= t["max_bytes"])
+                    results[i] = {"name": t.get("name"), "output": t["output"], "bytes": size, "fits": fits}
+                    if not fits and size > 0 and attempt == 0 and t.get("retry", True) and t.get("max_bytes"):
+                        v_bps[i] = int(v_bps[i] * t["max_bytes"] / size * 0.95)
+                        retry.append(i)
+                pending = retry
+                if not pending:
+                    break
+
+        except EncodeCancelled:
+            remove_quiet(*[t["output"] for t in targets])
+            raise
+
+        return results
+
+    # (target_height, audio_bps, extra_vf)
+    DISCORD_LADDER = [
+        # normales
+        (720,  64_000, None),
+        (720,  48_000, None),
+        (480,  48_000, None),
+        (360,  32_000, None),
+
+        # agresivos
+        (360,  24_000, "fps=24"),
+        (240,  24_000, "fps=24"),
+
+        # nuclear (baja fuerte fps)
+        (240,  24_000, "fps=10"),
+        # último último: sin audio (si querés que “entre sí o sí”)
+        (240,  0,       "fps=10"),
+    ]
+
+    @staticmethod
+    def _attempt_settings(total_bps, in_h, target_h, a_bps, extra_vf, plan=None):
+        """
+        Traduce un escalón del ladder a (vf, v_bps, a_bps) concretos.
+        plan: (alto, fps) elegido por el análisis de complejidad; los escalones normales
+        (720) usan ese alto (puede ser 1080 si el contenido es estático) y ninguno lo supera.
+        """
+        scale_h = min(in_h, target_h)
+        if plan is not None:
+            plan_h, plan_fps = plan
+            scale_h = min(in_h, plan_h) if target_h >= 720 else min(scale_h, plan_h)
+            if not extra_vf and plan_fps:
+                extra_vf = f"fps={plan_fps}"
+
+        # video bitrate = total - audio (con piso)
+        v_bps = total_bps - a_bps
+        v_bps = max(v_bps, 120_000)
+
+        # si el total quedó muy bajo, no te mates con audio alto
+        if a_bps > 0 and total_bps < (a_bps + 140_000):
+            a_bps = min(a_bps, 32_000)
+            v_bps = max(total_bps - a_bps, 100_000)
+
+        vf_parts = [f"scale=-2:{scale_h}"]
+        if extra_vf:
+            vf_parts.append(extra_vf)
+
+        return ",".join(vf_parts), v_bps, a_bps
+
+    @staticmethod
+    def _build_attempt_cmd(ffmpeg, input_path, output_path, vf, v_bps, a_bps, seek=None, length=None, threads=None):
+        cmd = [ffmpeg, "-y", "-loglevel", "error"]
+
+        # muestras: seek rápido por input
+        if seek is not None:
+            cmd += ["-ss", f"{seek:.3f}"]
+        if length is not None:
+            cmd += ["-t", f"{length:.3f}"]
+
+        cmd += [
+            "-i", input_path,
+            "-vf", vf,
+            "-c:v", "libx264",
+            "-preset", "ultrafast",
+            "-pix_fmt", "yuv420p",
+            "-b:v", str(v_bps),
+            "-maxrate", str(v_bps),
+            "-bufsize", str(v_bps * 2),
+            "-movflags", "+faststart",
+        ]
+
+        if threads:
+            cmd += ["-threads", str(threads)]
+
+        if seek is None and length is None:
+            cmd += ["-progress", "pipe:1", "-nostats"]
+
+        if a_bps and a_bps > 0:
+            cmd += ["-c:a", "aac", "-b:a", str(a_bps), "-ac", "2"]
+        else:
+            cmd += ["-an"]
+
+        cmd.append(output_path)
+        return cmd
+
+    def _predict_start_attempt(self, input_path, duration, total_bps, in_h, max_bytes,
+                               sample_count=3, sample_sec=2.0, on_status=None, cancel_event=None,
+                               plan=None, threads=None):
+        """
+        Etapa de sizing: codifica unas pocas muestras cortas repartidas por el input
+        con cada escalón del ladder (de mejor a peor calidad), extrapola el tamaño final
+        y devuelve (indice_0based, bytes_estimados) del primero que se predice que entra.
+
+        Devuelve (0, None) si el input es corto (codificar entero sale igual de barato)
+        o si el sampling falla, para que el ladder arranque desde el principio.
+        Si se cancela (cancel_event), propaga EncodeCancelled.
+        """
+        import tempfile, shutil
+
+        # en clips cortos, el sampling cuesta casi lo mismo que un encode completo
+        if duration < sample_count * sample_sec * 5:
+            return 0, None
+
+        ffmpeg = self._get_ffmpeg_path()
+
+        # posiciones repartidas (centro de cada tramo), sin pegarse al inicio/final
+        positions = [
+            max(0.0, (duration * (i + 0.5) / sample_count) - (sample_sec / 2))
+            for i in range(sample_count)
+        ]
+
+        tmp_dir = tempfile.mkdtemp(prefix="halfslice_sizing_")
+        last_idx = len(self.DISCORD_LADDER) - 1
+        predicted = None
+
+        try:
+            for idx, (target_h, a_bps, extra_vf) in enumerate(self.DISCORD_LADDER):
+                if on_status:
+                    try:
+                        on_status(f"Estimando tamaño ({idx + 1}/{len(self.DISCORD_LADDER)})")
+                    except:
+                        pass
+
+                vf, v_bps, a_bps = self._attempt_settings(total_bps, in_h, target_h, a_bps, extra_vf, plan)
+
+                sample_bytes = 0
+                sampled_sec = 0.0
+
+                for k, pos in enumerate(positions):
+                    sample_path = os.path.join(tmp_dir, f"s{idx}_{k}.mp4")
+                    cmd = self._build_attempt_cmd(
+                        ffmpeg, input_path, sample_path, vf, v_bps, a_bps,
+                        seek=pos, length=sample_sec, threads=threads
+                    )
+                    self.run_ffmpeg(cmd, sample_sec, cancel_event=cancel_event, timeout=120)
+                    if not os.path.exists(sample_path):
+                        return 0, None
+
+                    sample_bytes += os.path.getsize(sample_path)
+                    sampled_sec += min(sample_sec, max(duration - pos, 0.001))
+
+                if sampled_sec <= 0:
+                    return 0, None
+
+                # extrapolación lineal (bytes/seg de las muestras * duración total)
+                predicted = int(sample_bytes / sampled_sec * duration)
+
+                # margen: las muestras cortas subestiman un poco el overhead de rate control
+                if predicted * 1.05 <= max_bytes:
+                    return idx, predicted
+
+            # ninguno entra según la predicción: vamos directo al más barato
+            return last_idx, predicted
+
+        except EncodeCancelled:
+            raise
+
+        except Exception:
+            return 0, None
+
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def compress_to_discord_10mb(self, input_path, out_dir=None, max_bytes=10 * 1024 * 1024,
+                                 on_progress=None, on_status=None, predict=True, parallel_attempts=1,
+                                 cancel_event=None, on_event=None, on_stats=None, analyze=True,
+                                 chunked=None, renditions=None, threads=None):
+        """
+        Compresión rápida y efectiva para Discord (<10MB): ladder 1-pass con fallbacks (res/audio/fps).
+        Devuelve: (ok, output_path, size_mb); stats en self.last_stats / on_stats.
+        """
+        import os, time
+
+        t0 = time.monotonic()
+        # cores de este job (JobScheduler): escalones en paralelo, chunks, muestras y
+        # renditions se reparten éstos (None = todos)
+        job_threads = threads
 
         ffmpeg = self._get_ffmpeg_path()
         duration = self.probe_duration_seconds(input_path)
@@ -215,6 +1520,15 @@ class FFmpegService:
         if os.path.abspath(input_path) == os.path.abspath(final_output):
             raise RuntimeError("Output path matches input path (would overwrite input).")
 
+        # ninguna rendition puede caer sobre la salida final, el input o los .tmp del ladder
+        rendition_paths = self.rendition_outputs(
+            os.path.join(out_dir, base + ".mp4"), renditions or [],
+            reserved=[input_path, final_output] + [
+                os.path.join(out_dir, f"{base}_discord10mb_try{i}.tmp.mp4")
+                for i in range(1, len(self.DISCORD_LADDER) + 1)
+            ]
+        )
+
         # margen seguro por overhead MP4
         target_bytes = int(max_bytes * 0.94)
 
@@ -227,103 +1541,384 @@ class FFmpegService:
         if not in_h or in_h <= 0:
             in_h = 2160
 
-        # (target_height, audio_bps, extra_vf)
-        attempts = [
-            # normales
-            (720,  64_000, None),
-            (720,  48_000, None),
-            (480,  48_000, None),
-            (360,  32_000, None),
-
-            # agresivos
-            (360,  24_000, "fps=24"),
-            (240,  24_000, "fps=24"),
-
-            # nuclear (baja fuerte fps)
-            (240,  24_000, "fps=10"),
-            # último último: sin audio (si querés que “entre sí o sí”)
-            (240,  0,       "fps=10"),
-        ]
-
+        attempts = self.DISCORD_LADDER
         total_attempts = len(attempts)
 
-        for idx, (target_h, a_bps, extra_vf) in enumerate(attempts, start=1):
+        # complejidad (movimiento/detalle, ver ComplexityService): elige resolución y fps por
+        # bits por pixel antes del primer intento (estático queda en 1080p, gameplay baja de entrada)
+        analysis, plan = None, None
+        if analyze:
             if on_status:
                 try:
-                    on_status(f"Intento {idx} de {total_attempts} (10MB max)")
+                    on_status("Analizando contenido...")
                 except:
                     pass
+            analysis = self.complexity.analyze(input_path, 0.0, duration, cancel_event=cancel_event)
+            if cancel_event is not None and cancel_event.is_set():
+                raise EncodeCancelled("Encode cancelled")
+            if analysis is not None:
+                try:
+                    in_fps = (self.probe(input_path).get("video") or {}).get("fps")
+                except RuntimeError:
+                    in_fps = None
+                _, v_bps0, _ = self._attempt_settings(total_bps, in_h, *attempts[0])
+                plan = self.complexity.plan(analysis, v_bps0, in_w, in_h, in_fps)
+
+        features = None
+        if self.size_history is not None:
+            try:
+                features = SizePredictor.features(self.probe(input_path), duration)
+                if analysis is not None:
+                    features["complexity"] = analysis["complexity"]
+            except Exception:
+                features = None
 
-            scale_h = min(in_h, target_h)
+        # bytes pedidos por escalón (bitrate total * duración); base de los ratios del historial
+        def requested_bytes(idx0, v_scale=1.0):
+            target_h, a_bps, extra_vf = attempts[idx0]
+            _, v_bps, a_bps = self._attempt_settings(total_bps, in_h, target_h, a_bps, extra_vf, plan)
+            return int((v_bps * v_scale + a_bps) * duration / 8)
 
-            # video bitrate = total - audio (con piso)
-            v_bps = total_bps - a_bps
-            v_bps = max(v_bps, 120_000)
+        # escalón inicial: del historial si hay contenido parecido (con corrección del bitrate
+        # de video por lo que el encoder se suele pasar / quedar corto); si no, sizing por muestras
+        start_idx, predicted_bytes = 0, None
+        v_scales = {}           # corrección de bitrate por escalón (0-based)
+        predictor = "none"
+        if predict:
+            prediction = None
+            if features is not None:
+                prediction = self.size_predictor.predict(
+                    features, [requested_bytes(i) for i in range(total_attempts)], max_bytes
+                )
+            if prediction is not None:
+                start_idx, v_scale, predicted_bytes = prediction
+                v_scales[start_idx] = v_scale
+                predictor = "history"
+            else:
+                start_idx, predicted_bytes = self._predict_start_attempt(
+                    input_path, duration, total_bps, in_h, max_bytes,
+                    on_status=on_status, cancel_event=cancel_event, plan=plan,
+                    threads=job_threads
+                )
+                predictor = "sampling"
 
-            # si el total quedó muy bajo, no te mates con audio alto
-            if a_bps > 0 and total_bps < (a_bps + 140_000):
-                a_bps = min(a_bps, 32_000)
-                v_bps = max(total_bps - a_bps, 100_000)
+        # dict propio de esta llamada (puede haber varias compresiones en paralelo):
+        # encodes completos, early aborts, elapsed / realtime (sizing incluido) y encode_fps del ganador
+        stats = {
+            "duration": duration,
+            "start_attempt": start_idx + 1,
+            "predicted_bytes": predicted_bytes,
+            "predictor": predictor,
+            "v_scale": v_scales.get(start_idx, 1.0),
+            "complexity": analysis["complexity"] if analysis else None,
+            "plan_height": plan[0] if plan else None,
+            "plan_fps": plan[1] if plan else None,
+            "chunks": None,
+            "chunk_fallback": None,
+            "renditions": None,
+            "first_attempt_hit": None,
+            "full_encodes": 0,
+            "early_aborts": 0,
+            "elapsed": None,
+            "realtime": None,
+            "encode_fps": None,
+        }
+        self.last_stats = stats
+        rung_stats = {}
+        # chunks paralelos por escalón (encode_chunked); None = automático en inputs largos.
+        # Si las uniones no quedan continuas se avisa por on_status y queda en stats["chunk_fallback"]
+        use_chunks = self.should_chunk(duration, job_threads) if chunked is None else bool(chunked)
 
-            vf_parts = [f"scale=-2:{scale_h}"]
-            if extra_vf:
-                vf_parts.append(extra_vf)
-            vf = ",".join(vf_parts)
+        def run_attempt(idx, threads=None, rung_cancel=None, progress_cb=None, event_cb=None):
+            """
+            Corre el escalón idx (1-based) completo. Devuelve (tmp_output, bytes) si entra,
+            o (tmp_output, None) si no entra / quedó inválido / lo canceló el batch.
+            Si el que cancela es el usuario (cancel_event de afuera), propaga EncodeCancelled.
+            """
+            target_h, a_bps, extra_vf = attempts[idx - 1]
+            vf, v_bps, a_bps = self._attempt_settings(total_bps, in_h, target_h, a_bps, extra_vf, plan)
+            v_scale = v_scales.get(idx - 1, 1.0)
+            v_bps = int(v_bps * v_scale)
 
             tmp_output = os.path.join(out_dir, f"{base}_discord10mb_try{idx}.tmp.mp4")
 
-            cmd = [
-                ffmpeg, "-y",
-                "-loglevel", "error",
-                "-i", input_path,
-                "-vf", vf,
-                "-c:v", "libx264",
-                "-preset", "ultrafast",
-                "-pix_fmt", "yuv420p",
-                "-b:v", str(v_bps),
-                "-maxrate", str(v_bps),
-                "-bufsize", str(v_bps * 2),
-                "-movflags", "+faststart",
-                "-progress", "pipe:1",
-                "-nostats",
-            ]
+            cmd = self._build_attempt_cmd(ffmpeg, input_path, tmp_output, vf, v_bps, a_bps,
+                                          threads=threads or job_threads)
 
-            if a_bps and a_bps > 0:
-                cmd += ["-c:a", "aac", "-b:a", str(a_bps), "-ac", "2"]
-            else:
-                cmd += ["-an"]
+            stats["full_encodes"] += 1
+            attempt_t0 = time.monotonic()
+            try:
+                rung_stats[idx] = None
+                # en un batch paralelo los cores ya están repartidos entre escalones
+                if use_chunks and threads is None:
+                    audio_args = ["-c:a", "aac", "-b:a", str(a_bps), "-ac", "2"] if a_bps else None
+                    try:
+                        rung_stats[idx] = self.encode_chunked(
+                            input_path, tmp_output, 0.0, duration, vf, v_bps, audio_args,
+                            preset="ultrafast", threads=job_threads,
+                            on_progress=progress_cb, on_event=event_cb,
+                            max_bytes=max_bytes, cancel_event=AnyEvent(cancel_event, rung_cancel)
+                        )
+                        stats["chunks"] = rung_stats[idx]["chunks"]
+                    except ChunkJoinError as e:
+                        # uniones no continuas: este escalón va en un solo proceso
+                        stats["chunk_fallback"] = str(e)
+                        if on_status:
+                            try:
+                                on_status(f"Intento {idx}: chunks descartados, encode en un solo proceso")
+                            except:
+                                pass
+                if rung_stats[idx] is None:
+                    rung_stats[idx] = self.run_ffmpeg(
+                        cmd, duration, on_progress=progress_cb, on_event=event_cb,
+                        max_bytes=max_bytes, cancel_event=AnyEvent(cancel_event, rung_cancel)
+                    )
+            except SizeLimitExceeded as e:
+                # se cortó temprano: no iba a entrar, siguiente escalón
+                stats["early_aborts"] += 1
+                remove_quiet(tmp_output)
+                learn(idx, v_scale, e.projected_bytes, "early_abort", attempt_t0)
+                return tmp_output, None
+            except EncodeCancelled:
+                remove_quiet(tmp_output)
+                if cancel_event is not None and cancel_event.is_set():
+                    raise
+                return tmp_output, None
+
+            if not os.path.exists(tmp_output):
+                return tmp_output, None
+
+            final_bytes = os.path.getsize(tmp_output)
+
+            # si quedó “vacío/inválido” o se pasa, descartalo
+            if final_bytes < 50_000 or final_bytes > max_bytes:
+                remove_quiet(tmp_output)
+                if final_bytes >= 50_000:
+                    learn(idx, v_scale, final_bytes, "over", attempt_t0)
+                return tmp_output, None
 
-            cmd.append(tmp_output)
+            learn(idx, v_scale, final_bytes, "fit", attempt_t0)
+            return tmp_output, final_bytes
 
-            self._run_ffmpeg_with_progress(cmd, duration, on_progress=on_progress)
+        def learn(idx, v_scale, achieved, result, attempt_t0):
+            if self.size_history is None or features is None or not achieved:
+                return
+            self.size_history.add({
+                "type": "attempt",
+                "features": features,
+                "rung": idx - 1,
+                "v_scale": v_scale,
+                "requested_bytes": requested_bytes(idx - 1, v_scale),
+                "achieved_bytes": int(achieved),
+                "max_bytes": max_bytes,
+                "result": result,
+                "wall": round(time.monotonic() - attempt_t0, 3),
+            })
 
-            if os.path.exists(tmp_output):
-                final_bytes = os.path.getsize(tmp_output)
+        def learn_run(winner_idx):
+            stats["first_attempt_hit"] = winner_idx == start_idx + 1
+            if self.size_history is None or features is None:
+                return
+            self.size_history.add({
+                "type": "run",
+                "features": features,
+                "start_rung": start_idx,
+                "winner_rung": winner_idx - 1 if winner_idx else None,
+                "first_fit": stats["first_attempt_hit"],
+                "predictor": predictor,
+            })
 
-                # si quedó “vacío/inválido”, descartalo
-                if final_bytes < 50_000:
+        def report_stats(idx=None):
+            elapsed = max(time.monotonic() - t0, 1e-6)
+            stats["elapsed"] = elapsed
+            stats["realtime"] = duration / elapsed
+            if idx in rung_stats:
+                stats["encode_fps"] = rung_stats[idx]["encode_fps"]
+            if on_stats:
+                try:
+                    on_stats(stats)
+                except:
+                    pass
+
+        def finish(idx, tmp_output):
+            # mover a nombre final
+            remove_quiet(final_output)
+            os.replace(tmp_output, final_output)
+            size_mb = os.path.getsize(final_output) / (1024 * 1024)
+            learn_run(idx)
+            report_stats(idx)
+            return True, final_output, size_mb
+
+        def run_attempt_with_renditions(idx):
+            """
+            Como run_attempt, pero el mismo ffmpeg también escribe las renditions extra
+            (<base>_<name>.mp4 en out_dir); sus resultados quedan en stats["renditions"].
+            """
+            target_h, a_bps, extra_vf = attempts[idx - 1]
+            vf, v_bps, a_bps = self._attempt_settings(total_bps, in_h, target_h, a_bps, extra_vf, plan)
+            v_scale = v_scales.get(idx - 1, 1.0)
+
+            tmp_output = os.path.join(out_dir, f"{base}_discord10mb_try{idx}.tmp.mp4")
+            targets = [{
+                "name": None, "output": tmp_output, "vf": vf,
+                "v_bps": int(v_bps * v_scale), "a_bps": a_bps, "channels": 2,
+                "preset": "ultrafast", "constrained": True,
+                # el ladder tiene sus propios fallbacks: sin reintento acá
+                "max_bytes": max_bytes, "retry": False,
+            }]
+            for r, output in zip(renditions, rendition_paths):
+                targets.append(self.rendition_target(
+                    r, output, duration, preset="veryfast" if r.get("max_mb") else "medium"
+                ))
+
+            stats["full_encodes"] += 1
+            attempt_t0 = time.monotonic()
+            results = self.encode_renditions(
+                input_path, 0.0, duration, targets, threads=job_threads,
+                on_progress=on_progress, on_event=on_event, cancel_event=cancel_event
+            )
+            stats["renditions"] = results[1:]
+
+            final_bytes = results[0]["bytes"]
+            if final_bytes < 50_000 or final_bytes > max_bytes:
+                remove_quiet(tmp_output)
+                if final_bytes >= 50_000:
+                    learn(idx, v_scale, final_bytes, "over", attempt_t0)
+                return tmp_output, None
+
+            learn(idx, v_scale, final_bytes, "fit", attempt_t0)
+            return tmp_output, final_bytes
+
+        # el sizing ya descartó los escalones anteriores; quedan como fallback hacia abajo
+        pending = list(range(start_idx + 1, total_attempts + 1))
+        # > 1: esa cantidad de escalones a la vez, gana el de mejor calidad que entra
+        parallel_attempts = max(1, int(parallel_attempts or 1))
+
+        if renditions:
+            idx = pending.pop(0)
+            if on_status:
+                try:
+                    on_status(f"Intento {idx} de {total_attempts} + {len(renditions)} renditions (10MB max)")
+                except:
+                    pass
+            tmp_output, final_bytes = run_attempt_with_renditions(idx)
+            if final_bytes is not None:
+                return finish(idx, tmp_output)
+
+        while pending:
+            if cancel_event is not None and cancel_event.is_set():
+                raise EncodeCancelled("Encode cancelled")
+
+            batch = pending[:parallel_attempts]
+            pending = pending[parallel_attempts:]
+
+            if len(batch) == 1:
+                idx = batch[0]
+                if on_status:
                     try:
-                        os.remove(tmp_output)
+                        on_status(f"Intento {idx} de {total_attempts} (10MB max)")
                     except:
                         pass
+
+                tmp_output, final_bytes = run_attempt(idx, progress_cb=on_progress, event_cb=on_event)
+                if final_bytes is not None:
+                    return finish(idx, tmp_output)
+                continue
+
+            if on_status:
+                try:
+                    on_status(f"Intentos {batch[0]}-{batch[-1]} de {total_attempts} en paralelo (10MB max)")
+                except:
+                    pass
+
+            ok_idx, tmp_output = self._run_attempt_batch(batch, run_attempt, on_progress,
+                                                         cancel_event=cancel_event, on_event=on_event,
+                                                         threads=job_threads)
+            if ok_idx is not None:
+                return finish(ok_idx, tmp_output)
+
+        learn_run(None)
+        report_stats()
+        return False, final_output, 0.0
+
+    @staticmethod
+    def _run_attempt_batch(batch, run_attempt, on_progress=None, cancel_event=None, on_event=None,
+                           threads=None):
+        """
+        Lanza varios escalones a la vez (cada uno su ffmpeg, con los threads repartidos)
+        y se queda con el de mejor calidad (índice más bajo) que entra.
+        Cuando un escalón entra, cancela los de peor calidad que siguen corriendo;
+        los de mejor calidad siguen hasta resolverse.
+        Devuelve (idx, tmp_output) del ganador o (None, None).
+        Si se activa cancel_event (usuario), se limpia todo y propaga EncodeCancelled.
+        threads: cores a repartir entre los escalones (None = todos).
+        """
+        import threading
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+
+        threads = max(1, (threads or os.cpu_count() or 2) // len(batch))
+        cancel_events = {idx: threading.Event() for idx in batch}
+
+        # el progreso visible es el del escalón de mejor calidad que sigue vivo
+        alive = set(batch)
+        alive_lock = threading.Lock()
+
+        def visible_only(idx, fn):
+            def cb(value):
+                with alive_lock:
+                    current = min(alive) if alive else None
+                if fn and idx == current:
+                    fn(value)
+            return cb
+
+        def job(idx):
+            try:
+                return run_attempt(idx, threads=threads,
+                                   rung_cancel=cancel_events[idx],
+                                   progress_cb=visible_only(idx, on_progress),
+                                   event_cb=visible_only(idx, on_event))
+            finally:
+                with alive_lock:
+                    alive.discard(idx)
+
+        fits = {}
+        errors = []
+
+        with ThreadPoolExecutor(max_workers=len(batch)) as ex:
+            futures = {ex.submit(job, idx): idx for idx in batch}
+            for fut in as_completed(futures):
+                idx = futures[fut]
+                try:
+                    tmp_output, final_bytes = fut.result()
+                except Exception as e:
+                    errors.append(e)
                     continue
 
-                if final_bytes <= max_bytes:
-                    # mover a nombre final
-                    try:
-                        if os.path.exists(final_output):
-                            os.remove(final_output)
-                    except:
-                        pass
+                if final_bytes is None:
+                    continue
+
+                fits[idx] = tmp_output
+
+                # first-fit-wins hacia abajo: lo de peor calidad ya no sirve
+                for other in batch:
+                    if other > idx:
+                        cancel_events[other].set()
 
-                    os.replace(tmp_output, final_output)
-                    size_mb = os.path.getsize(final_output) / (1024 * 1024)
-                    return True, final_output, size_mb
+        if cancel_event is not None and cancel_event.is_set():
+            remove_quiet(*fits.values())
+            raise EncodeCancelled("Encode cancelled")
 
-                # si se pasa, borramos y probamos fallback
+        if not fits:
+            if errors:
+                raise errors[0]
+            return None, None
+
+        best = min(fits)
+        for idx, tmp_output in fits.items():
+            if idx != best:
                 try:
                     os.remove(tmp_output)
                 except:
                     pass
 
-        return False, final_output, 0.0
+        return best, fits[best]
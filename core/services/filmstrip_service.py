@@ -0,0 +1,226 @@
+import json
+import math
+import os
+import subprocess
+import threading
+import time
+
+import numpy as np
+
+from .media_cache import cache_path
+from .process_utils import remove_quiet
+
+
+class Filmstrip:
+    """
+    Thumbnails chicos a intervalo fijo, uint8 (n, h, w, 3) RGB: en RAM mientras se
+    generan, np.memmap read-only si ya estaban completos en disco.
+    Se va llenando en background; `ready` dice cuántos frames ya son válidos.
+    """
+
+    def __init__(self, frames, interval, ready=0):
+        self.frames = frames
+        self.interval = interval
+        self.ready = ready
+        self.complete = False
+        self._stop = threading.Event()
+
+    def nearest(self, t):
+        """Thumbnail más cercano a t (o None si todavía no se generó)."""
+        if self.ready <= 0:
+            return None
+        i = int(round(max(0.0, t) / self.interval))
+        if i >= self.ready:
+            return None if not self.complete else self.frames[self.ready - 1]
+        return self.frames[i]
+
+    def stop(self):
+        self._stop.set()
+
+
+class FilmstripService:
+    """
+    Genera (con ffmpeg, sólo keyframes, ya escalado) y persiste por archivo el
+    filmstrip para scrubbing instantáneo. Mismo esquema de cache que el índice:
+    path+size+mtime. Los .strip del cache se recortan por LRU (MAX_CACHE_BYTES).
+    """
+
+    THUMB_W, THUMB_H = 160, 90
+    MIN_INTERVAL = 0.5
+    MAX_THUMBS = 1200
+    # ~10 strips de los más largos (1200 x 160x90 RGB = ~52MB cada uno)
+    MAX_CACHE_BYTES = 512 * 1024 * 1024
+    # .tmp más viejos que esto son de una generación que murió (crash / app cerrada)
+    STALE_TMP_SEC = 3600
+
+    def __init__(self, ff, cache_dir):
+        self.ff = ff
+        self.cache_dir = cache_dir
+
+    def _interval_for(self, duration):
+        return max(self.MIN_INTERVAL, float(duration) / self.MAX_THUMBS)
+
+    def open(self, path, duration, on_ready=None):
+        """
+        Devuelve un Filmstrip para path. Si ya está completo en disco se abre read-only
+        al toque; si no, se genera en un thread (llama on_ready(strip) al terminar).
+        """
+        data_path = cache_path(self.cache_dir, path, ".strip")
+        meta_path = data_path + ".json"
+
+        w, h = self.THUMB_W, self.THUMB_H
+        interval = self._interval_for(duration)
+        count = int(math.ceil(float(duration) / interval)) + 1
+
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("complete") and meta.get("width") == w and meta.get("height") == h:
+                frames = np.memmap(data_path, dtype=np.uint8, mode="r",
+                                   shape=(meta["count"], h, w, 3))
+                strip = Filmstrip(frames, meta["interval"], ready=meta["count"])
+                strip.complete = True
+                # LRU: el mtime marca el último uso
+                try:
+                    os.utime(data_path)
+                except OSError:
+                    pass
+                if on_ready:
+                    on_ready(strip)
+                return strip
+        except Exception:
+            pass
+
+        # se genera en RAM: el .strip del disco nunca queda mapeado a medio escribir
+        # (en Windows no se puede truncar ni reemplazar un archivo mapeado)
+        frames = np.empty((count, h, w, 3), dtype=np.uint8)
+        strip = Filmstrip(frames, interval)
+
+        def worker():
+            try:
+                self._generate(path, strip, count)
+            except Exception:
+                return
+
+            if strip._stop.is_set() or strip.ready <= 0:
+                return
+
+            strip.complete = True
+            self._save(strip, data_path, meta_path)
+
+            if on_ready:
+                on_ready(strip)
+
+        threading.Thread(target=worker, daemon=True).start()
+        return strip
+
+    def _save(self, strip, data_path, meta_path):
+        """Escribe a un .tmp propio y reemplaza recién completo (data primero, meta después)."""
+        w, h = self.THUMB_W, self.THUMB_H
+        suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        tmp, meta_tmp = data_path + suffix, meta_path + suffix
+        try:
+            strip.frames[:strip.ready].tofile(tmp)
+            os.replace(tmp, data_path)
+            with open(meta_tmp, "w", encoding="utf-8") as f:
+                json.dump({
+                    "interval": strip.interval,
+                    "count": strip.ready,
+                    "width": w,
+                    "height": h,
+                    "complete": True,
+                }, f)
+            os.replace(meta_tmp, meta_path)
+        except Exception:
+            # p.ej. otro proceso tiene el .strip abierto: queda sólo en RAM esta vez
+            remove_quiet(tmp, meta_tmp)
+            return
+
+        self._evict(keep=data_path)
+
+    def _evict(self, keep=None):
+        """Borra los .strip menos usados (mtime) hasta quedar bajo MAX_CACHE_BYTES, y .tmp viejos."""
+        now = time.time()
+        strips = []
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return
+
+        for name in names:
+            full = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(full)
+            except OSError:
+                continue
+            if ".strip" in name and name.endswith(".tmp"):
+                if now - st.st_mtime > self.STALE_TMP_SEC:
+                    remove_quiet(full)
+            elif name.endswith(".strip"):
+                strips.append((st.st_mtime, st.st_size, full))
+
+        total = sum(size for _, size, _ in strips)
+        for _, size, full in sorted(strips):
+            if total <= self.MAX_CACHE_BYTES:
+                break
+            if keep and os.path.abspath(full) == os.path.abspath(keep):
+                continue
+            # meta primero: sin meta "complete" el .strip ya no se usa aunque no se pueda borrar (mapeado)
+            remove_quiet(full + ".json")
+            try:
+                os.remove(full)
+            except OSError:
+                continue
+            total -= size
+
+    def _generate(self, path, strip, count):
+        ffmpeg = self.ff._get_ffmpeg_path()
+        cwd = os.path.dirname(ffmpeg) if os.path.isabs(ffmpeg) else None
+
+        w, h = self.THUMB_W, self.THUMB_H
+        cmd = [
+            ffmpeg, "-v", "error",
+            # sólo keyframes: el refinamiento exacto lo hace show_frame después
+            "-skip_frame", "nokey",
+            "-i", path,
+            "-an", "-sn",
+            "-vf", f"fps=1/{strip.interval:.6f},scale={w}:{h}",
+            "-f", "rawvideo",
+            "-pix_fmt", "rgb24",
+            "pipe:1",
+        ]
+
+        p = subprocess.Popen(
+            cmd,
+            cwd=cwd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            **self.ff._no_window_kwargs()
+        )
+
+        frame_bytes = w * h * 3
+        buf = memoryview(strip.frames).cast("B")
+
+        try:
+            for i in range(count):
+                if strip._stop.is_set():
+                    break
+
+                view = buf[i * frame_bytes:(i + 1) * frame_bytes]
+                got = 0
+                while got < frame_bytes:
+                    n = p.stdout.readinto(view[got:])
+                    if not n:
+                        break
+                    got += n
+
+                if got < frame_bytes:
+                    break
+                strip.ready = i + 1
+        finally:
+            try:
+                p.kill()
+            except Exception:
+                pass
+            p.stdout.close()
+            p.wait()
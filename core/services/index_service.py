@@ -0,0 +1,219 @@
+import os
+import struct
+import subprocess
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+
+from .media_cache import cache_path
+
+
+class FrameIndex:
+    """
+    Mapa frame <-> tiempo y lista de keyframes de un archivo.
+    Todo en arrays de doubles (no listas de dicts) para que sea compacto
+    y se pueda volcar/leer a disco de una.
+    """
+
+    MAGIC = b"HSIDX1\0\0"
+    HEADER = struct.Struct("<8sQQ")
+
+    def __init__(self, frame_times, keyframe_times):
+        self.frame_times = frame_times        # array('d'), ordenado (PTS en seg)
+        self.keyframe_times = keyframe_times  # array('d'), ordenado
+
+    @property
+    def frame_count(self):
+        return len(self.frame_times)
+
+    def frame_at(self, t):
+        """Índice del frame más cercano al tiempo t."""
+        ft = self.frame_times
+        if not ft:
+            return 0
+        i = bisect_left(ft, t)
+        if i <= 0:
+            return 0
+        if i >= len(ft):
+            return len(ft) - 1
+        return i if (ft[i] - t) < (t - ft[i - 1]) else i - 1
+
+    def time_of(self, frame_idx):
+        if not self.frame_times:
+            return 0.0
+        frame_idx = max(0, min(int(frame_idx), len(self.frame_times) - 1))
+        return self.frame_times[frame_idx]
+
+    def keyframe_before(self, t):
+        """Último keyframe <= t (o None)."""
+        i = bisect_right(self.keyframe_times, t + 1e-6)
+        return self.keyframe_times[i - 1] if i > 0 else None
+
+    def keyframe_after(self, t):
+        """Primer keyframe >= t (o None)."""
+        i = bisect_left(self.keyframe_times, t - 1e-6)
+        return self.keyframe_times[i] if i < len(self.keyframe_times) else None
+
+    # -------------------- disco --------------------
+
+    def save(self, path):
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(self.HEADER.pack(self.MAGIC, len(self.frame_times), len(self.keyframe_times)))
+            self.frame_times.tofile(f)
+            self.keyframe_times.tofile(f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            magic, n_frames, n_keys = cls.HEADER.unpack(f.read(cls.HEADER.size))
+            if magic != cls.MAGIC:
+                raise ValueError("Invalid index file")
+            frame_times = array("d")
+            frame_times.fromfile(f, n_frames)
+            keyframe_times = array("d")
+            keyframe_times.fromfile(f, n_keys)
+        return cls(frame_times, keyframe_times)
+
+
+class IndexService:
+    """
+    Construye (en background, con ffprobe) y cachea en disco el FrameIndex de cada
+    archivo. La clave de cache es path+size+mtime: reabrir un archivo sin cambios
+    devuelve el índice al instante.
+    """
+
+    def __init__(self, ff, cache_dir, max_loaded=8):
+        self.ff = ff
+        self.cache_dir = cache_dir
+        self.max_loaded = max_loaded
+
+        self._loaded = OrderedDict()   # index_path -> FrameIndex
+        self._building = {}            # index_path -> callbacks esperando
+        self._lock = threading.Lock()
+
+    def _index_path(self, path):
+        return cache_path(self.cache_dir, path, ".idx")
+
+    def _remember(self, index_path, index):
+        with self._lock:
+            self._loaded[index_path] = index
+            self._loaded.move_to_end(index_path)
+            while len(self._loaded) > self.max_loaded:
+                self._loaded.popitem(last=False)
+
+    def get(self, path):
+        """FrameIndex si ya está en memoria o en disco; None si todavía no existe."""
+        try:
+            index_path = self._index_path(path)
+        except OSError:
+            return None
+
+        with self._lock:
+            index = self._loaded.get(index_path)
+            if index is not None:
+                self._loaded.move_to_end(index_path)
+                return index
+
+        if os.path.exists(index_path):
+            try:
+                index = FrameIndex.load(index_path)
+            except Exception:
+                return None
+            self._remember(index_path, index)
+            return index
+
+        return None
+
+    def build(self, path):
+        """Escanea los paquetes de video con ffprobe (bloqueante) y guarda el índice."""
+        index_path = self._index_path(path)
+
+        ffprobe = self.ff._get_ffprobe_path()
+        cwd = os.path.dirname(ffprobe) if os.path.isabs(ffprobe) else None
+
+        cmd = [
+            ffprobe, "-v", "error",
+            "-select_streams", "v:0",
+            "-show_entries", "packet=pts_time,flags",
+            "-of", "csv=p=0",
+            path
+        ]
+
+        frame_times = array("d")
+        keyframe_times = array("d")
+
+        p = subprocess.Popen(
+            cmd,
+            cwd=cwd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            bufsize=1 << 16,
+            **self.ff._no_window_kwargs()
+        )
+        try:
+            for line in p.stdout:
+                parts = line.strip().split(",")
+                if len(parts) < 2:
+                    continue
+                try:
+                    t = float(parts[0])
+                except ValueError:
+                    continue  # pts N/A
+                frame_times.append(t)
+                if "K" in parts[1]:
+                    keyframe_times.append(t)
+        finally:
+            p.stdout.close()
+            p.wait()
+
+        if p.returncode != 0:
+            raise RuntimeError(f"ffprobe failed (code {p.returncode})")
+
+        # los paquetes vienen en orden de decodificación: ordenamos por PTS
+        index = FrameIndex(array("d", sorted(frame_times)), array("d", sorted(keyframe_times)))
+        index.save(index_path)
+        self._remember(index_path, index)
+        return index
+
+    def build_async(self, path, on_ready=None):
+        """
+        Devuelve el índice si ya está cacheado (y llama on_ready al toque);
+        si no, lo construye en un thread y llama on_ready(index) al terminar.
+        """
+        index = self.get(path)
+        if index is not None:
+            if on_ready:
+                on_ready(index)
+            return index
+
+        index_path = self._index_path(path)
+        with self._lock:
+            waiting = self._building.get(index_path)
+            if waiting is not None:
+                # ya se está construyendo: sólo nos anotamos para el aviso
+                if on_ready:
+                    waiting.append(on_ready)
+                return None
+            self._building[index_path] = [on_ready] if on_ready else []
+
+        def worker():
+            try:
+                built = self.build(path)
+            except Exception as e:
+                print("Index build failed:", e)
+                built = None
+            with self._lock:
+                callbacks = self._building.pop(index_path, [])
+            if built is not None:
+                for cb in callbacks:
+                    try:
+                        cb(built)
+                    except Exception:
+                        pass
+
+        threading.Thread(target=worker, daemon=True).start()
+        return None
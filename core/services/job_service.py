@@ -0,0 +1,273 @@
+import itertools
+import os
+import threading
+import time
+
+
+class Job:
+    """
+    Un trabajo del scheduler (slice / compress / download) con su estado y progreso.
+    fn(job) hace el trabajo en un thread del scheduler y devuelve el resultado.
+    """
+
+    KINDS = ("slice", "compress", "download")
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    _ids = itertools.count(1)
+
+    def __init__(self, kind, title, fn, on_done=None):
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown job kind: {kind}")
+
+        self.id = next(self._ids)
+        self.kind = kind
+        self.title = title
+        self.fn = fn
+        self.on_done = on_done
+
+        self.state = self.QUEUED
+        self.progress = 0.0
+        self.status = ""
+        self.result = None
+        self.error = None
+
+        # throughput: en vivo desde los eventos de ffmpeg y final (set_stats)
+        self.fps = None
+        self.speed = None
+        self.stats = None
+
+        # threads sugeridos para ffmpeg (-threads): reparte los cores entre los jobs activos
+        self.threads = None
+        self.cancel_event = threading.Event()
+
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+        self._scheduler = None
+
+    @property
+    def finished(self):
+        return self.state in (self.DONE, self.FAILED, self.CANCELLED)
+
+    def set_progress(self, pct):
+        self.progress = float(max(0, min(100, pct)))
+        self._changed()
+
+    def set_status(self, text):
+        self.status = text
+        self._changed()
+
+    def on_event(self, event):
+        """Evento de progreso de FFmpegService.run_ffmpeg: guarda fps de encode y velocidad."""
+        self.fps = event.get("fps")
+        self.speed = event.get("speed")
+        self._changed()
+
+    def set_stats(self, stats):
+        """Stats finales del trabajo (elapsed, realtime, encode_fps)."""
+        self.stats = dict(stats)
+        if stats.get("encode_fps") is not None:
+            self.fps = stats["encode_fps"]
+        if stats.get("realtime") is not None:
+            self.speed = stats["realtime"]
+        self._changed()
+
+    @property
+    def eta(self):
+        """Segundos restantes estimados por el ritmo de progreso (None si no hay datos)."""
+        if self.state != self.RUNNING or not self.started_at or self.progress <= 0:
+            return None
+        elapsed = time.time() - self.started_at
+        return elapsed * (100.0 - self.progress) / self.progress
+
+    @property
+    def throughput_text(self):
+        parts = []
+        if self.fps:
+            parts.append(f"{self.fps:.0f} fps")
+        if self.speed:
+            parts.append(f"{self.speed:.2f}x")
+        return " · ".join(parts)
+
+    def _changed(self):
+        if self._scheduler is not None:
+            self._scheduler._notify(self)
+
+
+class JobScheduler:
+    """
+    Scheduler compartido (lo tiene el GUI) para todo el trabajo pesado.
+    - Los encodes (slice/compress) comparten un límite de concurrencia derivado
+      de la cantidad de cores; las descargas (I/O) tienen su propio límite.
+    - Lo que excede el límite queda en cola (FIFO) y arranca cuando se libera un lugar.
+    - on_change(job) se llama (desde cualquier thread) con cada cambio de estado/progreso.
+    """
+
+    POOLS = {
+        "slice": "encode",
+        "compress": "encode",
+        "download": "download",
+    }
+
+    @staticmethod
+    def default_encode_limit():
+        # x264 ya paraleliza bastante por proceso: ~4 cores por encode
+        return max(1, (os.cpu_count() or 2) // 4)
+
+    def __init__(self, max_encodes=None, max_downloads=2, on_change=None):
+        self.limits = {
+            "encode": max(1, int(max_encodes or self.default_encode_limit())),
+            "download": max(1, int(max_downloads)),
+        }
+        self.on_change = on_change
+
+        self._jobs = []
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+
+    # -------------------- API --------------------
+
+    def submit(self, kind, title, fn, on_done=None):
+        job = Job(kind, title, fn, on_done=on_done)
+        job._scheduler = self
+        with self._lock:
+            self._jobs.append(job)
+        self._notify(job)
+        self._dispatch()
+        return job
+
+    def jobs(self):
+        with self._lock:
+            return list(self._jobs)
+
+    def active_count(self):
+        with self._lock:
+            return sum(1 for j in self._jobs if j.state in (Job.QUEUED, Job.RUNNING))
+
+    def cancel(self, job_id):
+        """
+        Cancela un job: si está en cola no arranca; si corre, se le avisa por cancel_event
+        (el trabajo frena su proceso y limpia parciales). Cuando termina, su lugar en el
+        pool se libera y arranca el siguiente de la cola.
+        """
+        with self._lock:
+            job = next((j for j in self._jobs if j.id == job_id), None)
+            if job is None or job.finished:
+                return False
+            job.cancel_event.set()
+            was_queued = job.state == Job.QUEUED
+            if was_queued:
+                job.state = Job.CANCELLED
+                job.finished_at = time.time()
+            else:
+                job.status = "Cancelling..."
+
+        if was_queued:
+            # nunca va a pasar por _run: mismo cierre (on_done incluido) acá
+            self._finish(job)
+        else:
+            self._notify(job)
+        return True
+
+    def cancel_all(self):
+        for job in self.jobs():
+            self.cancel(job.id)
+
+    def wait(self, timeout=None):
+        """Bloquea hasta que no quede nada en cola ni corriendo. Devuelve False si venció el timeout."""
+        with self._idle:
+            return self._idle.wait_for(
+                lambda: not any(not j.finished for j in self._jobs),
+                timeout=timeout
+            )
+
+    def shutdown(self, timeout=5.0):
+        """Cancela todo y espera (hasta timeout) a que los procesos en curso se frenen."""
+        self.cancel_all()
+        return self.wait(timeout)
+
+    def clear_finished(self):
+        with self._lock:
+            self._jobs = [j for j in self._jobs if not j.finished]
+        self._notify(None)
+
+    def set_limit(self, pool, limit):
+        with self._lock:
+            self.limits[pool] = max(1, int(limit))
+        self._dispatch()
+
+    # -------------------- internos --------------------
+
+    def _wake(self):
+        with self._idle:
+            self._idle.notify_all()
+
+    def _notify(self, job):
+        if self.on_change:
+            try:
+                self.on_change(job)
+            except Exception:
+                pass
+
+    def _dispatch(self):
+        to_start = []
+        with self._lock:
+            running = {pool: 0 for pool in self.limits}
+            for j in self._jobs:
+                if j.state == Job.RUNNING:
+                    running[self.POOLS[j.kind]] += 1
+
+            for j in self._jobs:
+                if j.state != Job.QUEUED:
+                    continue
+                pool = self.POOLS[j.kind]
+                if running[pool] >= self.limits[pool]:
+                    continue
+                running[pool] += 1
+                j.state = Job.RUNNING
+                j.started_at = time.time()
+                to_start.append(j)
+
+            cores = os.cpu_count() or 2
+            encode_slots = max(1, self.limits["encode"])
+            for j in to_start:
+                j.threads = max(1, cores // encode_slots) if self.POOLS[j.kind] == "encode" else None
+
+        for j in to_start:
+            self._notify(j)
+            threading.Thread(target=self._run, args=(j,), daemon=True).start()
+
+    def _run(self, job):
+        try:
+            job.result = job.fn(job)
+            job.state = Job.CANCELLED if job.cancel_event.is_set() else Job.DONE
+            if job.state == Job.DONE:
+                job.progress = 100.0
+        except Exception as e:
+            job.error = e
+            job.state = Job.CANCELLED if job.cancel_event.is_set() else Job.FAILED
+        finally:
+            job.finished_at = time.time()
+
+        # se liberó un lugar
+        self._finish(job, dispatch=True)
+
+    def _finish(self, job, dispatch=False):
+        """Cierre de un job terminado (corrido o cancelado en cola): notify, on_done, wake."""
+        self._notify(job)
+
+        if job.on_done:
+            try:
+                job.on_done(job)
+            except Exception:
+                pass
+
+        if dispatch:
+            self._dispatch()
+        self._wake()
@@ -0,0 +1,18 @@
+import hashlib
+import os
+
+
+def cache_key(path):
+    """
+    Clave estable para cachear datos derivados de un archivo de media.
+    Cambia si el archivo se mueve, cambia de tamaño o se vuelve a escribir (mtime).
+    """
+    st = os.stat(path)
+    raw = f"{os.path.abspath(path)}|{st.st_size}|{st.st_mtime_ns}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def cache_path(cache_dir, path, suffix):
+    """Ruta dentro de cache_dir para el archivo `path` (crea la carpeta si hace falta)."""
+    os.makedirs(cache_dir, exist_ok=True)
+    return os.path.join(cache_dir, cache_key(path) + suffix)
@@ -0,0 +1,150 @@
+import io
+import os
+import signal
+import subprocess
+import threading
+
+
+class AnyEvent:
+    """Se comporta como un Event "activo" si cualquiera de los eventos lo está (los None se ignoran)."""
+
+    def __init__(self, *events):
+        self.events = [e for e in events if e is not None]
+
+    def is_set(self):
+        return any(e.is_set() for e in self.events)
+
+
+def process_group_kwargs():
+    """
+    kwargs de Popen para que el proceso arranque en su propio grupo:
+    así se puede matar el árbol entero (yt-dlp lanza ffmpeg como hijo).
+    """
+    if os.name == "nt":
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {"start_new_session": True}
+
+
+def merge_popen_kwargs(*kwargs_list):
+    """Combina dicts de kwargs de Popen sumando los creationflags (Windows)."""
+    merged = {}
+    for kw in kwargs_list:
+        for key, value in kw.items():
+            if key == "creationflags":
+                merged[key] = merged.get(key, 0) | value
+            else:
+                merged[key] = value
+    return merged
+
+
+def stop_process(p, graceful=True, timeout=3.0):
+    """
+    Frena un ffmpeg escalando:
+    1) 'q' por stdin (ffmpeg cierra el archivo prolijo),
+    2) terminate(),
+    3) kill().
+    No lanza excepciones.
+    """
+    if p.poll() is not None:
+        return
+
+    if graceful and p.stdin:
+        try:
+            p.stdin.write("q" if isinstance(p.stdin, io.TextIOBase) else b"q")
+            p.stdin.flush()
+            p.stdin.close()
+        except Exception:
+            pass
+        try:
+            p.wait(timeout=timeout)
+            return
+        except subprocess.TimeoutExpired:
+            pass
+
+    try:
+        p.terminate()
+        p.wait(timeout=timeout)
+        return
+    except subprocess.TimeoutExpired:
+        pass
+    except Exception:
+        pass
+
+    try:
+        p.kill()
+        p.wait(timeout=timeout)
+    except Exception:
+        pass
+
+
+def kill_process_tree(p, timeout=3.0):
+    """
+    Mata el proceso y todos sus hijos (requiere haber usado process_group_kwargs en Popen).
+    No lanza excepciones.
+    """
+    if p.poll() is not None:
+        return
+
+    if os.name == "nt":
+        try:
+            subprocess.run(
+                ["taskkill", "/PID", str(p.pid), "/T", "/F"],
+                capture_output=True,
+                creationflags=subprocess.CREATE_NO_WINDOW,
+                timeout=timeout,
+            )
+        except Exception:
+            pass
+    else:
+        try:
+            pgid = os.getpgid(p.pid)
+            os.killpg(pgid, signal.SIGTERM)
+            try:
+                p.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                os.killpg(pgid, signal.SIGKILL)
+        except Exception:
+            pass
+
+    try:
+        p.kill()
+        p.wait(timeout=timeout)
+    except Exception:
+        pass
+
+
+def watch_cancel(p, cancel_event, stop_fn, poll=0.1):
+    """
+    Thread que vigila cancel_event mientras p corre y llama stop_fn(p) si se activa
+    (así se cancela aunque el proceso no esté escribiendo nada por stdout).
+    Devuelve un Event que queda activo si se canceló.
+    """
+    cancelled = threading.Event()
+    if cancel_event is None:
+        return cancelled
+
+    def run():
+        while p.poll() is None:
+            if cancel_event.is_set():
+                cancelled.set()
+                stop_fn(p)
+                return
+            try:
+                p.wait(timeout=poll)
+            except subprocess.TimeoutExpired:
+                pass
+
+    threading.Thread(target=run, daemon=True).start()
+    return cancelled
+
+
+def remove_quiet(*paths):
+    """Borra archivos (parciales) ignorando errores."""
+    for path in paths:
+        if not path:
+            continue
+        try:
+            if os.path.exists(path):
+                os.remove(path)
+        except Exception:
+            pass
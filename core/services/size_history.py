@@ -0,0 +1,197 @@
+import json
+import math
+import os
+import threading
+import time
+
+
+class SizeHistoryStore:
+    """
+    Historial local (JSON lines) de cada intento del ladder de Discord y de cada corrida.
+
+    Registros:
+      {"type": "attempt", "features": {...}, "rung": i, "requested_bytes": n,
+       "achieved_bytes": n, "result": "fit" | "over" | "early_abort", "max_bytes": n,
+       "v_scale": x, "wall": s, "time": t}
+      {"type": "run", "features": {...}, "start_rung": i, "first_fit": bool,
+       "predictor": "history" | "sampling" | "none", "time": t}
+
+    Se carga perezoso, se agrega al final del archivo (append) y se compacta a
+    MAX_RECORDS cuando crece de más. Thread-safe (puede haber varias compresiones a la vez).
+    """
+
+    MAX_RECORDS = 5000
+
+    def __init__(self, path):
+        self.path = path
+        self._records = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._records is not None:
+            return
+        records = []
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        pass  # línea cortada (crash a mitad de escritura)
+        except FileNotFoundError:
+            pass
+        except Exception:
+            pass
+        self._records = records[-self.MAX_RECORDS:]
+
+    def records(self, type_=None):
+        with self._lock:
+            self._load()
+            return [r for r in self._records if type_ is None or r.get("type") == type_]
+
+    def add(self, record):
+        record = dict(record, time=record.get("time") or time.time())
+        with self._lock:
+            self._load()
+            self._records.append(record)
+            compact = len(self._records) > self.MAX_RECORDS * 1.2
+            if compact:
+                self._records = self._records[-self.MAX_RECORDS:]
+            try:
+                folder = os.path.dirname(self.path)
+                if folder:
+                    os.makedirs(folder, exist_ok=True)
+                if compact:
+                    tmp = self.path + ".tmp"
+                    with open(tmp, "w", encoding="utf-8") as f:
+                        for r in self._records:
+                            f.write(json.dumps(r) + "\n")
+                    os.replace(tmp, self.path)
+                else:
+                    with open(self.path, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(record) + "\n")
+            except Exception:
+                pass
+
+    def first_attempt_hit_rate(self, last_n=50):
+        """Fracción de corridas (últimas last_n) en las que el primer escalón ya entró."""
+        runs = self.records("run")[-last_n:]
+        if not runs:
+            return None
+        return sum(1 for r in runs if r.get("first_fit")) / len(runs)
+
+
+class SizePredictor:
+    """
+    Predicción a partir del historial:
+    - ratio = achieved_bytes / requested_bytes de cada escalón para contenido parecido
+      (vecinos más cercanos en features), o sea cuánto se pasa / queda corto el encoder.
+    - start_rung: primer escalón que se predice que entra.
+    - v_scale: factor de corrección del bitrate de video para ese escalón (1/ratio, acotado),
+      así el primer intento apunta a lo que el encoder realmente va a producir.
+
+    Features: duración, alto de entrada, fps y src_bpp (bits por pixel del source, proxy
+    barato de complejidad); si hay "complexity" medida, pesa más que src_bpp.
+    """
+
+    MIN_SAMPLES = 3
+    K = 12
+    FIT_MARGIN = 0.97
+    V_SCALE_MIN = 0.6
+    V_SCALE_MAX = 1.1
+
+    def __init__(self, store):
+        self.store = store
+
+    @staticmethod
+    def features(info, duration):
+        """Features de un input a partir de FFmpegService.probe()."""
+        video = info.get("video") or {}
+        width = video.get("width") or 0
+        height = video.get("height") or 0
+        fps = video.get("fps") or 30.0
+        bit_rate = info.get("bit_rate") or video.get("bit_rate")
+        if not bit_rate and info.get("size") and duration:
+            bit_rate = info["size"] * 8 / duration
+        src_bpp = None
+        if bit_rate and width and height and fps:
+            src_bpp = bit_rate / (width * height * fps)
+        return {
+            "duration": duration,
+            "width": width,
+            "height": height,
+            "fps": fps,
+            "src_bps": bit_rate,
+            "src_bpp": src_bpp,
+            "complexity": None,
+        }
+
+    @staticmethod
+    def _log(x, floor=1e-6):
+        return math.log(max(float(x or 0), floor))
+
+    def _distance(self, a, b):
+        d = 0.0
+        if a.get("complexity") is not None and b.get("complexity") is not None:
+            d += 2.0 * abs(a["complexity"] - b["complexity"])
+        elif a.get("src_bpp") and b.get("src_bpp"):
+            d += abs(self._log(a["src_bpp"]) - self._log(b["src_bpp"]))
+        else:
+            d += 1.0
+        d += 0.3 * abs(self._log(a.get("duration")) - self._log(b.get("duration")))
+        d += 0.5 * abs(self._log(a.get("height"), 1) - self._log(b.get("height"), 1))
+        d += 0.3 * abs(self._log(a.get("fps"), 1) - self._log(b.get("fps"), 1))
+        return d
+
+    def rung_ratio(self, features, rung, attempts=None):
+        """(ratio estimado, cantidad de muestras) para un escalón; (None, n) si no alcanza."""
+        if attempts is None:
+            attempts = self.store.records("attempt")
+
+        samples = []
+        for r in attempts:
+            if r.get("rung") != rung or not r.get("requested_bytes") or not r.get("achieved_bytes"):
+                continue
+            ratio = r["achieved_bytes"] / r["requested_bytes"]
+            # early_abort: el tamaño es una proyección, vale menos
+            weight = 0.5 if r.get("result") == "early_abort" else 1.0
+            samples.append((self._distance(features, r.get("features") or {}), ratio, weight))
+
+        if len(samples) < self.MIN_SAMPLES:
+            return None, len(samples)
+
+        samples.sort(key=lambda s: s[0])
+        nearest = samples[:self.K]
+
+        # media geométrica ponderada por cercanía
+        total_w = 0.0
+        acc = 0.0
+        for dist, ratio, weight in nearest:
+            w = weight / (dist + 0.1)
+            acc += w * math.log(max(ratio, 1e-3))
+            total_w += w
+        return math.exp(acc / total_w), len(nearest)
+
+    def predict(self, features, rung_requests, max_bytes):
+        """
+        rung_requests: bytes pedidos por cada escalón (bitrate total * duración / 8).
+        Devuelve (rung_0based, v_scale, predicted_bytes) o None si el historial no alcanza
+        para decidir (conviene el sizing por muestras).
+        """
+        attempts = self.store.records("attempt")
+
+        for rung, requested in enumerate(rung_requests):
+            ratio, _ = self.rung_ratio(features, rung, attempts)
+            if ratio is None:
+                return None
+
+            v_scale = min(self.V_SCALE_MAX, max(self.V_SCALE_MIN, 1.0 / ratio))
+            predicted = int(requested * v_scale * ratio)
+            if predicted <= max_bytes * self.FIT_MARGIN:
+                return rung, v_scale, predicted
+
+        last = len(rung_requests) - 1
+        return last, self.V_SCALE_MIN, None
@@ -0,0 +1,637 @@
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .ffmpeg_service import ChunkJoinError, EncodeCancelled, FFmpegService
+from .process_utils import remove_quiet
+
+
+class TrimService:
+    """
+    Lógica de corte (slice) sin UI: la usan el slicer del GUI, la CLI y el watch mode.
+    El spec de un corte es un dict autocontenido (ver make_spec), así el trabajo
+    se puede encolar / correr en otro thread sin depender de qué esté cargado.
+    """
+
+    MODES = ("reencode", "copy", "smart")
+
+    RESOLUTION_MAP = {
+        '1080p': '1920x1080',
+        '720p': '1280x720',
+        '480p': '854x480',
+        '360p': '640x360'
+    }
+
+    # tope del modo Discord del slicer
+    DISCORD_TARGET_MB = 8.0
+
+    def __init__(self, ff, ffmpeg_path=None):
+        self.ff = ff
+        self.ffmpeg_path = ffmpeg_path or ff._get_ffmpeg_path()
+
+    @staticmethod
+    def calc_discord_bitrates(duration_sec: float, target_mb: float = 8.0):
+        """
+        Calcula bitrates (kbps) para que el output quede <= target_mb.
+        Usamos margen (0.97) para overhead de contenedor/metadatos.
+        """
+        duration_sec = max(0.1, float(duration_sec))
+
+        target_bytes = target_mb * 1024 * 1024 * 0.97
+        total_kbps = int((target_bytes * 8) / duration_sec / 1000)
+
+        if total_kbps <= 160:
+            audio_kbps = 32
+        elif total_kbps <= 260:
+            audio_kbps = 64
+        else:
+            audio_kbps = 96
+
+        video_kbps = max(80, total_kbps - audio_kbps)
+        return video_kbps, audio_kbps, total_kbps
+
+    def rendition_targets(self, spec):
+        """Targets de encode_renditions para las renditions extra del spec (<output>_<name>.mp4)."""
+        duration = spec["end"] - spec["start"]
+        targets = []
+        for r in spec.get("renditions") or []:
+            output = self.ff.rendition_output(spec["output"], r["name"])
+            # con tope de tamaño, preset rápido como el modo Discord
+            preset = "veryfast" if r.get("max_mb") else spec["preset"]
+            targets.append(self.ff.rendition_target(r, output, duration, preset=preset))
+        return targets
+
+    def encode_args(self, spec, cancel_event=None):
+        """
+        Parámetros del encode de un spec re-encode / Discord como target
+        (vf, v_bps, a_bps, channels, preset, constrained, max_bytes), el formato de
+        FFmpegService.encode_chunked / encode_renditions. None para copy / smart-cut.
+        """
+        if spec["discord"]:
+            v_kbps, a_kbps, _ = self.calc_discord_bitrates(
+                spec["end"] - spec["start"], target_mb=self.DISCORD_TARGET_MB
+            )
+            return {
+                "vf": self.discord_vf(spec, v_kbps, cancel_event=cancel_event),
+                "v_bps": v_kbps * 1000, "a_bps": a_kbps * 1000, "channels": 2,
+                "preset": "veryfast", "constrained": True,
+                "max_bytes": int(self.DISCORD_TARGET_MB * 1024 * 1024),
+            }
+        if spec["mode"] in ("copy", "smart"):
+            return None
+
+        resolution = self.RESOLUTION_MAP.get(spec["resolution"], '1280x720')
+        return {
+            "vf": "scale=" + resolution.replace("x", ":"),
+            "v_bps": self.ff.parse_bitrate(spec["bitrate"]),
+            "a_bps": 128_000, "channels": None,
+            "preset": spec["preset"], "constrained": False, "max_bytes": None,
+        }
+
+    def discord_vf(self, spec, v_kbps, cancel_event=None):
+        """
+        Filtro de video del corte para Discord: resolución y fps según la complejidad
+        del tramo (ComplexityService) para el bitrate disponible.
+        Sin análisis (sin NumPy / falló) queda el fijo de siempre: 1280 de ancho a 30 fps.
+        """
+        analysis = self.ff.complexity.analyze(
+            spec["input"], spec["start"], spec["end"], cancel_event=cancel_event
+        )
+        if analysis is None:
+            return "scale=1280:-2,fps=30"
+
+        in_w, in_h = self.ff.probe_resolution(spec["input"])
+        height, fps = self.ff.complexity.plan(analysis, v_kbps * 1000, in_w, in_h, spec["fps"])
+        return f"scale=-2:{height},fps={fps}"
+
+    def resolve_range(self, input_path, start, end, mode="reencode", discord=False,
+                      duration=None, keyframes=None):
+        """
+        Ajusta el rango según el modo. Devuelve (start, end, keyframes):
+        - copy: snap a keyframes (stream copy sólo puede cortar ahí).
+        - smart: keyframes para decidir qué bordes re-encodear.
+        keyframes: lista ya conocida (p.ej. del índice persistente); si no, se probea.
+        Lanza ValueError si el rango no es válido.
+        """
+        if duration is None:
+            duration = self.ff.probe_duration_seconds(input_path)
+        if start < 0 or start >= end or end > duration + 0.001:
+            raise ValueError("Invalid trim times.")
+
+        if discord or mode not in ("copy", "smart"):
+            return start, end, None
+
+        if not keyframes:
+            keyframes = self.ff.probe_keyframes_near(input_path, [start, end])
+
+        if mode == "copy":
+            start, end = self.ff.snap_to_keyframes(keyframes, start, end, duration=duration)
+
+        return start, end, keyframes
+
+    @staticmethod
+    def make_spec(input_path, start, end, output_path, mode="reencode", discord=False,
+                  keyframes=None, fps=None, preset="medium", bitrate="2500k", resolution="720p",
+                  chunked=None, renditions=None):
+        """Lanza ValueError si una rendition pisaría la salida principal o el input."""
+        FFmpegService.rendition_outputs(output_path, renditions or [], reserved=[input_path, output_path])
+        return {
+            "input": input_path,
+            "start": start,
+            "end": end,
+            "output": output_path,
+            "discord": bool(discord),
+            "mode": mode,
+            "keyframes": keyframes,
+            "fps": fps or 30.0,
+            "preset": preset,
+            "bitrate": bitrate,
+            "resolution": resolution,
+            # None: encode por chunks paralelos automático en rangos largos
+            "chunked": chunked,
+            # salidas extra del mismo corte con un solo decode:
+            # [{"name", "resolution", "bitrate", "max_mb"}] -> <output>_<name>.mp4
+            "renditions": list(renditions or []),
+        }
+
+    def run(self, spec, on_progress=None, threads=None, cancel_event=None, on_event=None):
+        """
+        Hace el corte descrito por spec con el runner compartido (FFmpegService.run_ffmpeg).
+        on_event recibe los eventos de progreso estructurados (fps, speed, ...).
+        Devuelve las stats del corte: output, elapsed, realtime y encode_fps
+        (+ renditions: [{name, output, bytes, fits}] si el spec pide salidas extra;
+        + chunk_fallback: motivo si el encode por chunks se descartó y se repitió en un proceso).
+        Lanza RuntimeError si ffmpeg falla y EncodeCancelled si se cancela
+        (en los dos casos las salidas a medio escribir se borran).
+        """
+        try:
+            return self._run(spec, on_progress, threads, cancel_event, on_event)
+        except Exception:
+            remove_quiet(spec["output"], *[t["output"] for t in self.rendition_targets(spec)])
+            raise
+
+    def _run(self, spec, on_progress, threads, cancel_event, on_event):
+        def _set_progress(p):
+            if on_progress:
+                on_progress(float(max(0, min(100, p))))
+
+        start_time, end_time = spec["start"], spec["end"]
+        output_path = spec["output"]
+        segment_duration = end_time - start_time
+        slice_mode = spec["mode"]
+
+        t0 = time.monotonic()
+        encoded_frames = None
+        _set_progress(0)
+
+        # smart-cut: re-encode sólo los GOPs de los bordes, copy en el medio
+        smart_done = False
+        if not spec["discord"] and slice_mode == "smart":
+            smart_done = self.ff.smart_cut(
+                spec["input"], start_time, end_time, output_path,
+                on_progress=_set_progress,
+                keyframes=spec["keyframes"],
+                cancel_event=cancel_event,
+                on_event=on_event
+            )
+
+        cmd = None
+        # mismo encode expresado como target (encode_chunked / encode_renditions)
+        encode_args = None
+        if smart_done:
+            _set_progress(100)
+        elif spec["discord"]:
+            encode_args = self.encode_args(spec, cancel_event=cancel_event)
+            if cancel_event is not None and cancel_event.is_set():
+                raise EncodeCancelled("Encode cancelled")
+            v_kbps, a_kbps = encode_args["v_bps"] // 1000, encode_args["a_bps"] // 1000
+            vf = encode_args["vf"]
+
+            cmd = [
+                self.ffmpeg_path, "-y",
+                "-ss", str(start_time), "-to", str(end_time),
+                "-i", spec["input"],
+
+                "-vf", vf,
+                "-c:v", "libx264",
+                "-pix_fmt", "yuv420p",
+                "-preset", "veryfast",
+                "-b:v", f"{v_kbps}k",
+                "-maxrate", f"{v_kbps}k",
+                "-bufsize", f"{max(v_kbps * 2, 200)}k",
+
+                "-c:a", "aac",
+                "-b:a", f"{a_kbps}k",
+                "-ac", "2",
+
+                "-movflags", "+faststart",
+                "-progress", "pipe:1",
+                "-nostats",
+            ]
+        elif slice_mode == "copy":
+            cmd = [
+                self.ffmpeg_path, "-y",
+                "-ss", str(start_time),
+                "-i", spec["input"],
+                "-t", str(segment_duration),
+
+                "-map", "0:v?",
+                "-map", "0:a?",
+                "-c", "copy",
+                "-avoid_negative_ts", "make_zero",
+
+                "-movflags", "+faststart",
+                "-progress", "pipe:1",
+                "-nostats",
+            ]
+        else:
+            resolution = self.RESOLUTION_MAP.get(spec["resolution"], '1280x720')
+            # también el fallback de smart-cut (source no H.264 / rango sin GOP completo)
+            encode_args = self.encode_args(dict(spec, mode="reencode"))
+
+            cmd = [
+                self.ffmpeg_path, "-y",
+                "-ss", str(start_time), "-to", str(end_time),
+                "-i", spec["input"],
+
+                "-c:v", "libx264",
+                "-preset", spec["preset"],
+                "-b:v", spec["bitrate"],
+                "-s", resolution,
+
+                "-c:a", "aac",
+                "-b:a", "128k",
+
+                "-movflags", "+faststart",
+                "-progress", "pipe:1",
+                "-nostats",
+            ]
+
+        extra_targets = self.rendition_targets(spec)
+        rendition_results = None
+        chunk_fallback = None
+
+        chunked = spec.get("chunked")
+        if chunked is None:
+            chunked = self.ff.should_chunk(segment_duration, threads)
+
+        if cmd and encode_args and encode_args["v_bps"] and extra_targets:
+            # salida principal + renditions con un solo decode
+            results = self.ff.encode_renditions(
+                spec["input"], start_time, end_time,
+                [dict(encode_args, name=None, output=output_path)] + extra_targets,
+                threads=threads, on_progress=_set_progress, on_event=on_event,
+                cancel_event=cancel_event
+            )
+            rendition_results = results[1:]
+            cmd = None
+        elif cmd and encode_args and encode_args["v_bps"] and chunked:
+            audio_args = ["-c:a", "aac", "-b:a", str(encode_args["a_bps"])]
+            if encode_args["channels"]:
+                audio_args += ["-ac", str(encode_args["channels"])]
+            try:
+                result = self.ff.encode_chunked(
+                    spec["input"], output_path, start_time, end_time,
+                    encode_args["vf"], encode_args["v_bps"], audio_args,
+                    preset=encode_args["preset"], constrained=encode_args["constrained"],
+                    threads=threads, on_progress=_set_progress, on_event=on_event,
+                    cancel_event=cancel_event
+                )
+                encoded_frames = result["frames"]
+                cmd = None
+            except ChunkJoinError as e:
+                # uniones no continuas: se repite con un solo proceso
+                chunk_fallback = str(e)
+
+        if cmd:
+            # el scheduler reparte los cores entre los encodes activos
+            if threads and slice_mode != "copy":
+                cmd += ["-threads", str(threads)]
+            cmd.append(output_path)
+            result = self.ff.run_ffmpeg(
+                cmd, segment_duration,
+                on_progress=_set_progress, on_event=on_event, cancel_event=cancel_event
+            )
+            encoded_frames = result["frames"]
+
+        if extra_targets and rendition_results is None:
+            # la principal fue copy / smart-cut: las renditions van juntas en otro ffmpeg
+            rendition_results = self.ff.encode_renditions(
+                spec["input"], start_time, end_time, extra_targets,
+                threads=threads, on_progress=_set_progress, on_event=on_event,
+                cancel_event=cancel_event
+            )
+
+        elapsed = max(time.monotonic() - t0, 1e-6)
+        realtime = segment_duration / elapsed
+        stats = {
+            "output": output_path,
+            "elapsed": elapsed,
+            "realtime": realtime,
+            # smart-cut son varios procesos: frames estimados por el fps del source
+            "encode_fps": (encoded_frames / elapsed) if encoded_frames else realtime * spec["fps"],
+        }
+        if rendition_results is not None:
+            stats["renditions"] = rendition_results
+        if chunk_fallback is not None:
+            stats["chunk_fallback"] = chunk_fallback
+        return stats
+
+    # -------------------- batch (varios rangos de un mismo archivo) --------------------
+
+    # rangos más cerca que esto van en la misma pasada: decodificar el hueco
+    # sale más barato que otro seek + arranque de ffmpeg
+    BATCH_GAP_SEC = 30.0
+    # encoders por pasada (cada uno suma memoria y se reparte los threads)
+    BATCH_MAX_OUTPUTS = 6
+
+    _TIME = r"\d+(?::\d+){0,2}(?:\.\d+)?"
+    _TIME_RE = re.compile(_TIME)
+    # "inicio-fin" en un solo campo (el token entero, sin signo adelante)
+    _SPAN_RE = re.compile(rf"({_TIME})-({_TIME})")
+    _FIELD_SEP_RE = re.compile(r"[,;\s]+")
+
+    @classmethod
+    def parse_time(cls, text):
+        """'75' / '75.5' / '1:15' / '00:01:15.5' -> segundos. Lanza ValueError."""
+        text = str(text).strip()
+        if not cls._TIME_RE.fullmatch(text):
+            raise ValueError(f"Invalid time: {text!r}")
+        seconds = 0.0
+        for part in text.split(":"):
+            seconds = seconds * 60 + float(part)
+        return seconds
+
+    @classmethod
+    def parse_ranges(cls, text):
+        """
+        Rangos de un texto / CSV: una línea por rango con inicio y fin
+        ("10,25", "1:00 1:30", "00:01:00-00:01:30", columnas extra se ignoran).
+        Se saltean líneas vacías, comentarios (#) y un encabezado sin números.
+        Cada tiempo tiene que ser el token entero ("-5-10" o "5s" son error, no se
+        rescata el número de adentro).
+        Devuelve [(start, end)] sin duplicados; lanza ValueError con el número de línea.
+        """
+        ranges = []
+        for lineno, line in enumerate(text.splitlines(), 1):
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            if not ranges and not any(c.isdigit() for c in line):
+                continue  # encabezado (start,end)
+
+            # un "-" suelto ("1:00 - 1:30") es separador
+            fields = [f for f in cls._FIELD_SEP_RE.split(line) if f and f != "-"]
+            span = cls._SPAN_RE.fullmatch(fields[0]) if fields else None
+            tokens = list(span.groups()) if span else fields[:2]
+            try:
+                times = [cls.parse_time(t) for t in tokens]
+            except ValueError as e:
+                raise ValueError(f"Line {lineno}: {e}")
+            if len(times) < 2:
+                raise ValueError(f"Line {lineno}: expected start and end")
+            start, end = times
+            if end <= start:
+                raise ValueError(f"Line {lineno}: end must be after start")
+            if (start, end) not in ranges:
+                ranges.append((start, end))
+        return ranges
+
+    @classmethod
+    def load_ranges(cls, path):
+        with open(path, "r", encoding="utf-8-sig") as f:
+            return cls.parse_ranges(f.read())
+
+    @staticmethod
+    def _fmt_time(t):
+        return f"{t:.3f}".rstrip("0").rstrip(".").replace(".", "_")
+
+    @classmethod
+    def range_output_path(cls, input_path, start, end, out_dir=None):
+        """Nombre determinístico: <base>_<start>-<end>.mp4 (en out_dir o al lado del input)."""
+        base = os.path.splitext(os.path.basename(input_path))[0]
+        folder = out_dir or os.path.dirname(os.path.abspath(input_path))
+        return os.path.join(folder, f"{base}_{cls._fmt_time(start)}-{cls._fmt_time(end)}.mp4")
+
+    def make_batch(self, input_path, ranges, out_dir=None, mode="reencode", discord=False,
+                   duration=None, keyframes=None, fps=None, preset="medium", bitrate="2500k",
+                   resolution="720p", renditions=None):
+        """
+        Specs (ver make_spec) para cortar varios rangos de un mismo archivo, con salida
+        <base>_<start>-<end>.mp4 (tiempos ya ajustados, p.ej. a keyframes en copy).
+        Lanza ValueError si algún rango no es válido.
+        """
+        if duration is None:
+            duration = self.ff.probe_duration_seconds(input_path)
+
+        specs = []
+        outputs = set()
+        for start, end in ranges:
+            start, end, kfs = self.resolve_range(
+                input_path, start, end, mode=mode, discord=discord,
+                duration=duration, keyframes=keyframes
+            )
+            output_path = self.range_output_path(input_path, start, end, out_dir)
+            if output_path in outputs:
+                continue  # dos rangos que terminaron en el mismo corte (snap a keyframes)
+            outputs.add(output_path)
+            specs.append(self.make_spec(
+                input_path, start, end, output_path, mode=mode, discord=discord,
+                keyframes=kfs, fps=fps, preset=preset, bitrate=bitrate, resolution=resolution,
+                renditions=renditions
+            ))
+        return specs
+
+    def _one_pass(self, spec):
+        """Si el spec puede ir en una pasada compartida (re-encode / Discord, sin extras)."""
+        if spec.get("renditions"):
+            return False
+        if not spec["discord"] and spec["mode"] != "reencode":
+            return False
+        # un rango largo solo aprovecha mejor los cores con chunks (run)
+        return not self.ff.should_chunk(spec["end"] - spec["start"])
+
+    def group_specs(self, specs):
+        """
+        Agrupa los rangos: los re-encode cercanos (hueco <= BATCH_GAP_SEC) van juntos en
+        una pasada; el resto (copy / smart-cut / lejanos / largos) queda de a uno.
+        """
+        groups = []
+        current = None
+        current_end = None
+        for spec in sorted((s for s in specs if self._one_pass(s)), key=lambda s: s["start"]):
+            if (current is not None and spec["start"] - current_end <= self.BATCH_GAP_SEC
+                    and len(current) < self.BATCH_MAX_OUTPUTS):
+                current.append(spec)
+                current_end = max(current_end, spec["end"])
+            else:
+                current = [spec]
+                current_end = spec["end"]
+                groups.append(current)
+
+        groups += [[s] for s in specs if not self._one_pass(s)]
+        return groups
+
+    def run_batch(self, specs, on_progress=None, threads=None, cancel_event=None, on_event=None):
+        """
+        Exporta todos los rangos (specs de un mismo input, ver make_batch):
+        - grupos de rangos cercanos en una sola pasada sobre el input (un decode,
+          trim + un encoder por rango, ver _run_group),
+        - grupos lejanos entre sí en paralelo (cada uno su ffmpeg, threads repartidos).
+        Un rango que falla no frena a los demás. Si se cancela, los cortes ya terminados
+        quedan, los parciales se borran y se lanza EncodeCancelled.
+
+        Devuelve stats: outputs ([{output, start, end, ok, error}] en el orden de specs),
+        done, failed, groups, elapsed, realtime y encode_fps.
+        """
+        groups = self.group_specs(specs)
+        cores = threads or os.cpu_count() or 2
+        workers = max(1, min(len(groups), cores // 2))
+        group_threads = max(1, cores // workers)
+
+        weights = [sum(s["end"] - s["start"] for s in g) for g in groups]
+        total_weight = max(sum(weights), 0.001)
+        progress = [0.0] * len(groups)
+        alive = set(range(len(groups)))
+        lock = threading.Lock()
+
+        def progress_cb(gi):
+            def cb(pct):
+                with lock:
+                    progress[gi] = float(pct)
+                    total = sum(p * w for p, w in zip(progress, weights)) / total_weight
+                if on_progress:
+                    on_progress(total)
+            return cb
+
+        def event_cb(gi):
+            # eventos (fps / speed / eta) del primer grupo que sigue corriendo
+            def cb(event):
+                with lock:
+                    visible = gi == min(alive) if alive else False
+                if on_event and visible:
+                    on_event(event)
+            return cb
+
+        results = {}
+
+        def run_group(gi, group):
+            try:
+                if len(group) == 1:
+                    self.run(group[0], on_progress=progress_cb(gi), threads=group_threads,
+                             cancel_event=cancel_event, on_event=event_cb(gi))
+                    return {group[0]["output"]: None}
+                return self._run_group(group, progress_cb(gi), group_threads, cancel_event, event_cb(gi))
+            finally:
+                with lock:
+                    alive.discard(gi)
+
+        t0 = time.monotonic()
+        if on_progress:
+            on_progress(0.0)
+
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            futures = {ex.submit(run_group, gi, g): g for gi, g in enumerate(groups)}
+            for fut, group in futures.items():
+                try:
+                    results.update(fut.result())
+                except EncodeCancelled:
+                    pass
+                except Exception as e:
+                    for spec in group:
+                        results[spec["output"]] = str(e)
+
+        if cancel_event is not None and cancel_event.is_set():
+            raise EncodeCancelled("Encode cancelled")
+
+        outputs = [{
+            "output": s["output"],
+            "start": s["start"],
+            "end": s["end"],
+            "ok": results.get(s["output"], "not run") is None,
+            "error": results.get(s["output"], "not run"),
+        } for s in specs]
+
+        elapsed = max(time.monotonic() - t0, 1e-6)
+        realtime = sum(weights) / elapsed
+        return {
+            "outputs": outputs,
+            "done": sum(1 for o in outputs if o["ok"]),
+            "failed": sum(1 for o in outputs if not o["ok"]),
+            "groups": len(groups),
+            "elapsed": elapsed,
+            "realtime": realtime,
+            "encode_fps": realtime * (specs[0]["fps"] if specs else 30.0),
+        }
+
+    def _run_group(self, group, on_progress, threads, cancel_event, on_event):
+        """
+        Una pasada sobre [primer inicio, último fin] del input: split del video (y del
+        audio) a una rama trim/atrim + filtros por rango, un encoder por salida.
+        Devuelve {output: None (ok) | error}. Los cortes Discord que se pasan del tope
+        se repiten de a uno con el bitrate corregido.
+        Si el ffmpeg del grupo falla o se cancela, borra todas las salidas del grupo
+        (un solo proceso las escribe a la vez: ninguna quedó completa) y propaga.
+        """
+        input_path = group[0]["input"]
+        g_start = min(s["start"] for s in group)
+        g_end = max(s["end"] for s in group)
+
+        targets = [dict(self.encode_args(s, cancel_event=cancel_event), output=s["output"]) for s in group]
+        if cancel_event is not None and cancel_event.is_set():
+            raise EncodeCancelled("Encode cancelled")
+
+        try:
+            has_audio = self.ff.probe(input_path)["audio"] is not None
+        except RuntimeError:
+            has_audio = False
+
+        n = len(group)
+        # rama extra sin trim -> salida null: los outputs arrancan en 0 (setpts), así que
+        # el out_time de -progress sólo sigue la posición en el input gracias a ésta
+        graph = [f"[0:v:0]split={n + 1}" + "".join(f"[s{i}]" for i in range(n)) + "[pos]"]
+        if has_audio:
+            graph.append(f"[0:a:0]asplit={n}" + "".join(f"[as{i}]" for i in range(n)))
+        for i, (spec, t) in enumerate(zip(group, targets)):
+            a, b = spec["start"] - g_start, spec["end"] - g_start
+            graph.append(f"[s{i}]trim=start={a:.6f}:end={b:.6f},setpts=PTS-STARTPTS,{t['vf']}[v{i}]")
+            if has_audio:
+                graph.append(f"[as{i}]atrim=start={a:.6f}:end={b:.6f},asetpts=PTS-STARTPTS[a{i}]")
+
+        cmd = [
+            self.ffmpeg_path, "-y", "-loglevel", "error",
+            "-ss", f"{g_start:.6f}", "-to", f"{g_end:.6f}",
+            "-i", input_path,
+            "-filter_complex", ";".join(graph),
+            "-progress", "pipe:1", "-nostats",
+        ]
+        per_output_threads = max(1, threads // n)
+        for i, t in enumerate(targets):
+            cmd += ["-map", f"[v{i}]"]
+            if has_audio and t["a_bps"]:
+                cmd += ["-map", f"[a{i}]"]
+            cmd += self.ff.target_encode_args(t, per_output_threads, audio=has_audio)
+        cmd += ["-map", "[pos]", "-f", "null", "-"]
+
+        try:
+            self.ff.run_ffmpeg(cmd, g_end - g_start, on_progress=on_progress, on_event=on_event,
+                               cancel_event=cancel_event)
+        except Exception:
+            remove_quiet(*[t["output"] for t in targets])
+            raise
+
+        results = {}
+        for spec, t in zip(group, targets):
+            size = os.path.getsize(t["output"]) if os.path.exists(t["output"]) else 0
+            if size == 0:
+                results[t["output"]] = "empty output"
+            elif t["max_bytes"] and size > t["max_bytes"]:
+                retry = dict(t, v_bps=int(t["v_bps"] * t["max_bytes"] / size * 0.95), retry=False)
+                r = self.ff.encode_renditions(input_path, spec["start"], spec["end"], [retry],
+                                              threads=threads, cancel_event=cancel_event)[0]
+                results[t["output"]] = None if r["fits"] else "over size limit"
+            else:
+                results[t["output"]] = None
+        return results
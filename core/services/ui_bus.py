@@ -0,0 +1,61 @@
+import threading
+
+
+class UIUpdateBus:
+    """
+    Bus de actualizaciones de UI con "slots" por nombre.
+    Los workers escriben el último valor (post) desde cualquier thread y un único
+    pump en el hilo de Tk, a tasa fija, aplica sólo el valor más nuevo de cada slot.
+    Así la cola de Tk no crece aunque ffmpeg / yt-dlp escupan cientos de líneas.
+    """
+
+    def __init__(self, root, hz=60):
+        self.root = root
+        self.interval_ms = max(1, int(1000 / hz))
+
+        self._handlers = {}
+        self._slots = {}
+        self._lock = threading.Lock()
+        self._after_id = None
+
+    def register(self, name, handler):
+        """handler(value) se ejecuta en el hilo de UI con el último valor del slot."""
+        self._handlers[name] = handler
+
+    def post(self, name, value):
+        """
+        Thread-safe. Pisa el valor pendiente del slot (latest wins).
+        Devuelve True si reemplazó un valor que todavía no se había aplicado.
+        """
+        with self._lock:
+            replaced = name in self._slots
+            self._slots[name] = value
+        return replaced
+
+    def start(self):
+        if self._after_id is None:
+            self._after_id = self.root.after(self.interval_ms, self._tick)
+
+    def stop(self):
+        if self._after_id is not None:
+            try:
+                self.root.after_cancel(self._after_id)
+            except Exception:
+                pass
+            self._after_id = None
+
+    def _tick(self):
+        with self._lock:
+            pending = self._slots
+            self._slots = {}
+
+        for name, value in pending.items():
+            handler = self._handlers.get(name)
+            if handler is None:
+                continue
+            try:
+                handler(value)
+            except Exception:
+                pass
+
+        self._after_id = self.root.after(self.interval_ms, self._tick)
@@ -0,0 +1,242 @@
+import fnmatch
+import json
+import os
+import threading
+import time
+
+from .media_cache import cache_key
+
+
+class WatchFolderService:
+    """
+    Watch mode: comprime para Discord cada MP4 nuevo que aparece en una carpeta.
+
+    - Polling con os.scandir (sin dependencias): un archivo se considera completo
+      cuando tamaño y mtime no cambian durante stable_polls pasadas seguidas y se
+      puede abrir (en Windows, además, renombrarlo sobre sí mismo falla mientras
+      otro proceso lo tiene abierto para escribir).
+    - Los encodes van al JobScheduler compartido (pool acotado de encodes).
+    - Ledger JSON en disco con lo ya procesado (clave = cache_key: ruta+tamaño+mtime),
+      así un reinicio no repite trabajo y un archivo reemplazado se vuelve a procesar.
+      Los cancelados no se registran: se saltean hasta reiniciar (o hasta que el archivo cambie).
+    - on_event(kind, path, info) avisa de "queued" / "done" / "failed" / "cancelled"
+      (lo usa la UI o la CLI para mostrar qué está pasando).
+    """
+
+    PATTERN = "*.mp4"
+    # salidas propias / temporales: nunca se re-comprimen
+    SKIP_SUFFIXES = ("_discord10mb.mp4", ".tmp.mp4")
+    LEDGER_NAME = ".halfslice_watch.json"
+
+    def __init__(self, ff, jobs, folder, out_dir=None, ledger_path=None, interval=2.0,
+                 stable_polls=2, max_bytes=10 * 1024 * 1024, parallel_attempts=1, on_event=None):
+        self.ff = ff
+        self.jobs = jobs
+        self.folder = os.path.abspath(folder)
+        self.out_dir = out_dir or None
+        self.ledger_path = ledger_path or os.path.join(self.folder, self.LEDGER_NAME)
+        self.interval = interval
+        self.stable_polls = max(1, int(stable_polls))
+        self.max_bytes = max_bytes
+        self.parallel_attempts = parallel_attempts
+        self.on_event = on_event
+
+        self._seen = {}        # path -> (size, mtime_ns, pasadas estables)
+        self._pending = {}     # path -> job
+        self._ledger = {}
+        self._cancelled = set()   # cache_keys cancelados en esta sesión
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    # -------------------- start / stop --------------------
+
+    @property
+    def running(self):
+        t = self._thread
+        return t is not None and t.is_alive()
+
+    def start(self):
+        if not os.path.isdir(self.folder):
+            raise RuntimeError(f"Watch folder does not exist: {self.folder}")
+        if self.running:
+            return
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self, cancel_jobs=False, timeout=2.0):
+        """Deja de mirar la carpeta. Con cancel_jobs también cancela los encodes encolados/en curso."""
+        self._stop_event.set()
+        t = self._thread
+        if t is not None and t is not threading.current_thread():
+            t.join(timeout)
+        self._thread = None
+
+        if cancel_jobs:
+            with self._lock:
+                pending = list(self._pending.values())
+            for job in pending:
+                self.jobs.cancel(job.id)
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending)
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.scan()
+            except Exception as e:
+                self._emit("error", self.folder, {"error": str(e)})
+            self._stop_event.wait(self.interval)
+
+    # -------------------- ledger --------------------
+
+    def _load_ledger(self):
+        try:
+            with open(self.ledger_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                with self._lock:
+                    self._ledger = data
+        except FileNotFoundError:
+            pass
+        except Exception:
+            # ledger corrupto: no frenamos el watch por eso
+            pass
+
+    def _record(self, key, entry):
+        with self._lock:
+            self._ledger[key] = entry
+            data = dict(self._ledger)
+        try:
+            tmp = self.ledger_path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp, self.ledger_path)
+        except Exception:
+            pass
+
+    def is_processed(self, path):
+        try:
+            key = cache_key(path)
+        except OSError:
+            return False
+        with self._lock:
+            return key in self._ledger or key in self._cancelled
+
+    # -------------------- scan --------------------
+
+    def _is_candidate(self, name):
+        lower = name.lower()
+        if name.startswith(".") or lower.endswith(self.SKIP_SUFFIXES):
+            return False
+        return fnmatch.fnmatch(lower, self.PATTERN)
+
+    @staticmethod
+    def _can_open(path):
+        try:
+            with open(path, "rb"):
+                pass
+            if os.name == "nt":
+                # falla si otro proceso lo tiene abierto sin FILE_SHARE_DELETE (sigue escribiendo)
+                os.rename(path, path)
+            return True
+        except OSError:
+            return False
+
+    def scan(self):
+        """Una pasada: actualiza la estabilidad de cada MP4 y encola los que ya están completos."""
+        self._load_ledger()
+
+        present = set()
+        with os.scandir(self.folder) as it:
+            for entry in it:
+                if not entry.is_file() or not self._is_candidate(entry.name):
+                    continue
+                path = entry.path
+                present.add(path)
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+
+                prev = self._seen.get(path)
+                if prev and prev[0] == st.st_size and prev[1] == st.st_mtime_ns and st.st_size > 0:
+                    stable = prev[2] + 1
+                else:
+                    stable = 0
+                self._seen[path] = (st.st_size, st.st_mtime_ns, stable)
+
+                if stable < self.stable_polls:
+                    continue
+
+                with self._lock:
+                    if path in self._pending:
+                        continue
+                if self.is_processed(path) or not self._can_open(path):
+                    continue
+
+                self._submit(path)
+
+        # archivos borrados: olvidar su estado de estabilidad
+        for path in list(self._seen):
+            if path not in present:
+                del self._seen[path]
+
+    # -------------------- jobs --------------------
+
+    def _emit(self, kind, path, info=None):
+        if self.on_event:
+            try:
+                self.on_event(kind, path, info or {})
+            except Exception:
+                pass
+
+    def _submit(self, path):
+        key = cache_key(path)
+
+        def work(job):
+            return self.ff.compress_to_discord_10mb(
+                path,
+                self.out_dir,
+                max_bytes=self.max_bytes,
+                on_progress=job.set_progress,
+                on_status=job.set_status,
+                parallel_attempts=self.parallel_attempts,
+                cancel_event=job.cancel_event,
+                on_event=job.on_event,
+                on_stats=job.set_stats,
+                threads=job.threads,
+            )
+
+        def on_done(job):
+            with self._lock:
+                self._pending.pop(path, None)
+
+            entry = {"path": path, "time": time.time(), "state": job.state}
+            if job.state == "done":
+                ok, output_path, size_mb = job.result
+                entry.update({
+                    "fits": ok,
+                    "output": output_path if ok else None,
+                    "size_mb": round(size_mb, 3),
+                    "realtime": (job.stats or {}).get("realtime"),
+                })
+            elif job.state == "failed":
+                entry["error"] = str(job.error)
+            else:
+                # cancelado: no queda en el ledger (se reintenta al reiniciar)
+                with self._lock:
+                    self._cancelled.add(key)
+                self._emit("cancelled", path)
+                return
+
+            self._record(key, entry)
+            self._emit(job.state, path, entry)
+
+        with self._lock:
+            job = self.jobs.submit("compress", os.path.basename(path), work, on_done=on_done)
+            self._pending[path] = job
+        self._emit("queued", path, {"job": job.id})
@@ -3,6 +3,18 @@ import re
 import subprocess
 import sys
 
+from .process_utils import (
+    kill_process_tree,
+    merge_popen_kwargs,
+    process_group_kwargs,
+    remove_quiet,
+    watch_cancel,
+)
+
+
+class DownloadCancelled(RuntimeError):
+    """La descarga se canceló desde afuera (cancel_event)."""
+
 
 class YouTubeService:
     def __init__(self, ytdlp_path=None):
@@ -96,7 +108,16 @@ class YouTubeService:
         quality: str = "720p",
         output_type: str = "mp4",  # "mp4" | "mp3"
         progress_hook=None,
-    ) -> bool:
+        cancel_event=None,
+    ):
+        """
+        Descarga con yt-dlp. Devuelve el path del archivo final (sacado del output de
+        yt-dlp; None si no se pudo detectar). Sin estado en el service: puede haber
+        varias descargas a la vez.
+        Si cancel_event se activa, mata el árbol de procesos
+        (yt-dlp + el ffmpeg que lanza para el merge/extract), borra los parciales
+        (.part / .ytdl / destinos a medio escribir) y lanza DownloadCancelled.
+        """
         os.makedirs(out_dir, exist_ok=True)
 
         base = self._resolve_base_dir()
@@ -148,15 +169,26 @@ class YouTubeService:
             text=True,
             bufsize=1,
             universal_newlines=True,
-            **self._popen_no_window_kwargs(),
+            **merge_popen_kwargs(self._popen_no_window_kwargs(), process_group_kwargs()),
         )
 
+        cancelled = watch_cancel(process, cancel_event, kill_process_tree)
+        # archivos que escribe ESTA descarga (para limpiar si se cancela)
+        written = []
+
         # leer output (sirve para progreso y para debug si falla)
+        output_path = None
         last_lines = []
         for line in process.stdout:
             if progress_hook:
                 progress_hook(line)
 
+            out_path = self.parse_output_path(line)
+            if out_path:
+                output_path = out_path
+                if "has already been downloaded" not in line:
+                    written.append(out_path)
+
             # guardamos últimas líneas por si falla (muy útil)
             last_lines.append(line.rstrip("\n"))
             if len(last_lines) > 25:
@@ -164,12 +196,39 @@ class YouTubeService:
 
         process.wait()
 
+        if cancelled.is_set():
+            for path in written:
+                if not os.path.isabs(path):
+                    path = os.path.join(base, path)
+                remove_quiet(path, path + ".part", path + ".ytdl")
+            raise DownloadCancelled("Download cancelled")
+
         if process.returncode != 0:
             # tiramos error detallado para que tu UI lo muestre si querés
             detalle = "\n".join(last_lines).strip() or "yt-dlp falló sin salida."
             raise RuntimeError(detalle)
 
-        return True
+        if output_path and not os.path.isabs(output_path):
+            output_path = os.path.join(base, output_path)
+        return output_path
+
+    @staticmethod
+    def parse_output_path(line: str):
+        """
+        Ruta del archivo que yt-dlp está generando, según la línea de output.
+        La última que aparece (merge / extract audio) es el archivo final.
+        """
+        line = line.strip()
+        m = re.search(r'\[Merger\] Merging formats into "(.+)"$', line)
+        if m:
+            return m.group(1)
+        m = re.search(r"\[(?:download|ExtractAudio)\] Destination: (.+)$", line)
+        if m:
+            return m.group(1)
+        m = re.search(r"\[download\] (.+) has already been downloaded", line)
+        if m:
+            return m.group(1)
+        return None
 
     @staticmethod
     def parse_progress_percent(line: str):
@@ -1,8 +1,9 @@
+import os
 import tkinter as tk
 from tkinter import filedialog, messagebox
 
+from ..services.watch_service import WatchFolderService
 from .ui_helpers import build_tab_canvas, add_bottom_right_icons
-from ..services.ffmpeg_service import FFmpegService
 
 
 class DiscordTab:
@@ -11,9 +12,15 @@ class DiscordTab:
     def __init__(self, app, notebook):
         self.app = app
         self.frame = tk.Frame(notebook)
-        self.ff = FFmpegService(app.get_path)
+        self.ff = app.ffmpeg_service
+        self.watch_service = None
         self._build()
 
+        # watch mode: si quedó activo en la sesión anterior, retomarlo
+        folder = self.app.configuration.get("watch_folder")
+        if self.app.configuration.get("watch_enabled") and folder and os.path.isdir(folder):
+            self._start_watch(folder)
+
     def set_mute_icon(self, img):
         if getattr(self, "btn_mute", None):
             self.btn_mute.config(image=img)
@@ -37,6 +44,13 @@ class DiscordTab:
 
         tk.Button(canvas, text="Compress to 10MB", command=self.compress, width=25).place(x=35, y=195)
 
+        # watch mode: comprime solo cada MP4 nuevo de una carpeta
+        self.btn_watch = tk.Button(canvas, text="Watch folder...", command=self.toggle_watch, width=25)
+        self.btn_watch.place(x=35, y=235)
+        self.lbl_watch = tk.Label(canvas, text="", bg="#000000", fg="white", font=("Arial", 8))
+        canvas.create_window(130, 280, window=self.lbl_watch)
+        self.app.ui.bus.register("watch.status", lambda text: self.lbl_watch.config(text=text))
+
         self.btn_mute = add_bottom_right_icons(self.app, canvas, prefix="discord")
 
     def browse_mp4(self):
@@ -53,6 +67,65 @@ class DiscordTab:
             self.entry_out.delete(0, tk.END)
             self.entry_out.insert(0, folder)
 
+    # -------------------- watch mode --------------------
+
+    def toggle_watch(self):
+        self.app.soundmanager.play_sound("button")
+
+        if self.watch_service is not None and self.watch_service.running:
+            self.stop_watch()
+            self.app.configuration["watch_enabled"] = False
+            self.app.save_configuration()
+            return
+
+        folder = filedialog.askdirectory(initialdir=self.app.configuration.get("watch_folder") or None)
+        if not folder:
+            return
+        self._start_watch(folder)
+        self.app.configuration["watch_folder"] = folder
+        self.app.configuration["watch_enabled"] = True
+        self.app.save_configuration()
+
+    def _start_watch(self, folder):
+        out_dir = self.entry_out.get().strip() or None
+        if out_dir and not os.path.isdir(out_dir):
+            out_dir = None
+
+        self.watch_service = WatchFolderService(
+            self.ff, self.app.jobs, folder,
+            out_dir=out_dir,
+            parallel_attempts=self.app.configuration.get("discord_parallel_attempts", 1),
+            on_event=self._on_watch_event,
+        )
+        try:
+            self.watch_service.start()
+        except Exception as e:
+            self.watch_service = None
+            messagebox.showerror("Error", str(e))
+            return
+
+        self.btn_watch.config(text="Stop watching")
+        self.app.ui.bus.post("watch.status", f"Watching {os.path.basename(folder) or folder}")
+
+    def stop_watch(self):
+        if self.watch_service is not None:
+            self.watch_service.stop()
+        self.watch_service = None
+        self.btn_watch.config(text="Watch folder...")
+        self.app.ui.bus.post("watch.status", "")
+
+    def _on_watch_event(self, kind, path, info):
+        """Desde el thread del watch / scheduler: sólo postea el estado al bus."""
+        service = self.watch_service
+        if service is None:
+            return
+        folder = os.path.basename(service.folder) or service.folder
+        text = f"Watching {folder} · {kind}: {os.path.basename(path)}"
+        pending = service.pending_count()
+        if pending:
+            text += f" · {pending} pending"
+        self.app.ui.bus.post("watch.status", text)
+
     def compress(self):
         self.app.soundmanager.play_sound("button")
 
@@ -63,36 +136,36 @@ class DiscordTab:
             messagebox.showerror("Error", "Elegí un MP4 válido primero.")
             return
 
-        self.app.ui.show_loading("Compressing for Discord...", "Compressing for Discord...")
-        self.app.ui.set_progress(0)
-
-        def worker():
-            try:
-                ok, output_path, size_mb = self.ff.compress_to_discord_10mb(
-                    input_path,
-                    out_dir if out_dir else None,
-                    on_progress=self.app.ui.set_progress,
-                    on_status=self.app.ui.set_status_text
-                )
-
-                def done():
-                    self.app.ui.hide_loading()
+        parallel_attempts = self.app.configuration.get("discord_parallel_attempts", 1)
+
+        def work(job):
+            return self.ff.compress_to_discord_10mb(
+                input_path,
+                out_dir if out_dir else None,
+                on_progress=job.set_progress,
+                on_status=job.set_status,
+                parallel_attempts=parallel_attempts,
+                cancel_event=job.cancel_event,
+                on_event=job.on_event,
+                on_stats=job.set_stats,
+                threads=job.threads,
+            )
+
+        def done(job):
+            def _u():
+                if job.state == "done":
+                    ok, output_path, size_mb = job.result
                     if ok:
                         self.app.soundmanager.play_sound("success")
-                        messagebox.showinfo("Done", f"Listo \n{output_path}\nSize: {size_mb:.2f} MB")
+                        speed = ""
+                        if job.stats and job.stats.get("realtime"):
+                            speed = f"\nSpeed: {job.stats['realtime']:.2f}x realtime"
+                        messagebox.showinfo("Done", f"Listo \n{output_path}\nSize: {size_mb:.2f} MB{speed}")
                     else:
                         messagebox.showerror("Error", "No pude bajarlo a 10MB con los límites actuales.")
+                elif job.state == "failed":
+                    messagebox.showerror("Error", f"Falló la compresión: {job.error}")
+            self.app.ui.run_on_ui(_u)
 
-                self.app.ui.run_on_ui(done)
-
-            except Exception as e:
-                err = str(e)
-                self.app.ui.run_on_ui(
-                    lambda err=err: (
-                        self.app.ui.hide_loading(),
-                        messagebox.showerror("Error", f"Falló la compresión: {err}")
-                    )
-                )
-
-        import threading
-        threading.Thread(target=worker, daemon=True).start()
+        self.app.jobs.submit("compress", os.path.basename(input_path), work, on_done=done)
+        self.app.show_jobs()
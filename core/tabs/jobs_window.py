@@ -0,0 +1,101 @@
+import tkinter as tk
+from tkinter import ttk
+
+
+class JobsWindow:
+    """Vista de la cola del JobScheduler (no modal): estado y progreso de cada job."""
+
+    KIND_LABELS = {
+        "slice": "Slice",
+        "compress": "Discord",
+        "download": "YouTube",
+    }
+
+    def __init__(self, app):
+        self.app = app
+        self.win = tk.Toplevel(app.root)
+        self.win.title("Jobs")
+        self.win.iconbitmap(app.get_path("assets\\icon.ico"))
+        self.win.resizable(False, False)
+        app.center_window(self.win, 660, 260)
+
+        columns = ("kind", "title", "state", "progress", "speed", "eta", "status")
+        self.tree = ttk.Treeview(self.win, columns=columns, show="headings", height=9)
+        for col, text, width in (
+            ("kind", "Type", 60),
+            ("title", "Name", 170),
+            ("state", "State", 70),
+            ("progress", "%", 45),
+            ("speed", "Speed", 100),
+            ("eta", "ETA", 50),
+            ("status", "Status", 150),
+        ):
+            self.tree.heading(col, text=text)
+            self.tree.column(col, width=width, anchor="w")
+        self.tree.pack(fill="both", expand=True, padx=8, pady=(8, 4))
+
+        buttons = tk.Frame(self.win)
+        buttons.pack(pady=(0, 8))
+        tk.Button(buttons, text="Cancel", command=self.cancel_selected, width=14).pack(side="left", padx=5)
+        tk.Button(buttons, text="Clear finished", command=self.clear_finished, width=14).pack(side="left", padx=5)
+
+        self.win.protocol("WM_DELETE_WINDOW", self.close)
+        self.refresh()
+
+    @property
+    def is_open(self):
+        try:
+            return bool(self.win.winfo_exists())
+        except tk.TclError:
+            return False
+
+    def close(self):
+        try:
+            self.win.destroy()
+        except tk.TclError:
+            pass
+
+    def lift(self):
+        self.win.deiconify()
+        self.win.lift()
+
+    def cancel_selected(self):
+        for iid in self.tree.selection():
+            self.app.jobs.cancel(int(iid))
+
+    def clear_finished(self):
+        self.app.jobs.clear_finished()
+
+    @staticmethod
+    def _format_eta(seconds):
+        if seconds is None:
+            return ""
+        seconds = int(seconds)
+        return f"{seconds // 60}:{seconds % 60:02d}"
+
+    def refresh(self):
+        if not self.is_open:
+            return
+
+        jobs = self.app.jobs.jobs()
+        current = {str(job.id) for job in jobs}
+
+        for item in self.tree.get_children():
+            if item not in current:
+                self.tree.delete(item)
+
+        for job in jobs:
+            values = (
+                self.KIND_LABELS.get(job.kind, job.kind),
+                job.title,
+                job.state,
+                f"{int(job.progress)}",
+                job.throughput_text,
+                self._format_eta(job.eta),
+                str(job.error) if job.error else job.status,
+            )
+            iid = str(job.id)
+            if self.tree.exists(iid):
+                self.tree.item(iid, values=values)
+            else:
+                self.tree.insert("", "end", iid=iid, values=values)
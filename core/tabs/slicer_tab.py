@@ -1,7 +1,8 @@
+import os
 import tkinter as tk
 from tkinter import filedialog, messagebox
-import threading
 
+from ..services.trim_service import TrimService
 from .ui_helpers import build_tab_canvas, add_bottom_right_icons
 
 
@@ -11,6 +12,8 @@ class SlicerTab:
     def __init__(self, app, notebook):
         self.app = app
         self.frame = tk.Frame(notebook)
+        # rangos [(start, end)] para exportar varios cortes del mismo archivo
+        self.ranges = []
         self._build()
 
     def set_mute_icon(self, img):
@@ -33,6 +36,10 @@ class SlicerTab:
         self.panel_video.pack(fill="both", expand=True)
         canvas.create_window(420, 110, window=self.frame_preview)
 
+        # contador de frames del preview (mostrados / descartados)
+        self.label_frames = tk.Label(canvas, text="", bg="#000000", fg="white", font=("Arial", 8))
+        canvas.create_window(420, 210, window=self.label_frames)
+
         self.slider_start = tk.Scale(canvas, from_=0, to=100, length=178, orient=tk.HORIZONTAL)
         self.slider_end = tk.Scale(canvas, from_=0, to=100, length=178, orient=tk.HORIZONTAL)
         self.entry_start_time = tk.Entry(canvas, width=30)
@@ -74,6 +81,18 @@ class SlicerTab:
         canvas.create_window(430, 230, window=self.button_pause)
         canvas.create_window(130, 345, window=self.button_cut)
 
+        # lista de rangos: si tiene alguno, Slice los exporta todos juntos
+        canvas.create_text(420, 257, text="Ranges", font=("Arial", 10, "bold"), fill="white")
+        self.list_ranges = tk.Listbox(canvas, width=34, height=4, activestyle="none")
+        canvas.create_window(420, 305, window=self.list_ranges)
+
+        self.button_add_range = tk.Button(canvas, text="Add", command=self.add_range, width=8)
+        self.button_remove_range = tk.Button(canvas, text="Remove", command=self.remove_range, width=8)
+        self.button_import_ranges = tk.Button(canvas, text="Import...", command=self.import_ranges, width=8)
+        for i, btn in enumerate((self.button_add_range, self.button_remove_range, self.button_import_ranges)):
+            btn.config(state=tk.DISABLED)
+            canvas.create_window(340 + i * 80, 360, window=btn)
+
         self.btn_mute = add_bottom_right_icons(self.app, canvas, prefix="")
 
         # 🔥 bindings: si el usuario toca/mueve sliders, cortamos preview para no crashear
@@ -88,6 +107,7 @@ class SlicerTab:
         self.app.entry_start_time = self.entry_start_time
         self.app.entry_end_time = self.entry_end_time
         self.app.panel_video = self.panel_video
+        self.app.label_frames = self.label_frames
         self.app.button_cut = self.button_cut
         self.app.button_play = self.button_play
         self.app.button_pause = self.button_pause
@@ -132,6 +152,10 @@ class SlicerTab:
         self.entry_file_path.delete(0, tk.END)
         self.entry_file_path.insert(0, file_path)
 
+        # los rangos eran del archivo anterior
+        self.ranges = []
+        self._refresh_ranges()
+
         self.app.video_player.load_video(file_path)
 
         # habilitar controles
@@ -156,6 +180,70 @@ class SlicerTab:
         self.button_cut.config(state=tk.NORMAL)
         self.button_play.config(state=tk.NORMAL)
         self.button_pause.config(state=tk.NORMAL)
+        self.button_add_range.config(state=tk.NORMAL)
+        self.button_remove_range.config(state=tk.NORMAL)
+        self.button_import_ranges.config(state=tk.NORMAL)
+
+    # -------------------- rangos --------------------
+
+    def _refresh_ranges(self):
+        self.list_ranges.delete(0, tk.END)
+        for start, end in self.ranges:
+            self.list_ranges.insert(tk.END, f"{start:.2f}s - {end:.2f}s  ({end - start:.2f}s)")
+        self.button_cut.config(text=f"Slice ({len(self.ranges)} ranges)" if self.ranges else "Slice")
+
+    def _add_ranges(self, ranges):
+        """Agrega rangos válidos para el archivo cargado; devuelve los que no entran."""
+        media = self.app.video_player.media
+        duration = media["duration"] if media else None
+        invalid = []
+        for start, end in ranges:
+            if start < 0 or start >= end or (duration is not None and end > duration + 0.001):
+                invalid.append((start, end))
+            elif (start, end) not in self.ranges:
+                self.ranges.append((start, end))
+        self.ranges.sort()
+        self._refresh_ranges()
+        return invalid
+
+    def add_range(self):
+        """Agrega el rango de los entries de start / end."""
+        self.app.soundmanager.play_sound("button")
+        try:
+            start = float(self.entry_start_time.get())
+            end = float(self.entry_end_time.get())
+        except ValueError:
+            messagebox.showwarning("Error", "Invalid trim times.")
+            return
+        if self._add_ranges([(start, end)]):
+            messagebox.showwarning("Error", "Invalid trim times.")
+
+    def remove_range(self):
+        self.app.soundmanager.play_sound("button")
+        selected = self.list_ranges.curselection()
+        if not selected:
+            return
+        del self.ranges[selected[0]]
+        self._refresh_ranges()
+
+    def import_ranges(self):
+        """Rangos desde un .txt / .csv (inicio, fin por línea; ver TrimService.parse_ranges)."""
+        self.app.soundmanager.play_sound("button")
+        path = filedialog.askopenfilename(filetypes=[("Range lists", "*.txt *.csv"), ("All files", "*.*")])
+        if not path:
+            return
+        try:
+            ranges = TrimService.load_ranges(path)
+        except (OSError, ValueError) as e:
+            messagebox.showwarning("Error", f"Could not import ranges: {e}")
+            return
+
+        invalid = self._add_ranges(ranges)
+        if invalid:
+            messagebox.showwarning(
+                "Ranges",
+                f"{len(invalid)} of {len(ranges)} ranges are outside the video and were skipped."
+            )
 
     def slice_video(self):
         self.app.soundmanager.play_sound("button")
@@ -169,13 +257,81 @@ class SlicerTab:
             messagebox.showerror("Error", "Please select a video file first.")
             return
 
-        def worker():
-            try:
-                self.app.video_player.trim_video()
-            except Exception as e:
-                self.app.ui.run_on_ui(
-                    lambda: messagebox.showwarning("Error", f"Error when slicing video: {e}")
-                )
+        if self.ranges:
+            self.slice_ranges()
+            return
 
-        threading.Thread(target=worker, daemon=True).start()
+        # validación + diálogo de guardado acá (UI thread); el encode va a la cola
+        spec = self.app.video_player.trim_video()
+        if not spec:
+            return
+
+        def work(job):
+            stats = self.app.video_player.run_trim(
+                spec, on_progress=job.set_progress, threads=job.threads,
+                cancel_event=job.cancel_event, on_event=job.on_event
+            )
+            job.set_stats(stats)
+            return stats
+
+        def done(job):
+            def _u():
+                if job.state == "done":
+                    self.app.soundmanager.play_sound("success")
+                    extra = "".join(
+                        f"\n{r['output']}" + ("" if r["fits"] else " (over size limit)")
+                        for r in job.result.get("renditions") or []
+                    )
+                    messagebox.showinfo(
+                        "Success",
+                        f"Video saved at: {spec['output']}{extra}\n"
+                        f"Speed: {job.result['realtime']:.2f}x realtime ({job.result['encode_fps']:.0f} fps)"
+                    )
+                elif job.state == "failed":
+                    messagebox.showwarning("Error", f"Error trimming the video: {job.error}")
+            self.app.ui.run_on_ui(_u)
+
+        self.app.jobs.submit("slice", os.path.basename(spec["output"]), work, on_done=done)
+        self.app.show_jobs()
+
+    def slice_ranges(self):
+        """Exporta todos los rangos de la lista en un solo job (TrimService.run_batch)."""
+        specs = self.app.video_player.trim_batch(list(self.ranges))
+        if not specs:
+            return
 
+        def work(job):
+            stats = self.app.video_player.run_batch(
+                specs, on_progress=job.set_progress, threads=job.threads,
+                cancel_event=job.cancel_event, on_event=job.on_event
+            )
+            job.set_stats(stats)
+            return stats
+
+        def done(job):
+            def _u():
+                if job.state == "done":
+                    stats = job.result
+                    errors = "".join(
+                        f"\n{os.path.basename(o['output'])}: {o['error']}"
+                        for o in stats["outputs"] if not o["ok"]
+                    )
+                    if stats["failed"]:
+                        messagebox.showwarning(
+                            "Error",
+                            f"{stats['done']} of {len(specs)} ranges saved.{errors}"
+                        )
+                    else:
+                        self.app.soundmanager.play_sound("success")
+                        messagebox.showinfo(
+                            "Success",
+                            f"{stats['done']} ranges saved at: {os.path.dirname(specs[0]['output'])}\n"
+                            f"Speed: {stats['realtime']:.2f}x realtime"
+                        )
+                elif job.state == "failed":
+                    messagebox.showwarning("Error", f"Error trimming the video: {job.error}")
+            self.app.ui.run_on_ui(_u)
+
+        title = f"{os.path.basename(specs[0]['input'])} ({len(specs)} ranges)"
+        self.app.jobs.submit("slice", title, work, on_done=done)
+        self.app.show_jobs()
@@ -31,7 +31,9 @@ def add_bottom_right_icons(app, canvas, prefix=""):
         borderwidth=0,
     )
     btn_info = tk.Button(canvas, image=app.icons["info"], command=app.info_box, borderwidth=0)
+    btn_jobs = tk.Button(canvas, text="Jobs", command=app.show_jobs, font=("Arial", 8))
 
+    canvas.create_window(425, 400, window=btn_jobs)
     canvas.create_window(470, 400, window=btn_settings)
     canvas.create_window(510, 400, window=btn_mute)
     canvas.create_window(550, 400, window=btn_info)
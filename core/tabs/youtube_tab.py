@@ -1,7 +1,6 @@
 import os
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
-import threading
 from pathlib import Path
 
 from .ui_helpers import build_tab_canvas, add_bottom_right_icons
@@ -13,7 +12,6 @@ class YouTubeTab:
     def __init__(self, app, notebook):
         self.app = app
         self.frame = tk.Frame(notebook)
-        self._downloading = False
         self._build()
 
     def _default_downloads_path(self) -> str:
@@ -84,6 +82,13 @@ class YouTubeTab:
 
         self.btn_mute = add_bottom_right_icons(self.app, canvas, prefix="yt")
 
+        # progreso/estado de yt-dlp por el bus de UI (se aplica sólo el último valor).
+        # Con varias descargas a la vez el tab muestra sólo la última pedida; el resto
+        # tiene su progreso en la ventana de jobs.
+        self._focus_job_id = None
+        self.app.ui.bus.register("yt.status", lambda text: self.lbl_status.config(text=text))
+        self.app.ui.bus.register("yt.progress", self._apply_progress)
+
     # -------------------------
     # Persistencia de carpeta
     # -------------------------
@@ -110,42 +115,35 @@ class YouTubeTab:
             self._save_download_dir(folder)
 
     # ---------- Thread-safe UI helpers ----------
-    def _set_status(self, text):
-        self.app.root.after(0, lambda: self.lbl_status.config(text=text))
-
-    def _set_progress(self, value):
-        def _u():
-            self.progress["value"] = max(0, min(100, float(value)))
-        self.app.root.after(0, _u)
-
-    def _set_downloading(self, downloading: bool):
-        def _u():
-            self._downloading = downloading
-            self.btn_download.config(state=("disabled" if downloading else "normal"))
-            if not downloading:
-                self._set_status("")
-        self.app.root.after(0, _u)
+    def _set_status(self, text, job=None):
+        """job: sólo se muestra si es la descarga que sigue el tab (None = siempre)."""
+        if job is None or job.id == self._focus_job_id:
+            self.app.ui.bus.post("yt.status", text)
+
+    def _set_progress(self, value, job=None):
+        if job is None or job.id == self._focus_job_id:
+            self.app.ui.bus.post("yt.progress", value)
+
+    def _apply_progress(self, value):
+        self.progress["value"] = max(0, min(100, float(value)))
 
     # ---------- yt-dlp progress hook ----------
-    def _ytdlp_hook(self, line: str):
+    def _ytdlp_hook(self, line: str, job=None):
         pct = self.app.youtube_service.parse_progress_percent(line)
         if pct is not None:
-            self._set_progress(pct)
-            self._set_status(f"Downloading... {pct:.1f}%")
+            self._set_progress(pct, job)
+            self._set_status(f"Downloading... {pct:.1f}%", job)
         else:
             if "[ExtractAudio]" in line:
-                self._set_status("Converting to MP3...")
+                self._set_status("Converting to MP3...", job)
             elif "Merging formats" in line:
-                self._set_status("Merging video+audio...")
+                self._set_status("Merging video+audio...", job)
             elif "Destination" in line:
-                self._set_status("Starting...")
+                self._set_status("Starting...", job)
 
     def download(self):
         self.app.soundmanager.play_sound("button")
 
-        if self._downloading:
-            return
-
         url = self.entry_url.get().strip()
         out_dir = self.entry_out.get().strip()
         quality = self.quality_combo.get().strip()
@@ -175,35 +173,59 @@ class YouTubeTab:
         self._save_download_dir(out_dir)
 
         self._set_progress(0)
-        self._set_status("Preparing...")
-        self._set_downloading(True)
-
-        def worker():
-            ok = False
-            try:
-                ok = self.app.youtube_service.download(
-                    url=url,
-                    out_dir=out_dir,
-                    quality=quality,
-                    output_type=output_type,
-                    progress_hook=self._ytdlp_hook,
-                )
-            except FileNotFoundError as e:
-                ok = False
-                self.app.root.after(0, lambda: messagebox.showerror("Missing dependency", str(e)))
-            except Exception as e:
-                self.app.root.after(0, lambda: messagebox.showerror("Error", str(e)))
-
+        self._set_status("Queued...")
+
+        def work(job):
+            def hook(line):
+                self._ytdlp_hook(line, job)
+                pct = self.app.youtube_service.parse_progress_percent(line)
+                if pct is not None:
+                    job.set_progress(pct)
+
+            job.set_status("Downloading...")
+            out_path = self.app.youtube_service.download(
+                url=url,
+                out_dir=out_dir,
+                quality=quality,
+                output_type=output_type,
+                progress_hook=hook,
+                cancel_event=job.cancel_event,
+            )
+
+            # post-proceso: datos reales del archivo descargado (probe memoizado compartido)
+            details = ""
+            if out_path and os.path.exists(out_path):
+                try:
+                    info = self.app.ffmpeg_service.probe(out_path)
+                    if info["video"]:
+                        details += f"\nResolución: {info['video']['width']}x{info['video']['height']}"
+                    if info["duration"]:
+                        details += f"\nDuración: {info['duration']:.1f}s"
+                    details += f"\nTamaño: {info['size'] / (1024 * 1024):.2f} MB"
+                except Exception:
+                    pass
+            return details
+
+        def done(job):
             def finish():
-                self._set_downloading(False)
-                if ok:
-                    self._set_progress(100)
-                    self._set_status("Done ✅")
+                if job.state == "done":
+                    self._set_progress(100, job)
+                    self._set_status("Done ✅", job)
                     self.app.soundmanager.play_sound("success")
-                    messagebox.showinfo("YouTube Downloader", f"Listo!\nFormato: {fmt_ui}\nCalidad: {quality}")
+                    messagebox.showinfo("YouTube Downloader", f"Listo!\nFormato: {fmt_ui}\nCalidad: {quality}{job.result}")
+                elif job.state == "cancelled":
+                    self._set_status("Cancelled", job)
                 else:
-                    self._set_status("Failed")
-
-            self.app.root.after(0, finish)
-
-        threading.Thread(target=worker, daemon=True).start()
+                    self._set_status("Failed", job)
+                    if isinstance(job.error, FileNotFoundError):
+                        messagebox.showerror("Missing dependency", str(job.error))
+                    elif job.error is not None:
+                        messagebox.showerror("Error", str(job.error))
+
+            self.app.ui.run_on_ui(finish)
+
+        # la nueva descarga pasa a ser la que sigue el tab; las anteriores dejan de pisar
+        # el label (sus finish corren en el UI thread, o sea después de esto)
+        self._focus_job_id = None
+        job = self.app.jobs.submit("download", url, work, on_done=done)
+        self._focus_job_id = job.id
@@ -1,31 +1,57 @@
 import os
 import cv2
-import time
-import threading
 import subprocess
 import sys
-from moviepy import VideoFileClip
 from PIL import Image, ImageTk, Image
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 
+from .framedecoder import FrameDecoder
+from .previewengine import PreviewEngine
+from .services.index_service import IndexService
+from .services.filmstrip_service import FilmstripService
+from .services.trim_service import TrimService
+
 
 class VideoPlayer:
     def __init__(self, gui):
         self.gui = gui
-        self.cap = None
-        self.clip = None
-        self.playing_preview = False
-        self.paused = False
+        self.media = None
         self.video_fps = 30.0
 
-        # sincronización
-        self._cap_lock = threading.Lock()
-        self._preview_thread = None
+        # panel: un solo PhotoImage reutilizado; el último frame pendiente vive en el bus de UI
+        self._panel_photo = None
+        self._frames_displayed = 0
+        self._frames_replaced = 0
+        self.gui.ui.bus.register("panel.frame", self._apply_panel_image)
+        self.gui.ui.bus.register("preview.finished", self._apply_preview_finished)
+
+        # decoder thread: dueño de la captura (seeks latest-wins)
+        self.decoder = FrameDecoder(on_frame=self._on_decoded_frame)
 
         self.ffmpeg_path = self.get_ffmpeg_path()
         print("Using FFMEPG in:", self.ffmpeg_path)
 
+        # preview: ffmpeg decodifica ya escalado al tamaño del panel
+        self.preview_engine = PreviewEngine(
+            self.ffmpeg_path, 320, 180,
+            cwd=self._ffmpeg_cwd(),
+            popen_kwargs=self._popen_no_window_kwargs()
+        )
+
+        # ffprobe (keyframes, metadata memoizada, etc.): la instancia compartida del GUI
+        self.ff = gui.ffmpeg_service
+        self.trim_service = TrimService(self.ff, ffmpeg_path=self.ffmpeg_path)
+
+        # índice persistente frame <-> tiempo / keyframes (se arma en background)
+        self.index_service = IndexService(self.ff, gui.get_path("cache"))
+        self.frame_index = None
+
+        # filmstrip de thumbnails para scrubbing instantáneo
+        self.filmstrip_service = FilmstripService(self.ff, gui.get_path("cache"))
+        self.filmstrip = None
+        self._refine_after_id = None
+
     def get_ffmpeg_path(self):
         # If the program is being executed on the standalone or without being compiled
         if getattr(sys, 'frozen', False):
@@ -68,28 +94,70 @@ class VideoPlayer:
             pass
         self._ui(fn)
 
-    def _set_panel_image(self, img_rgb):
-        """Convierte numpy RGB -> PhotoImage y lo setea en el label (SIEMPRE en UI thread)."""
-        def apply():
-            try:
-                img = Image.fromarray(img_rgb)
-                img = img.resize((320, 180), Image.LANCZOS)
-                img_tk = ImageTk.PhotoImage(image=img)
-                self.gui.panel_video.config(image=img_tk)
-                self.gui.panel_video.image = img_tk
-            except Exception:
-                pass
+    PANEL_SIZE = (320, 180)
 
-        self._ui(apply)
+    def _set_panel_image(self, img_rgb, generation=None):
+        """
+        numpy RGB -> PIL del tamaño del panel en el thread que llama (worker),
+        y en el UI thread sólo un paste() sobre un PhotoImage reutilizado.
+        Si el pump de UI todavía no mostró el frame anterior, éste lo reemplaza (y cuenta como dropped).
+        generation: la del preview que lo generó (None para seeks/thumbnails).
+        """
+        w, h = self.PANEL_SIZE
+        try:
+            if img_rgb.shape[1] != w or img_rgb.shape[0] != h:
+                img_rgb = cv2.resize(img_rgb, (w, h), interpolation=cv2.INTER_AREA)
+            # fromarray copia: el buffer del worker se puede reusar tranquilo
+            img = Image.fromarray(img_rgb)
+        except Exception:
+            return
 
-    def _safe_release_cap(self):
-        with self._cap_lock:
-            try:
-                if self.cap is not None:
-                    self.cap.release()
-            except Exception:
-                pass
-            self.cap = None
+        if self.gui.ui.bus.post("panel.frame", (img, generation)):
+            self._frames_replaced += 1
+
+    def _apply_panel_image(self, pending):
+        """UI thread (pump del bus): pega el frame más nuevo en el PhotoImage del panel."""
+        img, generation = pending
+        # frame de un preview que ya se frenó: no pisa lo que haya pedido el usuario después
+        if generation is not None and generation != self.preview_engine.generation:
+            return
+
+        try:
+            if self._panel_photo is None or (self._panel_photo.width(), self._panel_photo.height()) != img.size:
+                self._panel_photo = ImageTk.PhotoImage(image=img)
+                self.gui.panel_video.config(image=self._panel_photo)
+                self.gui.panel_video.image = self._panel_photo
+            else:
+                self._panel_photo.paste(img)
+        except Exception:
+            return
+
+        self._frames_displayed += 1
+        if self.playing_preview or self._frames_displayed % 15 == 0:
+            self._update_frame_counter()
+
+    def _reset_frame_counter(self):
+        self._frames_displayed = 0
+        self._frames_replaced = 0
+        self.preview_engine.frames_dropped = 0
+
+    def _update_frame_counter(self):
+        label = getattr(self.gui, "label_frames", None)
+        if label is None:
+            return
+        dropped = self._frames_replaced + self.preview_engine.frames_dropped
+        try:
+            label.config(text=f"{self._frames_displayed} shown / {dropped} dropped")
+        except Exception:
+            pass
+
+    def _on_decoded_frame(self, frame):
+        """Callback del FrameDecoder (thread del decoder, nunca el UI thread)."""
+        try:
+            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        except Exception:
+            return
+        self._set_panel_image(frame_rgb)
 
     # -------------------- subprocess helpers (no-window, stable cwd, drain stderr) --------------------
 
@@ -137,23 +205,35 @@ class VideoPlayer:
         try:
             self.stop_preview()
 
-            self.clip = VideoFileClip(file_path)
+            # metadata con un solo ffprobe (sin abrir readers de MoviePy)
+            self.media = self.ff.probe_media_info(file_path)
+            if self.media["duration"] <= 0:
+                raise RuntimeError("Invalid duration")
 
-            # abrir cap para scrubbing (show_frame)
-            self._safe_release_cap()
-            with self._cap_lock:
-                self.cap = cv2.VideoCapture(file_path)
-                try:
-                    self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 10)
-                except Exception:
-                    pass
-                fps = self.cap.get(cv2.CAP_PROP_FPS)
-                self.video_fps = fps or 30.0
+            # índice de keyframes/PTS: instantáneo si ya está en cache, si no en background
+            self.frame_index = None
+
+            def on_index_ready(index, path=file_path):
+                # sólo si sigue abierto el mismo archivo
+                if self.media is not None and self.media["path"] == path:
+                    self.frame_index = index
+
+            self.index_service.build_async(file_path, on_ready=on_index_ready)
+
+            # filmstrip (background; el anterior deja de generarse)
+            if self.filmstrip is not None:
+                self.filmstrip.stop()
+            self.filmstrip = self.filmstrip_service.open(file_path, self.media["duration"])
+
+            # sesión de captura persistente para scrubbing (la del archivo anterior se cierra)
+            self.decoder.close()
+            self.decoder.open(file_path)
+            self.video_fps = self.media["fps"] or self.decoder.fps
 
             self.gui.enable_buttons()
-            self.gui.slider_start.config(to=self.clip.duration, command=self.update_start_time)
-            self.gui.slider_end.config(to=self.clip.duration, command=self.update_end_time)
-            self.gui.slider_end.set(self.clip.duration)
+            self.gui.slider_start.config(to=self.media["duration"], command=self.update_start_time)
+            self.gui.slider_end.config(to=self.media["duration"], command=self.update_end_time)
+            self.gui.slider_end.set(self.media["duration"])
 
             self.show_frame(0)
 
@@ -164,12 +244,26 @@ class VideoPlayer:
                 pass
             messagebox.showwarning("Error", f"Video could not be loaded: {e}")
 
+    def close(self):
+        """Al cerrar la app: frena el preview, el filmstrip y libera la captura del decoder."""
+        self.preview_engine.stop()
+        if self.filmstrip is not None:
+            self.filmstrip.stop()
+        self.decoder.close()
+
     # -------------------- preview --------------------
 
+    @property
+    def playing_preview(self):
+        return self.preview_engine.running
+
+    @property
+    def paused(self):
+        return self.preview_engine.paused
+
     def stop_preview(self):
-        """Stop preview safely (can be called from UI thread)."""
-        self.playing_preview = False
-        self.paused = False
+        """Stop preview safely (can be called from UI thread). No espera al worker."""
+        self.preview_engine.stop()
 
         def reset_pause_text():
             try:
@@ -181,14 +275,13 @@ class VideoPlayer:
 
     def start_video_preview(self):
         """Starts or restarts the video preview in a separate thread."""
-        if self.clip is None:
+        if self.media is None:
             messagebox.showwarning("Error", "No video loaded.")
             return
 
-        # reinicia
+        # reinicia: el worker anterior queda frenado (generation vieja, sus frames se descartan)
         if self.playing_preview:
             self.stop_preview()
-            time.sleep(0.05)
 
         # deshabilitar play instantáneo
         self._ui(lambda: self.gui.button_play.config(state=tk.DISABLED))
@@ -207,8 +300,7 @@ class VideoPlayer:
             messagebox.showwarning("Error", "Start time should be less than end time.")
             return
 
-        self.playing_preview = True
-        self.paused = False
+        self._reset_frame_counter()
 
         # habilitar play después de 1s
         try:
@@ -216,67 +308,36 @@ class VideoPlayer:
         except Exception:
             self._ui(lambda: self.gui.button_play.config(state=tk.NORMAL))
 
-        # lanzar thread
-        self._preview_thread = threading.Thread(
-            target=self._play_video_preview_worker,
-            args=(start_time, end_time),
-            daemon=True
+        # worker del engine: ffmpeg entrega frames ya escalados, pacing por reloj
+        self.preview_engine.start(
+            self.media["path"], start_time, end_time, self.video_fps,
+            on_frame=self._on_preview_frame,
+            on_finished=self._on_preview_finished,
         )
-        self._preview_thread.start()
-
-    def _play_video_preview_worker(self, start_time: float, end_time: float):
-        """Worker thread: NO toca tkinter; sólo lee frames y los manda por _ui."""
-        self._safe_release_cap()
-        with self._cap_lock:
-            self.cap = cv2.VideoCapture(self.clip.filename)
-            if self.cap is None or not self.cap.isOpened():
-                self.playing_preview = False
-                self._ui(lambda: messagebox.showwarning("Error", "Could not open video capture."))
-                return
 
-            self.cap.set(cv2.CAP_PROP_POS_FRAMES, int(start_time * self.video_fps))
-
-        last_emit = 0.0
-        min_emit_interval = 1.0 / max(self.video_fps, 1.0)
-
-        while self.playing_preview:
-            if self.paused:
-                time.sleep(0.05)
-                continue
-
-            with self._cap_lock:
-                if self.cap is None:
-                    break
-
-                ret, frame = self.cap.read()
-                if not ret:
-                    break
-
-                current_video_time = (self.cap.get(cv2.CAP_PROP_POS_FRAMES) / self.video_fps)
-
-            if current_video_time >= end_time:
-                break
-
-            now = time.time()
-            if now - last_emit >= min_emit_interval:
-                try:
-                    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                except Exception:
-                    continue
-                self._set_panel_image(frame_rgb)
-                last_emit = now
+    def _on_preview_frame(self, frame_rgb, generation):
+        """Worker del preview: descarta frames de un preview ya frenado/reemplazado."""
+        if generation != self.preview_engine.generation:
+            return
+        self._set_panel_image(frame_rgb, generation=generation)
 
-            time.sleep(0.001)
+    def _on_preview_finished(self, generation, error):
+        """Worker del preview: sólo postea al bus (el hilo de Tk puede estar ocupado)."""
+        self.gui.ui.bus.post("preview.finished", (generation, error))
 
-        self.playing_preview = False
-        self._safe_release_cap()
+    def _apply_preview_finished(self, pending):
+        """UI thread (pump del bus)."""
+        generation, error = pending
+        if error is not None and generation == self.preview_engine.generation:
+            messagebox.showwarning("Error", f"Could not play preview: {error}")
+        self._update_frame_counter()
 
     def toggle_pause(self):
-        self.paused = not self.paused
+        paused = self.preview_engine.toggle_pause()
 
         def set_text():
             try:
-                self.gui.button_pause.config(text="Resume" if self.paused else "Pause")
+                self.gui.button_pause.config(text="Resume" if paused else "Pause")
             except Exception:
                 pass
 
@@ -291,217 +352,142 @@ class VideoPlayer:
         s = seconds % 60
         return f"{h:02d}:{m:02d}:{s:06.3f}"
 
-    def _calc_discord_bitrates(self, duration_sec: float, target_mb: float = 8.0):
-        """
-        Calcula bitrates (kbps) para que el output quede <= target_mb.
-        Usamos margen (0.97) para overhead de contenedor/metadatos.
-        """
-        duration_sec = max(0.1, float(duration_sec))
-
-        target_bytes = target_mb * 1024 * 1024 * 0.97
-        total_kbps = int((target_bytes * 8) / duration_sec / 1000)
+    def _keyframes_near(self, points):
+        """Keyframes del índice persistente si ya está listo; si no, ffprobe alrededor de points."""
+        if self.frame_index is not None and self.frame_index.keyframe_times:
+            return list(self.frame_index.keyframe_times)
+        return self.ff.probe_keyframes_near(self.media["path"], points)
 
-        if total_kbps <= 160:
-            audio_kbps = 32
-        elif total_kbps <= 260:
-            audio_kbps = 64
-        else:
-            audio_kbps = 96
+    def _show_trim_times(self, start_time: float, end_time: float):
+        """Refleja en los entries los tiempos efectivos del corte (p.ej. ajustados a keyframes)."""
+        def apply():
+            try:
+                self.gui.entry_start_time.delete(0, tk.END)
+                self.gui.entry_start_time.insert(0, str(round(start_time, 3)))
+                self.gui.entry_end_time.delete(0, tk.END)
+                self.gui.entry_end_time.insert(0, str(round(end_time, 3)))
+            except Exception:
+                pass
 
-        video_kbps = max(80, total_kbps - audio_kbps)
-        return video_kbps, audio_kbps, total_kbps
+        self._ui_safe(apply)
 
     # -------------------- trim / slice --------------------
 
     def trim_video(self):
-        if self.clip is None:
+        """
+        UI thread: valida los tiempos, ajusta a keyframes si corresponde y pide dónde guardar.
+        Devuelve el spec del corte para run_trim (o None si no hay nada que hacer).
+        El spec es autocontenido: el job no depende de qué archivo esté cargado después.
+        """
+        if self.media is None:
             messagebox.showwarning("Error", "No video loaded.")
-            return
-
-        def _set_progress(p):
-            p = float(max(0, min(100, p)))
-            try:
-                if hasattr(self.gui, "ui") and hasattr(self.gui.ui, "set_progress"):
-                    self.gui.ui.set_progress(p)
-                    return
-            except Exception:
-                pass
-
-            def _u():
-                try:
-                    if hasattr(self.gui, "progress") and self.gui.progress is not None:
-                        self.gui.progress["value"] = p
-                except Exception:
-                    pass
-            self._ui_safe(_u)
+            return None
 
         try:
             start_time = float(self.gui.entry_start_time.get())
             end_time = float(self.gui.entry_end_time.get())
+        except ValueError:
+            messagebox.showwarning("Error", "Invalid trim times.")
+            return None
 
-            if start_time >= end_time or end_time > self.clip.duration:
-                messagebox.showwarning("Error", "Invalid trim times.")
-                return
-
-            output_path = filedialog.asksaveasfilename(
-                defaultextension=".mp4",
-                filetypes=[("MP4 files", "*.mp4")]
-            )
-            if not output_path:
-                return
-
-            self.gui.soundmanager.play_loop("slice")
+        if start_time >= end_time or end_time > self.media["duration"]:
+            messagebox.showwarning("Error", "Invalid trim times.")
+            return None
 
-            # mostrar loading UNA sola vez (acá)
-            try:
-                if hasattr(self.gui, "ui"):
-                    self.gui.ui.show_loading("Processing clip...", "Processing clip...")
-            except Exception:
-                pass
+        discord_mode = bool(self.gui.configuration.get("discord_8mb", False))
+        slice_mode = self.gui.configuration.get("slice_mode", "reencode")
 
-            segment_duration = end_time - start_time
-            discord_mode = bool(self.gui.configuration.get("discord_8mb", False))
-
-            _set_progress(0)
-
-            if discord_mode:
-                v_kbps, a_kbps, _ = self._calc_discord_bitrates(segment_duration, target_mb=8.0)
-                vf = "scale=1280:-2,fps=30"
-
-                cmd = [
-                    self.ffmpeg_path, "-y",
-                    "-ss", str(start_time), "-to", str(end_time),
-                    "-i", self.clip.filename,
-
-                    "-vf", vf,
-                    "-c:v", "libx264",
-                    "-pix_fmt", "yuv420p",
-                    "-preset", "veryfast",
-                    "-b:v", f"{v_kbps}k",
-                    "-maxrate", f"{v_kbps}k",
-                    "-bufsize", f"{max(v_kbps * 2, 200)}k",
-
-                    "-c:a", "aac",
-                    "-b:a", f"{a_kbps}k",
-                    "-ac", "2",
-
-                    "-movflags", "+faststart",
-                    "-progress", "pipe:1",
-                    "-nostats",
-                    output_path
-                ]
-            else:
-                preset = self.gui.configuration.get('preset', 'medium')
-                bitrate = self.gui.configuration.get('bitrate', '2500k')
-                resolution_map = {
-                    '1080p': '1920x1080',
-                    '720p': '1280x720',
-                    '480p': '854x480',
-                    '360p': '640x360'
-                }
-                resolution = resolution_map.get(self.gui.configuration.get('resolution', '720p'), '1280x720')
-
-                cmd = [
-                    self.ffmpeg_path, "-y",
-                    "-ss", str(start_time), "-to", str(end_time),
-                    "-i", self.clip.filename,
-
-                    "-c:v", "libx264",
-                    "-preset", preset,
-                    "-b:v", bitrate,
-                    "-s", resolution,
-
-                    "-c:a", "aac",
-                    "-b:a", "128k",
-
-                    "-movflags", "+faststart",
-                    "-progress", "pipe:1",
-                    "-nostats",
-                    output_path
-                ]
-
-            # no window + cwd estable
-            startupinfo = None
-            creationflags = 0
-            if os.name == "nt":
-                startupinfo = subprocess.STARTUPINFO()
-                startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                startupinfo.wShowWindow = 0
-                creationflags = subprocess.CREATE_NO_WINDOW
-
-            process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                bufsize=1,
-                universal_newlines=True,
-                cwd=os.path.dirname(self.ffmpeg_path),
-                startupinfo=startupinfo,
-                creationflags=creationflags
+        try:
+            # copy: snap a keyframes / smart: bordes a re-encodear (keyframes del índice si está listo)
+            keyframes = None
+            if not discord_mode and slice_mode in ("copy", "smart"):
+                keyframes = self._keyframes_near([start_time, end_time])
+            start_time, end_time, keyframes = self.trim_service.resolve_range(
+                self.media["path"], start_time, end_time,
+                mode=slice_mode, discord=discord_mode,
+                duration=self.media["duration"], keyframes=keyframes
             )
+            if not discord_mode and slice_mode == "copy":
+                self._show_trim_times(start_time, end_time)
+        except Exception as e:
+            messagebox.showwarning("Error", f"Error reading keyframes: {e}")
+            return None
 
-            # drenar stderr (evita deadlock)
-            stderr_tail = []
-            def drain_err():
-                try:
-                    for ln in process.stderr:
-                        if not ln:
-                            break
-                        stderr_tail.append(ln.rstrip("\n"))
-                        if len(stderr_tail) > 120:
-                            stderr_tail.pop(0)
-                except Exception:
-                    pass
-
-            threading.Thread(target=drain_err, daemon=True).start()
-
-            # progreso por stdout (out_time_ms)
-            for line in iter(process.stdout.readline, ''):
-                if not line:
-                    break
-                line = line.strip()
-
-                if line.startswith("out_time_ms="):
-                    try:
-                        out_time = int(line.split("=", 1)[1]) / 1_000_000
-                        pct = (out_time / max(segment_duration, 0.001)) * 100
-                        _set_progress(pct)
-                    except Exception:
-                        pass
-                elif line == "progress=end":
-                    _set_progress(100)
-                    break
-
-            process.wait()
+        output_path = filedialog.asksaveasfilename(
+            defaultextension=".mp4",
+            filetypes=[("MP4 files", "*.mp4")]
+        )
+        if not output_path:
+            return None
 
-            self.gui.soundmanager.stop_sound()
+        try:
+            return self.trim_service.make_spec(
+                self.media["path"], start_time, end_time, output_path,
+                mode=slice_mode,
+                discord=discord_mode,
+                keyframes=keyframes,
+                fps=self.media.get("fps") or self.video_fps,
+                preset=self.gui.configuration.get('preset', 'medium'),
+                bitrate=self.gui.configuration.get('bitrate', '2500k'),
+                resolution=self.gui.configuration.get('resolution', '720p'),
+                # copia para Discord del mismo corte, con un solo decode (ver TrimService.run)
+                renditions=[{"name": "discord", "resolution": None, "bitrate": None,
+                             "max_mb": TrimService.DISCORD_TARGET_MB}]
+                if self.gui.configuration.get("discord_copy") and not discord_mode else None,
+            )
+        except ValueError as e:
+            messagebox.showwarning("Error", str(e))
+            return None
 
-            try:
-                if hasattr(self.gui, "ui"):
-                    self.gui.ui.hide_loading()
-            except Exception:
-                pass
+    def trim_batch(self, ranges):
+        """
+        UI thread: varios rangos del archivo cargado. Pide la carpeta de salida y
+        devuelve los specs (<base>_<start>-<end>.mp4) para run_batch, o None.
+        """
+        if self.media is None:
+            messagebox.showwarning("Error", "No video loaded.")
+            return None
 
-            if process.returncode != 0:
-                tail = "\n".join(stderr_tail)[-2000:].strip()
-                raise RuntimeError(f"FFmpeg failed (code {process.returncode}).\n\n{tail}")
+        discord_mode = bool(self.gui.configuration.get("discord_8mb", False))
+        slice_mode = self.gui.configuration.get("slice_mode", "reencode")
 
-            self.gui.soundmanager.play_sound("success")
-            messagebox.showinfo("Success", f"Video saved at: {output_path}")
+        out_dir = filedialog.askdirectory(title="Output folder")
+        if not out_dir:
+            return None
 
+        try:
+            # un solo ffprobe de keyframes para todos los bordes (o el índice si está listo)
+            keyframes = None
+            if not discord_mode and slice_mode in ("copy", "smart"):
+                keyframes = self._keyframes_near([t for r in ranges for t in r])
+            return self.trim_service.make_batch(
+                self.media["path"], ranges, out_dir=out_dir,
+                mode=slice_mode,
+                discord=discord_mode,
+                duration=self.media["duration"],
+                keyframes=keyframes,
+                fps=self.media.get("fps") or self.video_fps,
+                preset=self.gui.configuration.get('preset', 'medium'),
+                bitrate=self.gui.configuration.get('bitrate', '2500k'),
+                resolution=self.gui.configuration.get('resolution', '720p'),
+            )
         except Exception as e:
-            try:
-                self.gui.soundmanager.stop_sound()
-            except Exception:
-                pass
-            try:
-                if hasattr(self.gui, "ui"):
-                    self.gui.ui.hide_loading()
-            except Exception:
-                pass
-            messagebox.showwarning("Error", f"Error trimming the video: {e}")
+            messagebox.showwarning("Error", f"Invalid ranges: {e}")
+            return None
+
+    def run_batch(self, specs, on_progress=None, threads=None, cancel_event=None, on_event=None):
+        """Worker (job del scheduler): ver TrimService.run_batch."""
+        return self.trim_service.run_batch(
+            specs, on_progress=on_progress, threads=threads,
+            cancel_event=cancel_event, on_event=on_event
+        )
 
+    def run_trim(self, spec, on_progress=None, threads=None, cancel_event=None, on_event=None):
+        """Worker (job del scheduler): ver TrimService.run."""
+        return self.trim_service.run(
+            spec, on_progress=on_progress, threads=threads,
+            cancel_event=cancel_event, on_event=on_event
+        )
 
     # -------------------- sliders --------------------
 
@@ -511,7 +497,7 @@ class VideoPlayer:
 
         self.gui.entry_start_time.delete(0, tk.END)
         self.gui.entry_start_time.insert(0, str(round(float(val), 2)))
-        self.show_frame(float(val))
+        self._scrub(float(val))
 
     def update_end_time(self, val):
         if self.playing_preview:
@@ -519,27 +505,41 @@ class VideoPlayer:
 
         self.gui.entry_end_time.delete(0, tk.END)
         self.gui.entry_end_time.insert(0, str(round(float(val), 2)))
-        self.show_frame(float(val))
-
-    def show_frame(self, time_pos):
-        """Displays a specific frame from the video at a given timestamp."""
-        if self.playing_preview:
-            self.stop_preview()
-            time.sleep(0.01)
+        self._scrub(float(val))
 
-        with self._cap_lock:
-            if self.cap is None or not self.cap.isOpened():
-                return
-
-            self.cap.set(cv2.CAP_PROP_POS_MSEC, time_pos * 1000)
-            ret, frame = self.cap.read()
-
-        if not ret:
+    def _scrub(self, time_pos):
+        """
+        Mientras se arrastra el slider: thumbnail del filmstrip al instante (sin decode),
+        y el frame exacto recién cuando el usuario deja de mover (debounce).
+        """
+        thumb = self.filmstrip.nearest(time_pos) if self.filmstrip is not None else None
+        if thumb is None:
+            self.show_frame(time_pos)
             return
 
+        self._set_panel_image(thumb)
+
         try:
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            if self._refine_after_id is not None:
+                self.gui.root.after_cancel(self._refine_after_id)
+            self._refine_after_id = self.gui.root.after(150, lambda: self._refine_frame(time_pos))
         except Exception:
-            return
+            self.show_frame(time_pos)
 
-        self._set_panel_image(frame_rgb)
+    def _refine_frame(self, time_pos):
+        self._refine_after_id = None
+        self.show_frame(time_pos)
+
+    def show_frame(self, time_pos):
+        """
+        Displays a specific frame from the video at a given timestamp.
+        No decodifica acá: deja el pedido al FrameDecoder (el último pedido gana).
+        """
+        if self.playing_preview:
+            self.stop_preview()
+
+        # con índice: seek al PTS exacto del frame más cercano
+        if self.frame_index is not None and self.frame_index.frame_count:
+            time_pos = self.frame_index.time_of(self.frame_index.frame_at(time_pos))
+
+        self.decoder.request_frame(time_pos)
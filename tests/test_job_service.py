@@ -0,0 +1,25 @@
+import threading
+
+from core.services.job_service import Job, JobScheduler
+
+
+def test_cancel_queued_job_calls_on_done_once():
+    release = threading.Event()
+    done_calls = []
+
+    scheduler = JobScheduler(max_encodes=1)
+    # ocupa el único lugar de encode, así el segundo queda en cola
+    running = scheduler.submit("slice", "running", lambda job: release.wait(5))
+    queued = scheduler.submit("slice", "queued", lambda job: None, on_done=done_calls.append)
+    assert queued.state == Job.QUEUED
+
+    assert scheduler.cancel(queued.id)
+    assert queued.state == Job.CANCELLED
+    assert done_calls == [queued]
+
+    # cancelar de nuevo no repite on_done, y al liberarse el lugar no arranca
+    assert not scheduler.cancel(queued.id)
+    release.set()
+    assert scheduler.wait(5)
+    assert running.state == Job.DONE
+    assert done_calls == [queued]